@@ -0,0 +1,144 @@
+r"""
+Compare the throughput of concurrent requests made with a new client session
+for each request, as AsyncClient used to, against the shared session with a
+tuned connector that AsyncClient reuses.
+
+Examples:
+    python benchmarks/async_session.py
+    python benchmarks/async_session.py --requests 2000 --concurrency 100
+    python benchmarks/async_session.py \
+        --url https://api.twitter.com/2/openapi.json --requests 200
+"""
+
+import argparse
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import multiprocessing
+import time
+
+import aiohttp
+
+from tweepy.asynchronous import AsyncClient
+
+BODY = json.dumps({
+    "data": {"id": "783214", "name": "Twitter", "username": "Twitter"}
+}).encode("utf-8")
+
+
+def serve(delay, address, ready):
+    # Runs in a separate process, so that the server doesn't compete with the
+    # client for the GIL
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if delay:
+                time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+    class Server(ThreadingHTTPServer):
+        request_queue_size = 1024
+
+    server = Server(("127.0.0.1", 0), Handler)
+    address.value = server.server_address[1]
+    ready.set()
+    server.serve_forever()
+
+
+async def fetch(session, url):
+    async with session.get(url) as response:
+        await response.read()
+
+
+async def per_request_session(url, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request():
+        async with semaphore:
+            async with aiohttp.ClientSession() as session:
+                await fetch(session, url)
+
+    await asyncio.gather(*(request() for _ in range(requests)))
+
+
+async def shared_session(url, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with AsyncClient() as client:
+        session = client._get_session()
+
+        async def request():
+            async with semaphore:
+                await fetch(session, url)
+
+        await asyncio.gather(*(request() for _ in range(requests)))
+
+
+def run(name, function, url, requests, concurrency):
+    start = time.perf_counter()
+    asyncio.run(function(url, requests, concurrency))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<22}{elapsed:>12.3f}{requests / elapsed:>16,.0f}"
+        f"{elapsed / requests * 1000:>18.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument(
+        "--url",
+        help="URL to request, instead of a local HTTP server, e.g. to include "
+             "DNS lookups and TLS handshakes"
+    )
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument(
+        "--delay", type=float, default=0.005,
+        help="seconds the local HTTP server takes to respond"
+    )
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        address = multiprocessing.Value("i", 0)
+        ready = multiprocessing.Event()
+        server = multiprocessing.Process(
+            target=serve, daemon=True, args=(args.delay, address, ready)
+        )
+        server.start()
+        ready.wait()
+        url = f"http://127.0.0.1:{address.value}/2/users/783214"
+
+    print(f"{url}: {args.requests} requests, concurrency {args.concurrency}")
+    print(
+        f"{'session':<22}{'elapsed (s)':>12}{'requests/s':>16}"
+        f"{'per request (ms)':>18}"
+    )
+    try:
+        run(
+            "per-request session", per_request_session, url, args.requests,
+            args.concurrency
+        )
+        run(
+            "shared session", shared_session, url, args.requests,
+            args.concurrency
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.join()
+
+
+if __name__ == "__main__":
+    main()
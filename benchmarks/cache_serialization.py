@@ -0,0 +1,106 @@
+r"""
+Compare the size and speed of caching API results as pickled models against
+caching their raw JSON payloads with JSONSerializer.
+
+Examples:
+    python benchmarks/cache_serialization.py
+    python benchmarks/cache_serialization.py --number 1000
+    python benchmarks/cache_serialization.py \
+        --cassette cassettes/testme.json --payload-type user --single
+"""
+
+import argparse
+import json
+import os
+import time
+
+from tweepy import API, JSONSerializer, PickleSerializer
+from tweepy.cache import CachedPayload, zstd
+from tweepy.parsers import ModelParser
+
+CASSETTES = os.path.join(os.path.dirname(__file__), os.pardir, "cassettes")
+
+
+def load_payload(path):
+    # Only JSON cassettes are supported, to avoid depending on PyYAML
+    with open(path) as file:
+        cassette = json.load(file)
+    return cassette["interactions"][0]["response"]["body"]["string"]
+
+
+def measure(function, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        result = function()
+    return (time.perf_counter() - start) / number, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument(
+        "--cassette", default=os.path.join(CASSETTES, "testhometimeline.json"),
+        help="JSON cassette with the response payload to cache"
+    )
+    parser.add_argument(
+        "--payload-type", default="status",
+        help="model the payload is parsed as"
+    )
+    parser.add_argument(
+        "--single", action="store_true",
+        help="parse the payload as a single model, rather than a list"
+    )
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    api = API()
+    model_parser = ModelParser()
+    payload = load_payload(args.cassette)
+    payload_list = not args.single
+    result = model_parser.parse(
+        payload, api=api, payload_list=payload_list,
+        payload_type=args.payload_type
+    )
+    cached_payload = CachedPayload(
+        payload, args.payload_type, payload_list, False
+    )
+
+    def reparse(value):
+        return model_parser.parse(
+            value.payload, api=api, payload_list=value.payload_list,
+            payload_type=value.payload_type,
+            return_cursors=value.return_cursors
+        )
+
+    serializers = [
+        ("pickle (models)", PickleSerializer(), result, lambda value: value),
+        ("json", JSONSerializer(), cached_payload, reparse),
+        ("json + zlib", JSONSerializer("zlib"), cached_payload, reparse),
+    ]
+    if zstd is not None:
+        serializers.append(
+            ("json + zstd", JSONSerializer("zstd"), cached_payload, reparse)
+        )
+
+    print(f"payload: {len(payload.encode()):,} bytes, {args.number} runs")
+    print(
+        f"{'serializer':<18}{'size (bytes)':>14}{'store (ms)':>12}"
+        f"{'load (ms)':>12}{'load + parse (ms)':>20}"
+    )
+    for name, serializer, value, finish in serializers:
+        store_time, data = measure(
+            lambda: serializer.dumps(value), args.number
+        )
+        load_time, _ = measure(
+            lambda: serializer.loads(data), args.number
+        )
+        total_time, _ = measure(
+            lambda: finish(serializer.loads(data)), args.number
+        )
+        print(
+            f"{name:<18}{len(data):>14,}{store_time * 1000:>12.3f}"
+            f"{load_time * 1000:>12.3f}{total_time * 1000:>20.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+r"""
+Compare the throughput of signing OAuth 1.0a requests with a new
+oauthlib.oauth1.Client for each request, as AsyncClient used to, against the
+cached OAuth1Signer that AsyncClient reuses for its credentials.
+
+Examples:
+    python benchmarks/oauth1_signing.py
+    python benchmarks/oauth1_signing.py --number 50000
+    python benchmarks/oauth1_signing.py --params 2
+"""
+
+import argparse
+import time
+
+from oauthlib.oauth1 import Client as OAuthClient
+from yarl import URL
+
+from tweepy.utils import OAuth1Signer
+
+CREDENTIALS = (
+    "xvz1evFS4wEEPTGEFPHBog", "kAcSOqF21Fu85e7zjz7ZN2U4ZRhfV3WpwPAoE3Z7kBw",
+    "370773112-GmHxMAgYyLbNEtIKZeRNFsMKPR9EyMZeS9weJAEb",
+    "LswwdoUaIvS8ltyTt5jkRh4J50vUPVVHtR2YPi5kE"
+)
+URL_STRING = "https://api.twitter.com/2/tweets/search/recent"
+PARAMS = {
+    "query": "from:TwitterDev -is:retweet has:media",
+    "start_time": "2021-01-01T00:00:00Z",
+    "end_time": "2021-01-31T23:59:59Z",
+    "expansions": "author_id,attachments.media_keys,referenced_tweets.id",
+    "tweet.fields": "created_at,public_metrics,entities,lang",
+    "user.fields": "created_at,description,public_metrics,verified",
+    "media.fields": "duration_ms,height,preview_image_url,url,width",
+    "max_results": 100
+}
+
+
+def sign_oauthlib(params):
+    oauth_client = OAuthClient(*CREDENTIALS)
+    url = str(URL(URL_STRING).with_query(sorted(params.items())))
+    url, headers, body = oauth_client.sign(url, "GET", headers={})
+    before_query, question_mark, query = url.partition('?')
+    return URL(f"{before_query}?{query.replace(':', '%3A')}", encoded=True)
+
+
+def sign_cached(signer, params):
+    url, authorization = signer.sign("GET", URL_STRING, params)
+    return URL(url, encoded=True)
+
+
+def run(name, function, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        function()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<22}{elapsed:>12.3f}{number / elapsed:>18,.0f}"
+        f"{elapsed / number * 1e6:>20.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument(
+        "--params", type=int, default=len(PARAMS),
+        help="number of query parameters in each request"
+    )
+    args = parser.parse_args()
+
+    params = dict(list(PARAMS.items())[:args.params])
+    signer = OAuth1Signer(*CREDENTIALS)
+
+    print(f"{args.number} signatures, {len(params)} query parameters")
+    print(
+        f"{'signer':<22}{'elapsed (s)':>12}{'signatures/s':>18}"
+        f"{'per signature (us)':>20}"
+    )
+    run("oauthlib per request", lambda: sign_oauthlib(params), args.number)
+    run("cached OAuth1Signer", lambda: sign_cached(signer, params), args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Replay a stream from a local chunked HTTP server to StreamingClient and
+AsyncStreamingClient, and report throughput, latency, and memory usage.
+
+Examples:
+    python benchmarks/streaming.py
+    python benchmarks/streaming.py --lines 20000 --rate 2000
+    python benchmarks/streaming.py --file recorded_stream.jsonl --client async
+"""
+
+import argparse
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import multiprocessing
+import resource
+import time
+
+from tweepy import StreamingClient
+from tweepy.asynchronous import AsyncStreamingClient
+from tweepy.asynchronous.streaming import AsyncBaseStream
+from tweepy.streaming import BaseStream, _extract_tweet_id
+
+
+def generate_lines(count):
+    lines = []
+    for index in range(count):
+        tweet_id = str(1_500_000_000_000_000_000 + index)
+        author_id = str(10_000 + index % 1000)
+        lines.append(json.dumps({
+            "data": {
+                "attachments": {"media_keys": [f"3_{tweet_id}"]},
+                "author_id": author_id,
+                "created_at": "2022-10-19T12:00:00.000Z",
+                "edit_history_tweet_ids": [tweet_id],
+                "entities": {
+                    "hashtags": [{"start": 14, "end": 21, "tag": "Tweepy"}],
+                    "mentions": [
+                        {"start": 0, "end": 8, "username": "Twitter",
+                         "id": "783214"}
+                    ]
+                },
+                "id": tweet_id,
+                "lang": "en",
+                "public_metrics": {
+                    "retweet_count": index % 17, "reply_count": index % 5,
+                    "like_count": index % 101, "quote_count": index % 3
+                },
+                "referenced_tweets": [{"type": "quoted", "id": "20"}],
+                "text": f"@Twitter Test #Tweepy Tweet {index} 🐦 {{}}[]"
+            },
+            "includes": {
+                "media": [{
+                    "media_key": f"3_{tweet_id}", "type": "photo",
+                    "url": "https://pbs.twimg.com/media/example.jpg",
+                    "width": 1200, "height": 675
+                }],
+                "users": [
+                    {"id": author_id, "name": f"User {author_id}",
+                     "username": f"user{author_id}",
+                     "created_at": "2012-01-01T00:00:00.000Z"},
+                    {"id": "783214", "name": "Twitter",
+                     "username": "Twitter"}
+                ],
+                "tweets": [{
+                    "edit_history_tweet_ids": ["20"], "id": "20",
+                    "text": "just setting up my twttr"
+                }]
+            },
+            "matching_rules": [{"id": "1", "tag": "benchmark"}]
+        }, ensure_ascii=False).encode("utf-8"))
+    return lines
+
+
+def load_lines(path):
+    with open(path, "rb") as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def serve(lines, rate, keep_alive_every, send_times, address, ready):
+    # Runs in a separate process, so that the server doesn't compete with the
+    # client for the GIL
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def write_chunk(self, data):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            start = time.perf_counter()
+            batch = []
+            batch_indexes = []
+            for index, line in enumerate(lines):
+                if rate:
+                    delay = start + index / rate - time.perf_counter()
+                    if delay > 0:
+                        self.flush_batch(batch, batch_indexes)
+                        time.sleep(delay)
+                batch.append(line + b"\r\n")
+                batch_indexes.append(index)
+                if keep_alive_every and index % keep_alive_every == 0:
+                    batch.append(b"\r\n")
+                if len(batch) >= 64:
+                    self.flush_batch(batch, batch_indexes)
+            self.flush_batch(batch, batch_indexes)
+            self.write_chunk(b"")
+            self.wfile.flush()
+            self.close_connection = True
+
+        def flush_batch(self, batch, batch_indexes):
+            if not batch:
+                return
+            now = time.time()
+            for index in batch_indexes:
+                send_times[index] = now
+            self.write_chunk(b"".join(batch))
+            batch.clear()
+            batch_indexes.clear()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    address.value = server.server_address[1]
+    ready.set()
+    server.serve_forever()
+
+
+class Recorder:
+
+    def __init__(self, line_indexes, send_times):
+        self.line_indexes = line_indexes
+        self.send_times = send_times
+        self.latencies = []
+        self.tweets = 0
+
+    def record(self, response):
+        received = time.time()
+        if response.data is not None:
+            self.tweets += 1
+            index = self.line_indexes.get(response.data.id)
+            if index is not None:
+                self.latencies.append(received - self.send_times[index])
+
+
+class BenchmarkStreamingClient(StreamingClient):
+
+    def __init__(self, url, recorder, **kwargs):
+        super().__init__("", **kwargs)
+        self.url = url
+        self.recorder = recorder
+
+    def _connect(self, method, endpoint, **kwargs):
+        BaseStream._connect(self, method, self.url, **kwargs)
+
+    def on_closed(self, response):
+        self.disconnect()
+
+    def on_connect(self):
+        pass
+
+    def on_disconnect(self):
+        pass
+
+    def on_response(self, response):
+        self.recorder.record(response)
+
+
+class BenchmarkAsyncStreamingClient(AsyncStreamingClient):
+
+    def __init__(self, url, recorder, **kwargs):
+        super().__init__("", **kwargs)
+        self.url = url
+        self.recorder = recorder
+
+    async def _connect(self, method, endpoint, **kwargs):
+        await AsyncBaseStream._connect(self, method, self.url, **kwargs)
+
+    async def on_closed(self, response):
+        self.disconnect()
+
+    async def on_connect(self):
+        pass
+
+    async def on_disconnect(self):
+        pass
+
+    async def on_response(self, response):
+        self.recorder.record(response)
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def report(name, lines, elapsed, recorder, max_rss_before):
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    latencies = [latency * 1000 for latency in recorder.latencies]
+    print(f"{name}:")
+    print(f"  lines:          {len(lines)} ({recorder.tweets} Tweets handled)")
+    print(f"  elapsed:        {elapsed:.3f} s")
+    print(f"  throughput:     {len(lines) / elapsed:,.0f} lines/s")
+    print(
+        "  latency (ms):   "
+        f"p50 {percentile(latencies, 0.5):.2f}, "
+        f"p90 {percentile(latencies, 0.9):.2f}, "
+        f"p99 {percentile(latencies, 0.99):.2f}, "
+        f"max {max(latencies, default=float('nan')):.2f}"
+    )
+    # ru_maxrss is in kilobytes on Linux
+    print(
+        f"  max RSS:        {max_rss / 1024:.1f} MiB "
+        f"(+{(max_rss - max_rss_before) / 1024:.1f} MiB)"
+    )
+
+
+def run_sync(url, lines, line_indexes, send_times, kwargs):
+    recorder = Recorder(line_indexes, send_times)
+    client = BenchmarkStreamingClient(url, recorder, **kwargs)
+    max_rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    client.sample()
+    elapsed = time.perf_counter() - start
+    report("StreamingClient", lines, elapsed, recorder, max_rss_before)
+
+
+def run_async(url, lines, line_indexes, send_times, kwargs):
+    async def main():
+        recorder = Recorder(line_indexes, send_times)
+        client = BenchmarkAsyncStreamingClient(url, recorder, **kwargs)
+        max_rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        await client.sample()
+        elapsed = time.perf_counter() - start
+        report(
+            "AsyncStreamingClient", lines, elapsed, recorder, max_rss_before
+        )
+
+    asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument(
+        "--client", choices=("sync", "async", "both"), default="both"
+    )
+    parser.add_argument(
+        "--file", help="JSON lines file of a recorded stream to replay"
+    )
+    parser.add_argument(
+        "--lines", type=int, default=10_000,
+        help="number of synthetic lines to generate"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=0,
+        help="lines per second to send, or 0 to send as fast as possible"
+    )
+    parser.add_argument(
+        "--keep-alive-every", type=int, default=100,
+        help="send a keep-alive signal every this many lines"
+    )
+    parser.add_argument("--chunk-size", type=int, default=512)
+    args = parser.parse_args()
+
+    if args.file:
+        lines = load_lines(args.file)
+    else:
+        lines = generate_lines(args.lines)
+
+    line_indexes = {}
+    for index, line in enumerate(lines):
+        tweet_id = _extract_tweet_id(line)
+        if tweet_id is not None:
+            line_indexes.setdefault(int(tweet_id), index)
+
+    clients = ("sync", "async") if args.client == "both" else (args.client,)
+    for client in clients:
+        send_times = multiprocessing.Array("d", len(lines), lock=False)
+        address = multiprocessing.Value("i", 0)
+        ready = multiprocessing.Event()
+        server = multiprocessing.Process(
+            target=serve, daemon=True, args=(
+                lines, args.rate, args.keep_alive_every, send_times, address,
+                ready
+            )
+        )
+        server.start()
+        ready.wait()
+        url = f"http://127.0.0.1:{address.value}/2/tweets/sample/stream"
+        try:
+            if client == "sync":
+                run_sync(
+                    url, lines, line_indexes, send_times,
+                    {"chunk_size": args.chunk_size, "max_retries": 0}
+                )
+            else:
+                run_async(
+                    url, lines, line_indexes, send_times, {"max_retries": 0}
+                )
+        finally:
+            server.terminate()
+            server.join()
+
+
+if __name__ == "__main__":
+    main()
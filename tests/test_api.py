@@ -1,12 +1,24 @@
+import io
+import json
 import os
+import pickle
 import shutil
+import threading
 import time
 import unittest
 from ast import literal_eval
+from unittest.mock import Mock, patch
+
+import requests
 
 from config import tape, TweepyTestCase, username
-from tweepy import API, FileCache, MemoryCache
-from tweepy.models import Friendship
+from tweepy import (
+    API, BadRequest, Cache, EntityCache, FileCache, JSONSerializer,
+    MemoryCache, ResumableUpload, SQLiteCache, TooManyRequests,
+    TweepyException
+)
+from tweepy.cache import CachedPayload, MemCacheCache, RedisCache
+from tweepy.models import Friendship, Media
 from tweepy.parsers import Parser
 
 test_tweet_id = '266367358078169089'
@@ -15,6 +27,110 @@ tweet_text = 'testing 1000'
 """Unit tests"""
 
 
+class DictCache:
+    """Cache that doesn't subclass Cache and only has get and store"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key, timeout=None):
+        return self.entries.get(key)
+
+    def store(self, key, value):
+        self.entries[key] = value
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis client commands that RedisCache uses,
+    with expiry by PX TTLs"""
+
+    def __init__(self):
+        self.values = {}
+        self.expiry = {}
+        self.sorted_sets = {}
+        self.sets = {}
+
+    def _expire(self):
+        now = time.time()
+        for key, expiry in list(self.expiry.items()):
+            if expiry <= now:
+                self.values.pop(key, None)
+                del self.expiry[key]
+
+    def pipeline(self):
+        return FakeRedisPipeline(self)
+
+    def set(self, key, value, px=None):
+        self.values[key] = value
+        self.expiry.pop(key, None)
+        if px is not None:
+            self.expiry[key] = time.time() + px / 1000
+
+    def get(self, key):
+        self._expire()
+        return self.values.get(key)
+
+    def mget(self, keys):
+        self._expire()
+        return [self.values.get(key) for key in keys]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.expiry.pop(key, None)
+            self.sorted_sets.pop(key, None)
+            self.sets.pop(key, None)
+
+    def zadd(self, name, mapping):
+        self.sorted_sets.setdefault(name, {}).update(mapping)
+
+    def zrem(self, name, *keys):
+        for key in keys:
+            self.sorted_sets.get(name, {}).pop(key, None)
+
+    def zcount(self, name, min, max):
+        return len(self.zrangebyscore(name, min, max))
+
+    def zrangebyscore(self, name, min, max, start=None, num=None):
+        members = sorted(
+            (score, key)
+            for key, score in self.sorted_sets.get(name, {}).items()
+            if float(min) <= score <= float(max)
+        )
+        keys = [key for score, key in members]
+        if start is not None:
+            keys = keys[start:start + num]
+        return keys
+
+    def zrange(self, name, start, end):
+        return self.zrangebyscore(name, '-inf', '+inf')[start:end + 1]
+
+    def sadd(self, name, *keys):
+        self.sets.setdefault(name, set()).update(keys)
+
+    def spop(self, name, count):
+        members = self.sets.get(name, set())
+        return [members.pop() for _ in range(min(count, len(members)))]
+
+
+class FakeRedisPipeline:
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            self.commands.append((getattr(self.client, name), args, kwargs))
+        return command
+
+    def execute(self):
+        commands, self.commands = self.commands, []
+        return [
+            function(*args, **kwargs) for function, args, kwargs in commands
+        ]
+
+
 class TweepyAPITests(TweepyTestCase):
 
     #@tape.use_cassette('testfailure.json')
@@ -112,6 +228,185 @@ class TweepyAPITests(TweepyTestCase):
     def testmediauploadmp4(self):
         self.api.media_upload('assets/video.mp4')
 
+    def testwaitformediaprocessing(self):
+        statuses = {
+            '1': [
+                {'state': 'in_progress', 'check_after_secs': 0},
+                {'state': 'succeeded'}
+            ],
+            '2': [{'state': 'failed', 'error': {'code': 1}}]
+        }
+
+        def get_media_upload_status(media_id, **kwargs):
+            return Media.parse(self.api, {
+                'media_id': int(media_id),
+                'processing_info': statuses[media_id].pop(0)
+            })
+
+        self.api.get_media_upload_status = get_media_upload_status
+        uploaded = Media.parse(self.api, {'media_id': 3})
+        media = list(self.api.wait_for_media_processing(['1', '2', uploaded]))
+        # Media that finished processing are yielded first
+        self.assertEqual([item.media_id for item in media], [3, 2, 1])
+        self.assertEqual(media[2].processing_info['state'], 'succeeded')
+
+    @tape.use_cassette('testmediauploadmp4.yaml')
+    def testmediauploadmp4parallel(self):
+        with patch(
+            'requests.Session.request', autospec=True,
+            side_effect=requests.Session.request
+        ) as request:
+            self.api.media_upload('assets/video.mp4', concurrency=2)
+        # Segments are appended with sessions other than the API's
+        append_sessions = {
+            call.args[0] for call in request.call_args_list
+            if (call.kwargs['data'] or {}).get('command') == 'APPEND'
+        }
+        self.assertTrue(append_sessions)
+        self.assertNotIn(self.api.session, append_sessions)
+
+    @tape.use_cassette('testmediauploadmp4.yaml')
+    def testchunkeduploadmp4stream(self):
+        with open('assets/video.mp4', 'rb') as file:
+            data = file.read()
+        chunks = (
+            data[index:index + 65536] for index in range(0, len(data), 65536)
+        )
+        self.api.chunked_upload(
+            'video.mp4', file=chunks, file_type='video/mp4',
+            total_bytes=len(data)
+        )
+
+    @tape.use_cassette('testmediauploadmp4.yaml')
+    def testchunkeduploadmp4streamsizemismatch(self):
+        with open('assets/video.mp4', 'rb') as file:
+            data = file.read()
+        with self.assertRaises(TweepyException):
+            self.api.chunked_upload(
+                'video.mp4', file=[data[:-1]], file_type='video/mp4',
+                total_bytes=len(data)
+            )
+
+    @tape.use_cassette('testmediauploadmp4.yaml')
+    def testmediauploadmp4statefile(self):
+        state_file = 'upload_state.json'
+        self.api.media_upload('assets/video.mp4', state_file=state_file)
+        self.assertFalse(os.path.exists(state_file))
+
+    def testmediauploadmp4resume(self):
+        state_file = 'upload_state.json'
+        state = ResumableUpload(state_file)
+        # Media ID in cassette
+        state.start(
+            1349803915521482754, 'assets/video.mp4', 1577963, 1024 * 1024, 60,
+            fingerprint=self._video_fingerprint()
+        )
+        state.complete_segment(0)
+        state.complete_segment(1)
+        try:
+            with tape.use_cassette('testmediauploadmp4.yaml') as cassette:
+                self.api.media_upload(
+                    'assets/video.mp4', state_file=state_file
+                )
+            # Only FINALIZE is sent, as every segment was appended
+            self.assertEqual(cassette.play_count, 1)
+            self.assertFalse(os.path.exists(state_file))
+        finally:
+            state.clear()
+
+    def testmediauploadmp4resumedifferentfile(self):
+        state_file = 'upload_state.json'
+        state = ResumableUpload(state_file)
+        # State of a different file with the same name and size
+        with open('assets/video.mp4', 'rb') as file:
+            data = bytearray(file.read())
+        data[-1] ^= 0xFF
+        state.start(
+            1, 'assets/video.mp4', 1577963, 1024 * 1024, 60,
+            fingerprint=ResumableUpload.fingerprint_file(
+                io.BytesIO(data), 0, len(data)
+            )
+        )
+        state.complete_segment(0)
+        state.complete_segment(1)
+        try:
+            self.assertFalse(state.resumable(
+                'assets/video.mp4', 1577963, self._video_fingerprint()
+            ))
+            with tape.use_cassette('testmediauploadmp4.yaml') as cassette:
+                media = self.api.media_upload(
+                    'assets/video.mp4', state_file=state_file
+                )
+            # The upload is started over, rather than resumed
+            self.assertGreater(cassette.play_count, 1)
+            self.assertEqual(media.media_id, 1349803915521482754)
+        finally:
+            state.clear()
+
+    def _video_fingerprint(self):
+        with open('assets/video.mp4', 'rb') as file:
+            return ResumableUpload.fingerprint_file(file, 0, 1577963)
+
+    def testmediauploadmp4resumeclienterror(self):
+        state_file = 'upload_state.json'
+        state = ResumableUpload(state_file)
+        try:
+            for method, error, status_code, cleared in (
+                ('chunked_upload_append', BadRequest, 400, True),
+                ('chunked_upload_finalize', BadRequest, 400, True),
+                ('chunked_upload_finalize', TooManyRequests, 429, False)
+            ):
+                state.start(
+                    1, 'assets/video.mp4', 1577963, 1024 * 1024, 60,
+                    fingerprint=self._video_fingerprint()
+                )
+                if method == 'chunked_upload_finalize':
+                    state.complete_segment(0)
+                    state.complete_segment(1)
+                response = Mock(status_code=status_code, reason='Error')
+                with patch.object(
+                    API, method,
+                    side_effect=error(response, response_json={})
+                ), self.assertRaises(error):
+                    self.api.media_upload(
+                        'assets/video.mp4', state_file=state_file
+                    )
+                self.assertEqual(not os.path.exists(state_file), cleared)
+        finally:
+            state.clear()
+
+    def testresumableuploadexpiry(self):
+        state_file = 'upload_state.json'
+        state = ResumableUpload(state_file)
+        try:
+            state.start(
+                1, 'assets/video.mp4', 1577963, 1024 * 1024,
+                fingerprint='fingerprint'
+            )
+            self.assertAlmostEqual(
+                state.expires_at,
+                time.time() + ResumableUpload.default_expires_after_secs,
+                delta=5
+            )
+            self.assertTrue(
+                state.resumable('assets/video.mp4', 1577963, 'fingerprint')
+            )
+            # State without an expiry time isn't resumed
+            state.expires_at = None
+            self.assertFalse(
+                state.resumable('assets/video.mp4', 1577963, 'fingerprint')
+            )
+        finally:
+            state.clear()
+
+    @tape.use_cassette('testmediauploadmp4.yaml')
+    def testmediauploadmp4fileobject(self):
+        with open('assets/video.mp4', 'rb') as file:
+            data = file.read()
+        self.api.media_upload(
+            'video.mp4', file=io.BytesIO(data), concurrency=2
+        )
+
     @tape.use_cassette('testgetuser.yaml')
     def testgetuser(self):
         u = self.api.get_user(screen_name='Twitter')
@@ -127,6 +422,85 @@ class TweepyAPITests(TweepyTestCase):
         check(self.api.lookup_users(user_id=[6844292, 6253282]))
         check(self.api.lookup_users(screen_name=['twitterapi', 'twitter']))
 
+    @tape.use_cassette('testlookupusers.json', serializer='json')
+    def testlookupuserscached(self):
+        self.api.cache = MemoryCache()
+        users = self.api.lookup_users(user_id=[6844292, 6253282])
+        self.assertFalse(self.api.cached_result)
+        # Users are cached individually, by ID and by screen name
+        cached_users = self.api.lookup_users(screen_name=['TwitterAPI'])
+        self.assertTrue(self.api.cached_result)
+        self.assertEqual(cached_users[0].id, 6253282)
+        cached_users = self.api.lookup_users(
+            user_id=[6844292], screen_name=['twitterapi']
+        )
+        self.assertTrue(self.api.cached_result)
+        self.assertEqual(
+            {user.id for user in cached_users}, {user.id for user in users}
+        )
+
+    @tape.use_cassette('testlookupusers.json', serializer='json')
+    def testlookupuserscachedducktypedcache(self):
+        self.api.cache = DictCache()
+        users = self.api.lookup_users(user_id=[6844292, 6253282])
+        self.assertFalse(self.api.cached_result)
+        cached_users = self.api.lookup_users(screen_name=['TwitterAPI'])
+        self.assertTrue(self.api.cached_result)
+        self.assertEqual(cached_users[0].id, 6253282)
+        self.assertEqual(len(self.api.cache.entries), 2 * len(users))
+
+    def testlookupstatusescachedtweetmode(self):
+        self.api.cache = MemoryCache()
+        responses = []
+        for text_field in ('text', 'full_text'):
+            response = Mock(status_code=200, headers={})
+            response.text = json.dumps([
+                {'id': 1, 'id_str': '1', text_field: 'Tweet'}
+            ])
+            responses.append(response)
+
+        with patch.object(
+            self.api.session, 'request', side_effect=responses
+        ) as request:
+            compat = self.api.lookup_statuses([1])
+            extended = self.api.lookup_statuses([1], tweet_mode='extended')
+            cached = self.api.lookup_statuses([1], tweet_mode='extended')
+
+        # Tweets are cached separately for each tweet_mode
+        self.assertEqual(request.call_count, 2)
+        self.assertTrue(self.api.cached_result)
+        self.assertEqual(compat[0].text, 'Tweet')
+        self.assertEqual(extended[0].full_text, 'Tweet')
+        self.assertEqual(cached[0].full_text, 'Tweet')
+
+    def testcachedresultrefresh(self):
+        self.api.cache = MemoryCache(timeout=0.1, stale_while_revalidate=60)
+        responses = []
+        for text in ('stale', 'refreshed'):
+            response = Mock(status_code=200, headers={})
+            response.text = json.dumps({'id': 1, 'id_str': '1', 'text': text})
+            responses.append(response)
+
+        with patch(
+            'requests.Session.request', autospec=True, side_effect=responses
+        ) as request:
+            self.api.get_status(1)
+            last_response = self.api.last_response
+            time.sleep(0.1)
+            self.assertEqual(self.api.get_status(1).text, 'stale')
+            # Wait for the refresh to finish
+            for _ in range(50):
+                if not self.api.cache._refreshing:
+                    break
+                time.sleep(0.1)
+
+        # The refresh is made with another session, without changing the
+        # state of the API
+        self.assertEqual(self.api.get_status(1).text, 'refreshed')
+        self.assertIsNot(request.call_args.args[0], self.api.session)
+        self.assertTrue(self.api.cached_result)
+        self.assertIs(self.api.last_response, last_response)
+
     @tape.use_cassette('testsearchusers.json', serializer='json')
     def testsearchusers(self):
         self.api.search_users('twitter')
@@ -396,6 +770,31 @@ class TweepyAPITests(TweepyTestCase):
         self.api.home_timeline()
         self.assertTrue(self.api.cached_result)
 
+    @tape.use_cassette('testcachedresult.yaml')
+    def testcachedresultducktypedcache(self):
+        self.api.cache = DictCache()
+        statuses = self.api.home_timeline()
+        self.assertFalse(self.api.cached_result)
+        cached_statuses = self.api.home_timeline()
+        self.assertTrue(self.api.cached_result)
+        self.assertEqual(
+            [status.id for status in cached_statuses],
+            [status.id for status in statuses]
+        )
+
+    @tape.use_cassette('testcachedresult.yaml')
+    def testcachedresultjsonserializer(self):
+        self.api.cache = MemoryCache(serializer=JSONSerializer('zlib'))
+        statuses = self.api.home_timeline()
+        self.assertFalse(self.api.cached_result)
+        cached_statuses = self.api.home_timeline()
+        self.assertTrue(self.api.cached_result)
+        self.assertEqual(
+            [status.id for status in cached_statuses],
+            [status.id for status in statuses]
+        )
+        self.assertIs(cached_statuses[0]._api, self.api)
+
     @tape.use_cassette('testcachedresult.yaml')
     def testcachedifferentqueryparameters(self):
         self.api.cache = MemoryCache()
@@ -431,6 +830,20 @@ class TweepyCacheTests(unittest.TestCase):
             self.cache.cleanup()
             self.assertEqual(self.cache.count(), 0, 'Cache cleanup failed')
 
+        # test get_many, store_many, and delete_many
+        self.cache.store_many({'testkey1': 'testvalue1', 'testkey2': [2]})
+        self.assertEqual(
+            self.cache.get_many(['testkey1', 'testkey2', 'testkey3']),
+            {'testkey1': 'testvalue1', 'testkey2': [2]}
+        )
+        self.cache.delete_many(['testkey1', 'testkey3'])
+        self.assertEqual(
+            self.cache.get_many(['testkey1', 'testkey2']), {'testkey2': [2]}
+        )
+        self.cache.delete('testkey2')
+        self.assertEqual(self.cache.get('testkey2'), None)
+        self.cache.flush()
+
         # test count
         for i in range(20):
             self.cache.store(f'testkey{i}', 'testvalue')
@@ -444,6 +857,147 @@ class TweepyCacheTests(unittest.TestCase):
         self.cache = MemoryCache(timeout=self.timeout)
         self._run_tests()
 
+    def testcachedeletemanyfallback(self):
+        class DictCache(Cache):
+            def __init__(self):
+                super().__init__()
+                self.entries = {}
+
+            def store(self, key, value):
+                self.entries[key] = value
+
+            def get(self, key, timeout=None):
+                return self.entries.get(key)
+
+            def delete(self, key):
+                self.entries.pop(key, None)
+
+        cache = DictCache()
+        cache.store_many({'a': 1, 'b': 2, 'c': 3})
+        cache.delete_many(['a', 'c', 'd'])
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'b': 2})
+
+    def testmemorycachelru(self):
+        cache = MemoryCache(max_entries=2)
+        cache.store('a', 1)
+        cache.store('b', 2)
+        cache.get('a')
+        cache.store('c', 3)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(
+            (cache.hits, cache.misses, cache.evictions), (3, 1, 1)
+        )
+
+    def testmemorycachelfu(self):
+        cache = MemoryCache(max_entries=2, eviction='lfu')
+        cache.store('a', 1)
+        cache.store('b', 2)
+        cache.get('a')
+        cache.get('a')
+        cache.get('b')
+        cache.store('c', 3)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        cache.store('d', 4)
+        self.assertEqual(cache.get('c'), None)
+        self.assertEqual(cache.count(), 2)
+
+    def testmemorycachettl(self):
+        cache = MemoryCache(max_entries=2, eviction='ttl')
+        cache.store('a', 1)
+        cache.store('b', 2)
+        cache.get('a')
+        cache.store('c', 3)
+        self.assertEqual(cache.get('a'), None)
+        self.assertEqual(cache.get('b'), 2)
+
+    def testmemorycachemaxbytes(self):
+        cache = MemoryCache(max_bytes=2500)
+        for i in range(10):
+            cache.store(f'testkey{i}', 'x' * 1000)
+        self.assertEqual(cache.count(), 2)
+        self.assertLessEqual(cache.size, 2500)
+        self.assertEqual(cache.evictions, 8)
+
+    def testmemorycacheexpiry(self):
+        cache = MemoryCache(timeout=self.timeout)
+        for i in range(10):
+            cache.store(f'testkey{i}', 'testvalue')
+        time.sleep(self.timeout)
+        cache.store('testkey', 'testvalue')
+        self.assertEqual(cache.count(), 1)
+
+    def testmemorycachepickle(self):
+        cache = MemoryCache(max_entries=2, eviction='lfu')
+        cache.store('a', 1)
+        cache.store('b', 2)
+        cache = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(cache.get('a'), 1)
+        cache.store('c', 3)
+        self.assertEqual(cache.get('b'), None)
+
+    def testmemorycachestalewhilerevalidate(self):
+        cache = MemoryCache(timeout=self.timeout, stale_while_revalidate=60)
+        cache.store('testkey', 'testvalue')
+        self.assertEqual(cache.get_stale('testkey'), ('testvalue', False))
+        time.sleep(self.timeout)
+        self.assertEqual(cache.get('testkey'), None)
+        # stale entries aren't hits for get
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.get_stale('testkey'), ('testvalue', True))
+
+        # test refresh
+        refreshed = threading.Event()
+
+        def refresh():
+            cache.store('testkey', 'newvalue')
+            refreshed.set()
+
+        self.assertTrue(cache.begin_refresh('testkey'))
+        self.assertFalse(cache.refresh('testkey', refresh))
+        cache.end_refresh('testkey')
+        self.assertTrue(cache.refresh('testkey', refresh))
+        self.assertTrue(refreshed.wait(5))
+        self.assertEqual(cache.get_stale('testkey'), ('newvalue', False))
+
+    def testentitycache(self):
+        cache = EntityCache(timeout=60, field_timeouts={'public_metrics': 0.1})
+        cache.add_response({
+            'data': [{
+                'id': '1', 'name': 'Tweepy', 'username': 'TweepyDev',
+                'public_metrics': {'followers_count': 1}
+            }],
+            'includes': {
+                'tweets': [{
+                    'id': '2', 'text': 'Test', 'edit_history_tweet_ids': ['2']
+                }]
+            }
+        }, {'user.fields': 'location,public_metrics'}, 'user')
+        self.assertEqual(
+            cache.get('user', 1, ['location']),
+            {'id': '1', 'name': 'Tweepy', 'username': 'TweepyDev'}
+        )
+        self.assertEqual(cache.get('user', 1, ['description']), None)
+        self.assertEqual(cache.get('tweet', '2')['text'], 'Test')
+        self.assertEqual(
+            cache.get('user', 1, 'public_metrics')['public_metrics'],
+            {'followers_count': 1}
+        )
+        time.sleep(0.1)
+        self.assertEqual(cache.get('user', 1, ['public_metrics']), None)
+        self.assertEqual(set(cache.get_many('user', [1, 3])), {'1'})
+
+        # entities are only returned in the scope that they were seen in
+        cache.add_response(
+            {'data': {'id': '4', 'text': 'Test', 'edit_history_tweet_ids': []}},
+            kind='tweet', scope='a'
+        )
+        self.assertEqual(cache.get('tweet', 4, scope='a')['text'], 'Test')
+        self.assertIsNone(cache.get('tweet', 4, scope='b'))
+        self.assertIsNone(cache.get('tweet', 4))
+
     def testfilecache(self):
         os.mkdir('cache_test_dir')
         try:
@@ -454,6 +1008,144 @@ class TweepyCacheTests(unittest.TestCase):
             if os.path.exists('cache_test_dir'):
                 shutil.rmtree('cache_test_dir')
 
+    def testfilecachejsonserializer(self):
+        os.mkdir('cache_test_dir')
+        try:
+            self.cache = FileCache(
+                'cache_test_dir', self.timeout,
+                serializer=JSONSerializer('zlib')
+            )
+            self._run_tests()
+            payload = CachedPayload('{"id": 1}', 'status', False, False)
+            self.cache.store('testkey', payload)
+            self.assertEqual(self.cache.get('testkey'), payload)
+
+            # test unreadable entries
+            with open(self.cache._get_path('testkey'), 'wb') as file:
+                file.write(b'invalid')
+            self.assertEqual(self.cache.get('testkey'), None)
+            self.assertEqual(self.cache.count(), 0)
+        finally:
+            if os.path.exists('cache_test_dir'):
+                shutil.rmtree('cache_test_dir')
+
+    def testjsonserializer(self):
+        value = {'data': [{'id': '1', 'text': 'Tweepy 🐦'}], 'meta': {}}
+        payload = CachedPayload('[{"id": 1}]', 'status', True, False)
+        for compression in (None, 'zlib'):
+            serializer = JSONSerializer(compression)
+            self.assertEqual(serializer.loads(serializer.dumps(value)), value)
+            self.assertEqual(
+                serializer.loads(serializer.dumps(payload)), payload
+            )
+        # entries can be read regardless of compression
+        self.assertEqual(
+            JSONSerializer().loads(JSONSerializer('zlib').dumps(value)), value
+        )
+        with self.assertRaises(ValueError):
+            JSONSerializer('lz4')
+
+    def testmemcachecacheoldentries(self):
+        class Client(dict):
+            def get_multi(self, keys):
+                return {key: self[key] for key in keys if key in self}
+
+        # Entries pickled by the memcache client, before MemCacheCache
+        # serialized them itself, are read as misses
+        client = Client(old=['value'])
+        cache = MemCacheCache(client)
+        self.assertIsNone(cache.get('old'))
+        client['new'] = cache.serializer.dumps(['value'])
+        self.assertEqual(cache.get_many(['old', 'new']), {'new': ['value']})
+
+    def testrediscache(self):
+        self.cache = RedisCache(FakeRedis(), self.timeout, batch_size=3)
+        self._run_tests()
+
+    def testrediscacheindex(self):
+        client = FakeRedis()
+        cache = RedisCache(client, 60, batch_size=2)
+        cache.store_many({f'testkey{i}': i for i in range(5)})
+        # Entries expire with PX TTLs and are indexed by expiry time
+        self.assertAlmostEqual(
+            client.expiry['tweepy:testkey0'], time.time() + 60, delta=5
+        )
+        self.assertEqual(len(client.sorted_sets['tweepy:expiry']), 5)
+        self.assertEqual(
+            cache.get_many(['testkey0', 'testkey4', 'missing']),
+            {'testkey0': 0, 'testkey4': 4}
+        )
+        # Cleanup removes keys whose entries expired from the index
+        for key in ('tweepy:testkey0', 'tweepy:testkey1', 'tweepy:testkey2'):
+            client.sorted_sets['tweepy:expiry'][key] = time.time() - 1
+        cache.cleanup()
+        self.assertEqual(cache.count(), 2)
+        self.assertEqual(
+            sorted(client.sorted_sets['tweepy:expiry']),
+            ['tweepy:testkey3', 'tweepy:testkey4']
+        )
+        cache.flush()
+        self.assertEqual(client.sorted_sets['tweepy:expiry'], {})
+        self.assertEqual(client.values, {})
+
+    def testrediscachenotimeout(self):
+        client = FakeRedis()
+        cache = RedisCache(client, 0)
+        cache.store('testkey', 'testvalue')
+        # Entries don't expire when the timeout is 0
+        self.assertNotIn('tweepy:testkey', client.expiry)
+        self.assertEqual(
+            client.sorted_sets['tweepy:expiry']['tweepy:testkey'],
+            float('inf')
+        )
+        cache.cleanup()
+        self.assertEqual(cache.count(), 1)
+        self.assertEqual(cache.get('testkey', timeout=0), 'testvalue')
+
+    def testrediscachemigratelegacykeys(self):
+        client = FakeRedis()
+        for i in range(5):
+            client.set(f'tweepy:old{i}', pickle.dumps((time.time(), i)))
+            client.sadd('tweepy:keys', f'tweepy:old{i}')
+        cache = RedisCache(client, 60, batch_size=2)
+        cache.store('new', 'value')
+        # Entries stored by older versions are read as misses
+        self.assertIsNone(cache.get('old0'))
+        cache.migrate_legacy_keys()
+        self.assertEqual(sorted(client.values), ['tweepy:new'])
+        self.assertNotIn('tweepy:keys', client.sets)
+        self.assertEqual(cache.get('new'), 'value')
+
+    def testsqlitecache(self):
+        os.mkdir('cache_test_dir')
+        try:
+            self.cache = SQLiteCache(
+                os.path.join('cache_test_dir', 'cache.sqlite'), self.timeout
+            )
+            self._run_tests()
+            self.cache = pickle.loads(pickle.dumps(self.cache))
+            self.cache.store('testkey', 'testvalue')
+            self.assertEqual(self.cache.get('testkey'), 'testvalue')
+
+            # test unreadable entries
+            self.cache.store_many({'testkey1': 1, 'testkey2': 2})
+            connection = self.cache._connection()
+            with connection:
+                connection.execute(
+                    'UPDATE tweepy_cache SET value = ? WHERE key != ?',
+                    (b'invalid', 'testkey2')
+                )
+            self.assertEqual(self.cache.get('testkey'), None)
+            self.assertEqual(
+                self.cache.get_many(['testkey1', 'testkey2']),
+                {'testkey2': 2}
+            )
+            self.assertEqual(self.cache.count(), 1)
+            self.cache.close()
+        finally:
+            if os.path.exists('cache_test_dir'):
+                shutil.rmtree('cache_test_dir')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,3 +1,5 @@
+import asyncio
+
 try:
     from unittest import IsolatedAsyncioTestCase
 except ImportError:
@@ -8,7 +10,10 @@ from config import (
     access_token, access_token_secret, bearer_token, consumer_key,
     consumer_secret, tape, user_id
 )
-from tweepy.asynchronous import AsyncClient
+from tweepy import MemoryCache
+from tweepy.asynchronous import (
+    AsyncCacheAdapter, AsyncClient, AsyncMemoryCache
+)
 
 
 class TweepyAsyncClientTests(IsolatedAsyncioTestCase):
@@ -19,6 +24,9 @@ class TweepyAsyncClientTests(IsolatedAsyncioTestCase):
             access_token or user_id, access_token_secret
         )
 
+    async def asyncTearDown(self):
+        await self.client.close()
+
     @tape.use_cassette("test_asyncclient_bookmarks.yaml")
     async def test_bookmarks(self):
         tweet_id = 1507070437557096461
@@ -27,6 +35,19 @@ class TweepyAsyncClientTests(IsolatedAsyncioTestCase):
         await self.client.get_bookmarks()
         await self.client.remove_bookmark(tweet_id)
 
+    @tape.use_cassette("test_asyncclient_bookmarks.yaml")
+    async def test_session_reused(self):
+        tweet_id = 1507070437557096461
+        # @TwitterDev Tweet announcing API v2 Bookmarks endpoints
+        async with self.client as client:
+            await client.bookmark(tweet_id)
+            session = client._session
+            await client.get_bookmarks()
+            await client.remove_bookmark(tweet_id)
+            self.assertIs(client._session, session)
+            self.assertFalse(session.closed)
+        self.assertTrue(session.closed)
+
     @tape.use_cassette("test_asyncclient_hide_and_unhide_reply.yaml")
     async def test_hide_and_unhide_reply(self):
         reply_id = 1344794616005066752  # Test Tweet for reply hide/unhide
@@ -55,6 +76,42 @@ class TweepyAsyncClientTests(IsolatedAsyncioTestCase):
         tweet_id = response.data["id"]
         await self.client.delete_tweet(tweet_id)
 
+    @tape.use_cassette("test_asyncclient_media_upload.yaml")
+    async def test_media_upload(self):
+        media = await self.client.media_upload(
+            "assets/video.mp4", concurrency=2
+        )
+        self.assertEqual(media["media_id_string"], "1349803915521482754")
+
+    async def test_wait_for_media_processing(self):
+        statuses = {
+            "1": [
+                {"state": "in_progress", "check_after_secs": 0},
+                {"state": "succeeded"}
+            ],
+            "2": [{"state": "failed", "error": {"code": 1}}],
+            "3": [{"state": "succeeded"}]
+        }
+
+        async def get_media_upload_status(media_id):
+            return {
+                "media_id_string": media_id,
+                "processing_info": statuses[media_id].pop(0)
+            }
+
+        self.client.get_media_upload_status = get_media_upload_status
+        uploaded = {
+            "media_id_string": "3",
+            "processing_info": {"state": "pending", "check_after_secs": 0}
+        }
+        media = [
+            item async for item in
+            self.client.wait_for_media_processing([uploaded, "1", "2"])
+        ]
+        self.assertEqual(
+            [item["media_id_string"] for item in media], ["3", "2", "1"]
+        )
+
     @tape.use_cassette("test_asyncclient_get_quote_tweets.yaml")
     async def test_get_quote_tweets(self):
         tweet_id = 1293593516040269825  # @TwitterDev Tweet announcing API v2
@@ -143,6 +200,42 @@ class TweepyAsyncClientTests(IsolatedAsyncioTestCase):
     async def test_get_user(self):
         await self.client.get_user(username="Twitter")
 
+    @tape.use_cassette("test_asyncclient_get_user.yaml")
+    async def test_get_user_cached(self):
+        self.client.cache = AsyncMemoryCache()
+        response = await self.client.get_user(username="Twitter")
+        # The cassette only has one request, so this has to be cached
+        cached_response = await self.client.get_user(username="Twitter")
+        self.assertEqual(cached_response.data, response.data)
+        self.assertEqual(self.client.cache.hits, 1)
+
+    @tape.use_cassette("test_asyncclient_get_user.yaml")
+    async def test_get_user_cached_sync_cache(self):
+        cache = MemoryCache()
+        self.client.cache = cache
+        self.assertIsInstance(self.client.cache, AsyncCacheAdapter)
+        response = await self.client.get_user(username="Twitter")
+        cached_response = await self.client.get_user(username="Twitter")
+        self.assertEqual(cached_response.data, response.data)
+        self.assertEqual(cache.hits, 1)
+
+    async def test_async_memory_cache(self):
+        cache = AsyncMemoryCache(
+            timeout=0.1, max_entries=2, stale_while_revalidate=60
+        )
+        await cache.store_many({"a": 1, "b": 2})
+        await cache.get("a")
+        await cache.store("c", 3)
+        self.assertEqual(
+            await cache.get_many(["a", "b", "c"]), {"a": 1, "c": 3}
+        )
+        self.assertEqual(cache.evictions, 1)
+        await asyncio.sleep(0.1)
+        self.assertIsNone(await cache.get("a"))
+        self.assertEqual(await cache.get_stale("a"), (1, True))
+        await cache.flush()
+        self.assertEqual(await cache.count(), 0)
+
     @tape.use_cassette("test_asyncclient_get_users.yaml")
     async def test_get_users(self):
         await self.client.get_users(usernames=["Twitter", "TwitterDev"])
@@ -0,0 +1,108 @@
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from tweepy import BearerTokenPool, Client
+from tweepy.errors import TooManyRequests
+
+
+class BearerTokenPoolTests(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = BearerTokenPool(["token_a", "token_b"])
+        self.reset_time = int(time.time()) + 900
+
+    def create_mock_response(self, status_code, remaining):
+        response = Mock()
+        response.status_code = status_code
+        response.reason = ""
+        response.headers = {
+            "x-rate-limit-limit": "300",
+            "x-rate-limit-remaining": str(remaining),
+            "x-rate-limit-reset": str(self.reset_time)
+        }
+        response.json.return_value = {
+            "errors": [{"message": "Rate limit exceeded"}]
+        }
+        response.__enter__ = Mock(return_value=response)
+        response.__exit__ = Mock(return_value=None)
+        return response
+
+    def test_endpoint(self):
+        self.assertEqual(
+            BearerTokenPool.endpoint("GET", "/2/users/783214/tweets"),
+            "GET /2/users/:id/tweets"
+        )
+
+    def test_acquire_most_remaining(self):
+        endpoint = "GET /2/tweets"
+        self.pool.update("token_a", endpoint, {
+            "x-rate-limit-remaining": "10",
+            "x-rate-limit-reset": str(self.reset_time)
+        })
+        self.pool.update("token_b", endpoint, {
+            "x-rate-limit-remaining": "20",
+            "x-rate-limit-reset": str(self.reset_time)
+        })
+        self.assertEqual(self.pool.acquire(endpoint), "token_b")
+        # Unused tokens are assumed to have requests remaining, so the token
+        # that has made fewer requests is used
+        self.assertEqual(self.pool.acquire("GET /2/users"), "token_a")
+
+    def test_rotate_on_rate_limit(self):
+        client = Client(self.pool)
+        responses = [
+            self.create_mock_response(429, 0),
+            self.create_mock_response(200, 299)
+        ]
+
+        with patch.object(
+            client.session, "request", side_effect=responses
+        ) as request:
+            self.assertIs(
+                client.request("GET", "/2/tweets/search/recent"), responses[1]
+            )
+
+        tokens = [
+            call.kwargs["headers"]["Authorization"]
+            for call in request.call_args_list
+        ]
+        self.assertEqual(tokens, ["Bearer token_a", "Bearer token_b"])
+        utilization = self.pool.utilization()
+        self.assertEqual(utilization[0]["rate_limited"], 1)
+        self.assertEqual(utilization[1]["requests"], 1)
+        self.assertEqual(
+            utilization[1]["endpoints"]["GET /2/tweets/search/recent"][
+                "remaining"
+            ], 299
+        )
+
+    def test_all_rate_limited(self):
+        client = Client(self.pool)
+        responses = [
+            self.create_mock_response(429, 0),
+            self.create_mock_response(429, 0)
+        ]
+
+        with patch.object(client.session, "request", side_effect=responses):
+            with self.assertRaises(TooManyRequests) as cm:
+                client.request("GET", "/2/tweets/search/recent")
+
+        self.assertEqual(cm.exception.reset_time, self.reset_time)
+
+    def test_past_reset_time(self):
+        # Rate limited tokens are avoided for a minute, even if the server's
+        # reset time has already passed, and each is only tried once
+        self.reset_time = int(time.time()) - 60
+        client = Client(self.pool)
+        responses = [self.create_mock_response(429, 0) for _ in range(3)]
+
+        with patch.object(
+            client.session, "request", side_effect=responses
+        ) as request:
+            with self.assertRaises(TooManyRequests) as cm:
+                client.request("GET", "/2/tweets/search/recent")
+
+        self.assertEqual(request.call_count, 2)
+        self.assertGreater(cm.exception.reset_time, time.time())
+        self.assertFalse(self.pool.available("GET /2/tweets/search/recent"))
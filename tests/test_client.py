@@ -1,4 +1,6 @@
+import time
 import unittest
+from unittest import mock
 
 from config import (
     access_token, access_token_secret, bearer_token, consumer_key,
@@ -110,6 +112,35 @@ class TweepyClientTests(unittest.TestCase):
         # @TwitterDev and @TwitterAPI Tweets announcing API v2
         self.client.get_tweets(tweet_ids)
 
+    @tape.use_cassette("test_client_get_tweets.yaml")
+    def test_get_tweets_entity_cache(self):
+        self.client.entity_cache = tweepy.EntityCache()
+        tweet_ids = [1293593516040269825, 1293595870563381249]
+        response = self.client.get_tweets(tweet_ids)
+        # The cassette only has one request, so these have to be cached
+        cached_response = self.client.get_tweets(tweet_ids[::-1])
+        self.assertEqual(
+            [tweet.id for tweet in cached_response.data], tweet_ids[::-1]
+        )
+        self.assertEqual(cached_response.data[0], response.data[1])
+        self.assertEqual(self.client.entity_cache.hits, 2)
+
+    def test_get_tweets_entity_cache_single_id(self):
+        self.client.entity_cache = tweepy.EntityCache()
+        self.client.entity_cache.add_response(
+            {"data": {
+                "id": "1293593516040269825", "text": "Test",
+                "edit_history_tweet_ids": ["1293593516040269825"]
+            }}, kind="tweet", scope=self.client._get_auth_hash(False)
+        )
+        for tweet_id in (1293593516040269825, "1293593516040269825"):
+            with mock.patch("requests.Session.request") as request:
+                response = self.client.get_tweets(tweet_id)
+            request.assert_not_called()
+            self.assertEqual(
+                [tweet.id for tweet in response.data], [1293593516040269825]
+            )
+
     # TODO: Test Client.get_blocked
 
     @tape.use_cassette("test_client_follow_and_unfollow_user.yaml")
@@ -139,6 +170,57 @@ class TweepyClientTests(unittest.TestCase):
     def test_get_user(self):
         self.client.get_user(username="Twitter")
 
+    @tape.use_cassette("test_client_get_user.yaml")
+    def test_get_user_cached(self):
+        self.client.cache = tweepy.MemoryCache()
+        self.client.cache_ttls = {"/2/users/by/username/*": 300}
+        response = self.client.get_user(username="Twitter")
+        # The cassette only has one request, so this has to be cached
+        cached_response = self.client.get_user(username="Twitter")
+        self.assertEqual(cached_response.data, response.data)
+        self.assertEqual(self.client.cache.hits, 1)
+
+    def test_get_user_cached_refresh(self):
+        self.client.return_type = dict
+        self.client.cache = tweepy.MemoryCache(
+            timeout=0.1, stale_while_revalidate=60
+        )
+        sessions = []
+
+        def request(session, *args, **kwargs):
+            sessions.append(session)
+            response = mock.MagicMock(status_code=200, reason="OK", headers={})
+            response.__enter__.return_value = response
+            response.json.return_value = {
+                "data": {"id": "783214", "name": "X", "username": "Twitter"}
+            }
+            return response
+
+        with mock.patch(
+            "requests.Session.request", autospec=True, side_effect=request
+        ):
+            response = self.client.get_user(username="Twitter")
+            # Changes to responses don't change the cache
+            response["data"]["name"] = "Changed"
+            time.sleep(0.1)
+            cached_response = self.client.get_user(username="Twitter")
+            self.assertEqual(cached_response["data"]["name"], "X")
+            cached_response["data"]["name"] = "Changed"
+            for _ in range(100):
+                if len(sessions) == 2:
+                    break
+                time.sleep(0.01)
+
+        # The stale response is refreshed with a session of its own
+        self.assertEqual(len(sessions), 2)
+        self.assertIs(sessions[0], self.client.session)
+        self.assertIsNot(sessions[1], self.client.session)
+        self.assertEqual(
+            self.client.cache.get_stale(
+                next(iter(self.client.cache._entries))
+            )[0]["data"]["name"], "X"
+        )
+
     @tape.use_cassette("test_client_get_users.yaml")
     def test_get_users(self):
         self.client.get_users(usernames=["Twitter", "TwitterDev"])
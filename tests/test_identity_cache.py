@@ -0,0 +1,60 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from tweepy import Client, MemoryCache, Response
+
+
+class IdentityCacheTests(unittest.TestCase):
+
+    def create_mock_response(self, user_id):
+        response = Mock()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = {}
+        response.json.return_value = {"data": {"id": user_id}}
+        response.__enter__ = Mock(return_value=response)
+        response.__exit__ = Mock(return_value=None)
+        return response
+
+    def test_shared_between_clients(self):
+        clients = [Client("shared_access_token") for _ in range(2)]
+
+        with patch("requests.Session.request", side_effect=[
+            self.create_mock_response("123")
+        ]) as request:
+            for client in clients:
+                self.assertEqual(client._get_authenticating_user_id(), "123")
+
+        request.assert_called_once()
+        self.assertEqual(
+            request.call_args.kwargs["headers"]["Authorization"],
+            "Bearer shared_access_token"
+        )
+        self.assertIs(clients[0].identity_cache, clients[1].identity_cache)
+
+    def test_keyed_by_token(self):
+        identity_cache = MemoryCache()
+        clients = [
+            Client(access_token, identity_cache=identity_cache)
+            for access_token in ("access_token_a", "access_token_b")
+        ]
+
+        with patch("requests.Session.request", side_effect=[
+            self.create_mock_response("123"), self.create_mock_response("456")
+        ]):
+            user_ids = [
+                client._get_authenticating_user_id() for client in clients
+            ]
+
+        self.assertEqual(user_ids, ["123", "456"])
+        self.assertEqual(identity_cache.count(), 2)
+        # Access tokens aren't stored in the cache, and the clients are
+        # left unchanged
+        for key in identity_cache._entries:
+            self.assertNotIn("access_token", key)
+        self.assertEqual(clients[0].bearer_token, "access_token_a")
+        self.assertIs(clients[0].return_type, Response)
+
+
+if __name__ == "__main__":
+    unittest.main()
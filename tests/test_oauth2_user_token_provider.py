@@ -0,0 +1,136 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from tweepy import Client, OAuth2UserHandler, OAuth2UserTokenProvider
+
+
+class OAuth2UserTokenProviderTests(unittest.TestCase):
+
+    def setUp(self):
+        self.oauth2_user_handler = OAuth2UserHandler(
+            client_id="client_id", redirect_uri="https://example.com",
+            scope=["tweet.read", "users.read", "offline.access"]
+        )
+        self.refreshed = []
+        self.refresh_count = 0
+        self.refresh_lock = threading.Lock()
+
+    def create_provider(self, expires_in):
+        return OAuth2UserTokenProvider(
+            self.oauth2_user_handler, {
+                "access_token": "access_token_0",
+                "refresh_token": "refresh_token_0",
+                "expires_at": time.time() + expires_in
+            }, token_updater=self.refreshed.append
+        )
+
+    def refresh_token(self, token_url, refresh_token, **kwargs):
+        with self.refresh_lock:
+            self.refresh_count += 1
+            count = self.refresh_count
+        # Simulate the latency of the token request
+        time.sleep(0.05)
+        return {
+            "access_token": f"access_token_{count}",
+            "refresh_token": f"refresh_token_{count}",
+            "expires_at": time.time() + 7200
+        }
+
+    def create_mock_response(self):
+        response = Mock()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = {}
+        response.__enter__ = Mock(return_value=response)
+        response.__exit__ = Mock(return_value=None)
+        return response
+
+    def test_valid_token_not_refreshed(self):
+        provider = self.create_provider(7200)
+        with patch.object(
+            self.oauth2_user_handler, "refresh_token",
+            side_effect=self.refresh_token
+        ) as refresh_token:
+            self.assertEqual(provider.get_token(), "access_token_0")
+        refresh_token.assert_not_called()
+
+    def test_refresh_before_expiry(self):
+        provider = self.create_provider(60)
+        client = Client(provider)
+
+        with patch.object(
+            self.oauth2_user_handler, "refresh_token",
+            side_effect=self.refresh_token
+        ) as refresh_token, patch.object(
+            client.session, "request", return_value=self.create_mock_response()
+        ) as request:
+            client.request("GET", "/2/users/me")
+
+        self.assertEqual(
+            refresh_token.call_args.kwargs["refresh_token"], "refresh_token_0"
+        )
+        self.assertEqual(
+            request.call_args.kwargs["headers"]["Authorization"],
+            "Bearer access_token_1"
+        )
+        self.assertEqual(self.refreshed, [provider.token])
+        self.assertEqual(provider.token["refresh_token"], "refresh_token_1")
+
+    def test_concurrent_refreshes_coalesced(self):
+        provider = self.create_provider(0)
+
+        with patch.object(
+            self.oauth2_user_handler, "refresh_token",
+            side_effect=self.refresh_token
+        ):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                tokens = list(executor.map(
+                    lambda _: provider.get_token(), range(8)
+                ))
+
+        self.assertEqual(self.refresh_count, 1)
+        self.assertEqual(tokens, ["access_token_1"] * 8)
+
+    def test_scope_kept_after_refresh(self):
+        provider = self.create_provider(7200)
+        client = Client(provider)
+        auth_hash = client._get_auth_hash(False)
+        identity_cache_key = client._get_identity_cache_key(provider)
+
+        with patch.object(
+            self.oauth2_user_handler, "refresh_token",
+            side_effect=self.refresh_token
+        ):
+            provider.refresh()
+
+        self.assertEqual(provider.access_token, "access_token_1")
+        self.assertEqual(client._get_auth_hash(False), auth_hash)
+        self.assertEqual(
+            client._get_identity_cache_key(provider), identity_cache_key
+        )
+
+    def test_user_id(self):
+        provider = OAuth2UserTokenProvider(
+            self.oauth2_user_handler, {"access_token": "access_token_0"},
+            user_id=123
+        )
+        other_provider = OAuth2UserTokenProvider(
+            self.oauth2_user_handler, {"access_token": "access_token_1"},
+            user_id=123
+        )
+        client = Client(provider)
+
+        with patch("requests.Session.request") as request:
+            self.assertEqual(client._get_authenticating_user_id(), "123")
+        request.assert_not_called()
+        self.assertEqual(
+            client._get_auth_hash(False),
+            Client(other_provider)._get_auth_hash(False)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
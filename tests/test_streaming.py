@@ -0,0 +1,282 @@
+import asyncio
+import json
+from queue import Queue
+import threading
+import unittest
+from unittest import mock
+
+from tweepy.streaming import (
+    BaseStream, RedundantStreamingClient, StreamDeduplicator, StreamingClient,
+    StreamLine, StreamRule, _extract_tweet_id, _StreamConnection
+)
+
+
+def make_line(tweet_id, text="Test Tweet", lang="en", tag="test"):
+    return json.dumps({
+        "data": {
+            "edit_history_tweet_ids": [tweet_id],
+            "entities": {
+                "mentions": [
+                    {"start": 0, "end": 8, "username": "Twitter", "id": "783214"}
+                ]
+            },
+            "id": tweet_id,
+            "lang": lang,
+            "referenced_tweets": [{"type": "quoted", "id": "20"}],
+            "text": text
+        },
+        "includes": {"users": [
+            {"id": "783214", "name": "X", "username": "Twitter"}
+        ]},
+        "matching_rules": [{"id": "1", "tag": tag}]
+    }).encode("utf-8")
+
+
+class RecordingStreamingClient(StreamingClient):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tweets = []
+
+    def on_tweet(self, tweet):
+        self.tweets.append(tweet)
+
+
+class TweepyStreamDeduplicatorTests(unittest.TestCase):
+
+    def test_extract_tweet_id(self):
+        self.assertEqual(_extract_tweet_id(make_line("1234")), b"1234")
+        self.assertEqual(
+            _extract_tweet_id(make_line("1234", text='{"id":"5"} {[')),
+            b"1234"
+        )
+        self.assertIsNone(_extract_tweet_id(b'{"errors": [{"title": "x"}]}'))
+
+    def test_deduplicator(self):
+        deduplicator = StreamDeduplicator()
+        self.assertFalse(deduplicator.is_duplicate(make_line("1")))
+        self.assertFalse(deduplicator.is_duplicate(make_line("2")))
+        self.assertTrue(deduplicator.is_duplicate(make_line("1")))
+        self.assertEqual(deduplicator.duplicates, 1)
+        self.assertFalse(deduplicator.is_duplicate(b'{"errors": []}'))
+
+    def test_deduplicator_max_size(self):
+        deduplicator = StreamDeduplicator(max_size=4)
+        for tweet_id in range(10):
+            deduplicator.add(tweet_id)
+        self.assertLessEqual(len(deduplicator), 4)
+        self.assertTrue(deduplicator.add(9))
+        self.assertFalse(deduplicator.add(0))
+
+    def test_deduplicator_window(self):
+        deduplicator = StreamDeduplicator(window=0)
+        deduplicator.add(1)
+        self.assertFalse(deduplicator.add(1))
+
+    def test_streaming_client_deduplication(self):
+        client = RecordingStreamingClient(
+            "", deduplicator=StreamDeduplicator()
+        )
+        for tweet_id in ("1", "2", "1", "3", "2"):
+            client.on_data(make_line(tweet_id))
+        self.assertEqual([tweet.id for tweet in client.tweets], [1, 2, 3])
+
+
+class TweepyStreamLineTests(unittest.TestCase):
+
+    def test_stream_line(self):
+        line = StreamLine(make_line("1234", lang="ja", tag="news"))
+        self.assertEqual(line.tweet_id, 1234)
+        self.assertEqual(line.get("lang"), "ja")
+        self.assertEqual(line.get("missing", "default"), "default")
+        self.assertEqual(
+            line.get("referenced_tweets"), [{"type": "quoted", "id": "20"}]
+        )
+        self.assertFalse(line.is_retweet())
+        self.assertEqual(line.matching_rules, [StreamRule(id="1", tag="news")])
+        self.assertEqual(line.matching_rule_tags, {"news"})
+        self.assertTrue(line.has_data)
+        line = StreamLine(b'{"errors": [{"title": "data", "data": {}}]}')
+        self.assertFalse(line.has_data)
+
+    def test_predicates(self):
+        client = RecordingStreamingClient("", predicates=[
+            lambda line: line.get("lang") == "en",
+            lambda line: "keep" in line.matching_rule_tags
+        ])
+        client.on_data(make_line("1", tag="keep"))
+        client.on_data(make_line("2", lang="ja", tag="keep"))
+        client.on_data(make_line("3", tag="drop"))
+        self.assertEqual([tweet.id for tweet in client.tweets], [1])
+        self.assertEqual(client.lines_dispatched, 1)
+        self.assertEqual(client.lines_filtered, 2)
+
+    def test_predicates_only_filter_tweets(self):
+        client = RecordingStreamingClient("", predicates=[lambda line: False])
+        client.on_errors = mock.Mock()
+        client.on_matching_rules = mock.Mock()
+        errors = [{"title": "operational-disconnect"}]
+        client.on_data(json.dumps({"errors": errors}).encode("utf-8"))
+        client.on_data(b'{"matching_rules": [{"id": "1", "tag": "data"}]}')
+        client.on_data(make_line("1"))
+        client.on_errors.assert_called_once_with(errors)
+        client.on_matching_rules.assert_called_once()
+        self.assertEqual(client.tweets, [])
+        self.assertEqual(client.lines_dispatched, 2)
+        self.assertEqual(client.lines_filtered, 1)
+
+
+class TweepyRedundantStreamingClientTests(unittest.TestCase):
+
+    def test_merged_deduplicated_output(self):
+        lines = {
+            "https://api.twitter.com/2/tweets/search/stream": [
+                make_line("1"), make_line("2"), b"", make_line("3")
+            ]
+        }
+
+        def connect(stream, method, url, **kwargs):
+            stream.on_connect()
+            for line in lines[url]:
+                if line:
+                    stream.on_data(line)
+                else:
+                    stream.on_keep_alive()
+
+        class Client(RedundantStreamingClient, RecordingStreamingClient):
+            pass
+
+        client = Client("", connections=3, stagger=0)
+        client.on_keep_alive = mock.Mock()
+        with mock.patch.object(BaseStream, "_connect", connect):
+            client.filter()
+
+        self.assertEqual(len(client.streams), 3)
+        self.assertEqual(
+            sorted(tweet.id for tweet in client.tweets), [1, 2, 3]
+        )
+        self.assertEqual(client.deduplicator.duplicates, 6)
+        self.assertEqual(client.on_keep_alive.call_count, 3)
+        self.assertFalse(client.running)
+
+
+    def test_bounded_queue(self):
+        lines = [make_line(str(tweet_id)) for tweet_id in range(1, 21)]
+        queued = []
+
+        def connect(stream, method, url, **kwargs):
+            for line in lines:
+                stream.on_data(line)
+                queued.append(stream.events.qsize())
+
+        class Client(RedundantStreamingClient, RecordingStreamingClient):
+            pass
+
+        client = Client("", connections=2, stagger=0, max_queue_size=2)
+        with mock.patch.object(BaseStream, "_connect", connect):
+            client.filter()
+
+        self.assertLessEqual(max(queued), 2)
+        self.assertEqual(
+            sorted(tweet.id for tweet in client.tweets), list(range(1, 21))
+        )
+
+    def test_full_queue_stopped(self):
+        client = RedundantStreamingClient("", max_queue_size=1)
+        events = Queue(1)
+        events.put(("on_keep_alive", ()))
+        stream = _StreamConnection(client, 0, events)
+        thread = threading.Thread(target=stream.on_data, args=(b"{}",))
+        thread.start()
+        stream.disconnect()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+
+class TweepyAsyncStreamingClientConcurrencyTests(
+    unittest.IsolatedAsyncioTestCase
+):
+
+    async def asyncSetUp(self):
+        from aiohttp import web
+
+        self.lines = [
+            make_line(str(tweet_id), lang=("en", "ja", "es")[tweet_id % 3])
+            for tweet_id in range(1, 31)
+        ]
+
+        async def stream(request):
+            response = web.StreamResponse()
+            await response.prepare(request)
+            for line in self.lines:
+                await response.write(line + b"\r\n")
+            await response.write(b"\r\n")
+            return response
+
+        app = web.Application()
+        app.router.add_get("/2/tweets/sample/stream", stream)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/2/tweets/sample/stream"
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+
+    def make_client(self, **kwargs):
+        from tweepy.asynchronous import AsyncStreamingClient
+        from tweepy.asynchronous.streaming import AsyncBaseStream
+
+        url = self.url
+
+        class Client(AsyncStreamingClient):
+
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.tweets = []
+                self.active = 0
+                self.max_active = 0
+
+            async def _connect(self, method, endpoint, **kwargs):
+                await AsyncBaseStream._connect(self, method, url, **kwargs)
+
+            async def on_tweet(self, tweet):
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                await asyncio.sleep(0.001 * (tweet.id % 4))
+                self.tweets.append(tweet)
+                self.active -= 1
+
+            async def on_closed(self, response):
+                self.closed_queued = self.queued
+                self.disconnect()
+
+        return Client("", max_retries=0, **kwargs)
+
+    async def test_concurrency(self):
+        client = self.make_client(concurrency=4, max_queue_size=2)
+        await client.sample()
+        self.assertEqual(len(client.tweets), len(self.lines))
+        self.assertGreater(client.max_active, 1)
+        self.assertEqual(client.closed_queued, 0)
+        self.assertGreaterEqual(client.max_queue_lag, client.queue_lag)
+
+    async def test_concurrency_validation(self):
+        for concurrency in (0, -1):
+            with self.assertRaises(ValueError):
+                self.make_client(concurrency=concurrency)
+
+    async def test_ordering_key(self):
+        client = self.make_client(
+            concurrency=3,
+            ordering_key=lambda line: StreamLine(line).get("lang")
+        )
+        await client.sample()
+        self.assertEqual(len(client.tweets), len(self.lines))
+        for lang in ("en", "ja", "es"):
+            tweet_ids = [
+                tweet.id for tweet in client.tweets if tweet.lang == lang
+            ]
+            self.assertEqual(tweet_ids, sorted(tweet_ids))
@@ -1,4 +1,11 @@
+import asyncio
+import threading
+import time
 import unittest
+from unittest.mock import patch
+from urllib.parse import quote, urlencode
+
+from oauthlib.oauth1 import Client as OAuthClient
 
 from tweepy.utils import *
 
@@ -9,3 +16,100 @@ class TweepyUtilsTests(unittest.TestCase):
         self.assertEqual("1,2,3", list_to_csv([1,2,3]))
         self.assertEqual("bird,tweet,nest,egg",
                          list_to_csv(["bird", "tweet", "nest", "egg"]))
+
+    def testsingleflight(self):
+        single_flight = SingleFlight()
+        calls = []
+
+        def function(value):
+            calls.append(value)
+            time.sleep(0.1)
+            return value
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    single_flight.do("key", function, 1)
+                )
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(calls, [1])
+        self.assertEqual(results, [1] * 5)
+        self.assertEqual(single_flight.do("key", function, 2), 2)
+
+    def testsingleflightexception(self):
+        single_flight = SingleFlight()
+
+        def function():
+            raise ValueError
+        self.assertRaises(ValueError, single_flight.do, "key", function)
+
+    def testoauth1signer(self):
+        url = "https://api.twitter.com/2/tweets/search/recent"
+        params = {
+            "query": "café ~ a+b *x /y",
+            "expansions": "author_id,attachments.media_keys",
+            "start_time": "2021-01-01T00:00:00Z",
+            "max_results": 10
+        }
+        signer = OAuth1Signer(
+            "consumer_key", "consumer/secret+", "123-access_token",
+            "access_token_secret"
+        )
+        with patch("secrets.token_hex", return_value="nonce"), \
+             patch("time.time", return_value=1700000000.5):
+            signed_url, authorization = signer.sign("GET", url, params)
+
+        # The signature should match oauthlib's for the same request
+        oauth_client = OAuthClient(
+            "consumer_key", "consumer/secret+", "123-access_token",
+            "access_token_secret", nonce="nonce", timestamp="1700000000"
+        )
+        query = urlencode(
+            sorted((name, str(value)) for name, value in params.items()),
+            quote_via=quote
+        )
+        expected_url, headers, body = oauth_client.sign(f"{url}?{query}")
+        self.assertEqual(authorization, headers["Authorization"])
+        self.assertEqual(signed_url, expected_url)
+
+
+class TweepyAsyncUtilsTests(unittest.IsolatedAsyncioTestCase):
+
+    async def testasyncsingleflight(self):
+        single_flight = AsyncSingleFlight()
+        calls = []
+
+        async def function(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(
+            *(single_flight.do("key", function, 1) for _ in range(5))
+        )
+        self.assertEqual(calls, [1])
+        self.assertEqual(results, [1] * 5)
+
+    async def testasyncsingleflightcancelled(self):
+        single_flight = AsyncSingleFlight()
+        calls = []
+
+        async def function(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value
+
+        leader = asyncio.create_task(single_flight.do("key", function, 1))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(single_flight.do("key", function, 2))
+        await asyncio.sleep(0)
+        leader.cancel()
+        self.assertEqual(await follower, 2)
+        self.assertEqual(calls, [1, 2])
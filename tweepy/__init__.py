@@ -11,10 +11,14 @@ __license__ = 'MIT'
 
 from tweepy.api import API
 from tweepy.auth import (
-    AppAuthHandler, OAuthHandler, OAuth1UserHandler, OAuth2AppHandler,
-    OAuth2BearerHandler, OAuth2UserHandler
+    AppAuthHandler, BearerTokenPool, OAuthHandler, OAuth1UserHandler,
+    OAuth2AppHandler, OAuth2BearerHandler, OAuth2UserHandler,
+    OAuth2UserTokenProvider
+)
+from tweepy.cache import (
+    Cache, EntityCache, FileCache, JSONSerializer, MemoryCache,
+    PickleSerializer, SQLiteCache
 )
-from tweepy.cache import Cache, FileCache, MemoryCache
 from tweepy.client import Client, Response
 from tweepy.cursor import Cursor
 from tweepy.direct_message_event import (
@@ -31,11 +35,13 @@ from tweepy.place import Place, PLACE_FIELDS
 from tweepy.poll import Poll, POLL_FIELDS
 from tweepy.space import PUBLIC_SPACE_FIELDS, Space, SPACE_FIELDS
 from tweepy.streaming import (
-    StreamingClient, StreamResponse, StreamRule
+    RedundantStreamingClient, StreamDeduplicator, StreamingClient,
+    StreamLine, StreamResponse, StreamRule
 )
 from tweepy.tweet import (
     PUBLIC_TWEET_FIELDS, ReferencedTweet, Tweet, TWEET_FIELDS
 )
+from tweepy.upload import ResumableUpload
 from tweepy.user import User, USER_FIELDS
 
 # Global, unauthenticated instance of API
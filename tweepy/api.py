@@ -2,28 +2,44 @@
 # Copyright 2009-2023 Joshua Roesslein
 # See LICENSE for details.
 
+from concurrent.futures import as_completed, ThreadPoolExecutor
 import contextlib
+import copy
 import functools
+import heapq
+import io
+import json
 import logging
 import mimetypes
+import mmap
 from platform import python_version
 import sys
+import threading
 import time
 from urllib.parse import urlencode
 
 import requests
 
 import tweepy
+from tweepy.cache import CachedPayload, JSONSerializer
 from tweepy.errors import (
     BadRequest, Forbidden, HTTPException, NotFound, TooManyRequests,
     TweepyException, TwitterServerError, Unauthorized
 )
-from tweepy.models import Model
-from tweepy.parsers import ModelParser, Parser
-from tweepy.utils import list_to_csv
+from tweepy.models import Model, ResultSet
+from tweepy.parsers import ModelParser, Parser, RawParser
+from tweepy.upload import ResumableUpload
+from tweepy.utils import list_to_csv, SingleFlight
 
 log = logging.getLogger(__name__)
 
+# Keyword arguments of API.request that aren't sent as parameters
+_REQUEST_OPTIONS = (
+    'endpoint_parameters', 'params', 'headers', 'json_payload', 'parser',
+    'payload_list', 'payload_type', 'post_data', 'files', 'require_auth',
+    'return_cursors', 'upload_api', 'use_cache', 'coalesce'
+)
+
 
 def pagination(mode):
     def decorator(method):
@@ -49,6 +65,26 @@ def payload(payload_type, **payload_kwargs):
     return decorator
 
 
+def _is_processing(media):
+    # Whether Twitter's API is still processing uploaded media
+    processing_info = getattr(media, 'processing_info', None)
+    return processing_info is not None and (
+        processing_info['state'] in ('pending', 'in_progress') and
+        'error' not in processing_info
+    )
+
+
+def _is_client_error(exception):
+    # Whether a request failed with a client error that it can't succeed after
+    # being retried, e.g. because an upload session expired. Rate limits are
+    # excluded, as the request can succeed once they reset.
+    return (
+        isinstance(exception, HTTPException) and
+        not isinstance(exception, TooManyRequests) and
+        400 <= exception.response.status_code < 500
+    )
+
+
 class API:
     """Twitter API v1.1 Interface
 
@@ -66,6 +102,11 @@ class API:
         The authentication handler to be used
     cache
         The cache to query if a GET method is used
+    coalesce_requests
+        Whether concurrent identical GET requests from multiple threads should
+        share a single request to Twitter and its result
+
+        .. versionadded:: 4.16
     host
         The general REST API host server URL
     parser
@@ -99,13 +140,16 @@ class API:
     """
 
     def __init__(
-        self, auth=None, *, cache=None, host='api.twitter.com', parser=None,
-        proxy=None, retry_count=0, retry_delay=0, retry_errors=None,
-        timeout=60, upload_host='upload.twitter.com', user_agent=None,
+        self, auth=None, *, cache=None, coalesce_requests=False,
+        host='api.twitter.com', parser=None, proxy=None, retry_count=0,
+        retry_delay=0, retry_errors=None, timeout=60,
+        upload_host='upload.twitter.com', user_agent=None,
         wait_on_rate_limit=False
     ):
         self.auth = auth
         self.cache = cache
+        self.coalesce_requests = coalesce_requests
+        self._in_flight = SingleFlight()
         self.host = host
 
         if parser is None:
@@ -147,7 +191,8 @@ class API:
         self, method, endpoint, *, endpoint_parameters=(), params=None,
         headers=None, json_payload=None, parser=None, payload_list=False,
         payload_type=None, post_data=None, files=None, require_auth=True,
-        return_cursors=False, upload_api=False, use_cache=True, **kwargs
+        return_cursors=False, upload_api=False, use_cache=True, coalesce=True,
+        **kwargs
     ):
         # If authentication is required and no credentials
         # are provided, throw an error.
@@ -179,30 +224,71 @@ class API:
             params[k] = str(arg)
         log.debug("PARAMS: %r", params)
 
+        if parser is None:
+            parser = self.parser
+        return_cursors = return_cursors or 'cursor' in params or 'next' in params
+
         # Query the cache if one is available
         # and this request uses a GET method.
         if use_cache and self.cache and method == 'GET':
-            cache_result = self.cache.get(f'{path}?{urlencode(params)}')
+            cache_key = f'{path}?{urlencode(params)}'
+            # Caches that don't subclass Cache may only have get and store
+            get_stale = getattr(self.cache, 'get_stale', None)
+            if get_stale is None:
+                cache_result, stale = self.cache.get(cache_key), False
+            else:
+                cache_result, stale = get_stale(cache_key)
             # if cache result found and not expired, return it
             if cache_result:
-                # must restore api reference
-                if isinstance(cache_result, list):
-                    for result in cache_result:
-                        if isinstance(result, Model):
-                            result._api = self
-                else:
-                    if isinstance(cache_result, Model):
-                        cache_result._api = self
+                if stale:
+                    # serve the stale result while it's refreshed
+                    def refresh():
+                        # Refresh with a copy of the API with its own
+                        # session, as sessions aren't thread-safe, and so
+                        # that cached_result and last_response aren't changed
+                        api = copy.copy(self)
+                        api.session = requests.Session()
+                        payload = api.request(
+                            method, endpoint,
+                            endpoint_parameters=endpoint_parameters,
+                            params=params, headers=headers,
+                            parser=RawParser(), require_auth=require_auth,
+                            upload_api=upload_api, use_cache=False,
+                            coalesce=False
+                        )
+                        result = parser.parse(
+                            payload, api=self, payload_list=payload_list,
+                            payload_type=payload_type,
+                            return_cursors=return_cursors
+                        )
+                        self._store_in_cache(
+                            cache_key, payload, result,
+                            payload_list=payload_list,
+                            payload_type=payload_type,
+                            return_cursors=return_cursors
+                        )
+
+                    self.cache.refresh(cache_key, refresh)
                 self.cached_result = True
-                return cache_result
+                return self._load_from_cache(cache_result, parser)
+
+        if self.coalesce_requests and coalesce and method == 'GET':
+            # Concurrent identical requests share a single request, made by
+            # the first caller
+            return self._in_flight.do(
+                f'{url}?{urlencode(params)}', self.request, method, endpoint,
+                endpoint_parameters=endpoint_parameters, params=params,
+                headers=headers, json_payload=json_payload, parser=parser,
+                payload_list=payload_list, payload_type=payload_type,
+                post_data=post_data, files=files, require_auth=require_auth,
+                return_cursors=return_cursors, upload_api=upload_api,
+                use_cache=use_cache, coalesce=False
+            )
 
         # Monitoring rate limits
         remaining_calls = None
         reset_time = None
 
-        if parser is None:
-            parser = self.parser
-
         try:
             # Continue attempting request until successful
             # or maximum number of retries is reached.
@@ -278,20 +364,160 @@ class API:
                 raise HTTPException(resp)
 
             # Parse the response payload
-            return_cursors = return_cursors or 'cursor' in params or 'next' in params
             result = parser.parse(
                 resp.text, api=self, payload_list=payload_list,
                 payload_type=payload_type, return_cursors=return_cursors
             )
 
             # Store result into cache if one is available.
-            if use_cache and self.cache and method == 'GET' and result:
-                self.cache.store(f'{path}?{urlencode(params)}', result)
+            if use_cache and self.cache and method == 'GET':
+                self._store_in_cache(
+                    f'{path}?{urlencode(params)}', resp.text, result,
+                    payload_list=payload_list, payload_type=payload_type,
+                    return_cursors=return_cursors
+                )
 
             return result
         finally:
             self.session.close()
 
+    def _load_from_cache(self, cache_result, parser):
+        if isinstance(cache_result, CachedPayload):
+            # re-parse the raw payload
+            return parser.parse(
+                cache_result.payload, api=self,
+                payload_list=cache_result.payload_list,
+                payload_type=cache_result.payload_type,
+                return_cursors=cache_result.return_cursors
+            )
+        # must restore api reference
+        if isinstance(cache_result, list):
+            for result in cache_result:
+                if isinstance(result, Model):
+                    result._api = self
+        elif isinstance(cache_result, Model):
+            cache_result._api = self
+        return cache_result
+
+    def _store_in_cache(self, key, payload, result, *, payload_list,
+                        payload_type, return_cursors):
+        if not result:
+            return
+        # Caches that don't subclass Cache may not have a serializer
+        serializer = getattr(self.cache, 'serializer', None)
+        if isinstance(serializer, JSONSerializer):
+            # Store the raw payload, to be re-parsed when it's retrieved,
+            # rather than the model instances
+            result = CachedPayload(
+                payload, payload_type, payload_list, return_cursors
+            )
+        self.cache.store(key, result)
+
+    def _lookup_cached(self, method, endpoint, lookups, *,
+                       endpoint_parameters=(), parser=None, use_cache=True,
+                       payload_type=None, payload_list=False, **kwargs):
+        # Caches the items of lookup endpoints individually, keyed by each of
+        # the lookup parameters, so that only items that aren't cached are
+        # requested. lookups maps lookup parameters to lists of values and
+        # the attributes of the items that they match.
+        if parser is None:
+            parser = self.parser
+        params = {
+            parameter: list_to_csv(values)
+            for parameter, (values, attribute) in lookups.items()
+        }
+        if not (
+            use_cache and self.cache and isinstance(parser, ModelParser) and
+            any(params.values())
+        ):
+            return self.request(
+                method, endpoint, endpoint_parameters=endpoint_parameters,
+                parser=parser, use_cache=use_cache, payload_type=payload_type,
+                payload_list=payload_list, **params, **kwargs
+            )
+
+        # Items are cached by the other parameters too, as they change the
+        # representation of items. request() sends every keyword argument
+        # that isn't one of its own options as a parameter.
+        query = urlencode(sorted(
+            (k, str(arg)) for k, arg in kwargs.items()
+            if arg is not None and k not in _REQUEST_OPTIONS
+        ))
+
+        def get_key(parameter, value):
+            # Lookups by screen name are case-insensitive
+            value = str(value).lower()
+            return f'/1.1/{endpoint}.json#{parameter}={value}?{query}'
+
+        keys = {}
+        for parameter, (values, attribute) in lookups.items():
+            for value in values or ():
+                keys[get_key(parameter, value)] = (parameter, value)
+        # Caches that don't subclass Cache may only have get and store
+        get_many = getattr(self.cache, 'get_many', None)
+        if get_many is None:
+            cached = {}
+            for key in keys:
+                value = self.cache.get(key)
+                if value is not None:
+                    cached[key] = value
+        else:
+            cached = get_many(keys)
+
+        missing = {}
+        for key, (parameter, value) in keys.items():
+            if key not in cached:
+                missing.setdefault(parameter, []).append(value)
+
+        # Items requested by more than one parameter are only returned once
+        results = ResultSet()
+        ids = set()
+        for cache_result in cached.values():
+            item = self._load_from_cache(cache_result, parser)
+            if item.id not in ids:
+                ids.add(item.id)
+                results.append(item)
+        if not missing:
+            self.cached_result = True
+            return results
+
+        try:
+            fetched = self.request(
+                method, endpoint, endpoint_parameters=endpoint_parameters,
+                parser=parser, use_cache=False, payload_type=payload_type,
+                payload_list=payload_list, **{
+                    parameter: list_to_csv(values)
+                    for parameter, values in missing.items()
+                }, **kwargs
+            )
+        except NotFound:
+            # None of the missing items exist
+            if not results:
+                raise
+            fetched = []
+
+        serializer = getattr(self.cache, 'serializer', None)
+        to_store = {}
+        for item in fetched:
+            if isinstance(serializer, JSONSerializer):
+                value = CachedPayload(
+                    json.dumps(item._json), payload_type, False, False
+                )
+            else:
+                value = item
+            for parameter, (values, attribute) in lookups.items():
+                to_store[get_key(parameter, getattr(item, attribute))] = value
+        store_many = getattr(self.cache, 'store_many', None)
+        if store_many is None:
+            for key, value in to_store.items():
+                self.cache.store(key, value)
+        else:
+            store_many(to_store)
+
+        results.extend(item for item in fetched if item.id not in ids)
+        self.cached_result = False
+        return results
+
     # Get Tweet timelines
 
     @pagination(mode='id')
@@ -506,11 +732,21 @@ class API:
             has been deprecated and has a retirement date of November 20,
             2023.: https://twittercommunity.com/t/x-api-v2-migration/203391
         """
-        return self.request(
-            'GET', 'statuses/lookup', endpoint_parameters=(
+        if kwargs.get('map'):
+            # Tweets that can't be shown are mapped to null, rather than
+            # omitted, so they can't be cached individually
+            return self.request(
+                'GET', 'statuses/lookup', endpoint_parameters=(
+                    'id', 'include_entities', 'trim_user', 'map',
+                    'include_ext_alt_text', 'include_card_uri'
+                ), id=list_to_csv(id), **kwargs
+            )
+        return self._lookup_cached(
+            'GET', 'statuses/lookup', {'id': (id, 'id_str')},
+            endpoint_parameters=(
                 'id', 'include_entities', 'trim_user', 'map',
                 'include_ext_alt_text', 'include_card_uri'
-            ), id=list_to_csv(id), **kwargs
+            ), **kwargs
         )
 
     @payload('json')
@@ -2352,11 +2588,13 @@ class API:
         ----------
         https://developer.twitter.com/en/docs/twitter-api/v1/accounts-and-users/follow-search-get-users/api-reference/get-users-lookup
         """
-        return self.request(
-            'POST', 'users/lookup', endpoint_parameters=(
+        return self._lookup_cached(
+            'POST', 'users/lookup', {
+                'screen_name': (screen_name, 'screen_name'),
+                'user_id': (user_id, 'id_str')
+            }, endpoint_parameters=(
                 'screen_name', 'user_id', 'include_entities', 'tweet_mode'
-            ), screen_name=list_to_csv(screen_name),
-            user_id=list_to_csv(user_id), **kwargs
+            ), **kwargs
         )
 
     @pagination(mode='page')
@@ -3405,6 +3643,68 @@ class API:
             ), command='STATUS', media_id=media_id, upload_api=True, **kwargs
         )
 
+    def wait_for_media_processing(self, media, **kwargs):
+        """wait_for_media_processing(media)
+
+        Wait for Twitter's API to finish processing multiple uploaded media
+        at once, yielding each media as its processing succeeds or fails.
+
+        The processing status of every media is tracked together, sleeping
+        only until the earliest ``check_after_secs`` of the media still being
+        processed, and then calling :meth:`get_media_upload_status` for the
+        media that are due.
+
+        .. versionadded:: 4.16
+
+        Parameters
+        ----------
+        media
+            An iterable of media IDs, or of :class:`~tweepy.models.Media`,
+            e.g. returned by :meth:`chunked_upload` with
+            ``wait_for_async_finalize`` set to ``False``, whose
+            ``processing_info`` is used to check on them.
+
+        Yields
+        ------
+        :class:`~tweepy.models.Media`
+            Each media, once its ``processing_info`` state is ``succeeded`` or
+            ``failed``, or it has no ``processing_info``, in the order that
+            their processing finishes
+        """
+        # Heap of the next time to check on each media that's still being
+        # processed, ordered by that time
+        checks = []
+        for index, item in enumerate(media):
+            if isinstance(item, Model):
+                if not _is_processing(item):
+                    yield item
+                    continue
+                check_time = (
+                    time.monotonic() +
+                    item.processing_info['check_after_secs']
+                )
+                media_id = item.media_id
+            else:
+                check_time = time.monotonic()
+                media_id = item
+            # The index breaks ties, so that media IDs aren't compared
+            heapq.heappush(checks, (check_time, index, media_id))
+
+        while checks:
+            check_time, index, media_id = heapq.heappop(checks)
+            time.sleep(max(check_time - time.monotonic(), 0))
+            item = self.get_media_upload_status(
+                media_id, use_cache=False, **kwargs
+            )
+            if _is_processing(item):
+                heapq.heappush(checks, (
+                    time.monotonic() +
+                    item.processing_info['check_after_secs'],
+                    index, media_id
+                ))
+            else:
+                yield item
+
     def create_media_metadata(self, media_id, alt_text, **kwargs):
         """create_media_metadata(media_id, alt_text)
 
@@ -3543,10 +3843,13 @@ class API:
 
     def chunked_upload(self, filename, *, file=None, file_type=None,
                        wait_for_async_finalize=True, media_category=None,
-                       additional_owners=None, **kwargs):
+                       additional_owners=None, concurrency=1,
+                       segment_retries=2, state_file=None, total_bytes=None,
+                       **kwargs):
         """chunked_upload( \
             filename, *, file, file_type, wait_for_async_finalize, \
-            media_category, additional_owners \
+            media_category, additional_owners, concurrency, segment_retries, \
+            state_file, total_bytes \
         )
 
         Use this to upload media to Twitter. This uses the chunked upload
@@ -3555,6 +3858,26 @@ class API:
         ``wait_for_async_finalize`` is set, this calls
         :meth:`get_media_upload_status` as well.
 
+        Segments are read as slices of a memory map of the file, when it can
+        be mapped, rather than copied from it. If ``concurrency`` is more than
+        1, segments are appended in parallel, and the upload is only finalized
+        once every segment has been appended.
+
+        If ``state_file`` is set, the progress of the upload is recorded in
+        it with :class:`ResumableUpload`, and if it has the progress of an
+        unexpired upload of the same file, with the same name, size, and
+        fingerprint of its contents, that upload is resumed, only appending
+        the segments that weren't completed. Uploads read as a stream, with
+        ``total_bytes``, can't be fingerprinted and aren't resumed. The state
+        file is deleted once the upload is complete, or if appending a
+        segment or finalizing the upload fails with a client error, other
+        than a rate limit, as the upload can't be resumed after one.
+
+        If ``total_bytes`` is set, the media is read as a stream instead, so
+        ``file`` can be a non-seekable file-like object, e.g. a pipe, or an
+        iterable of :class:`bytes`. Segments are appended as they're read,
+        and at most ``concurrency`` + 1 segments are held in memory at once.
+
         Parameters
         ----------
         filename
@@ -3570,6 +3893,27 @@ class API:
             |media_category|
         additional_owners
             |additional_owners|
+        concurrency
+            The number of segments to append at once. Defaults to ``1``.
+
+            .. versionadded:: 4.16
+        segment_retries
+            The number of times to retry appending a segment, if the request
+            fails to send or Twitter's API returns a server error. Defaults to
+            ``2``.
+
+            .. versionadded:: 4.16
+        state_file
+            Path of the file to record the progress of the upload in, to be
+            able to resume it.
+
+            .. versionadded:: 4.16
+        total_bytes
+            The size of the media being uploaded in bytes, to read it as a
+            stream without seeking. The upload fails if the media isn't this
+            size.
+
+            .. versionadded:: 4.16
 
         Returns
         -------
@@ -3579,50 +3923,240 @@ class API:
         ----------
         https://developer.twitter.com/en/docs/twitter-api/v1/media/upload-media/uploading-media/chunked-media-upload
         """
-        fp = file or open(filename, 'rb')
+        fp = file if file is not None else open(filename, 'rb')
+        state = None if state_file is None else ResumableUpload(state_file)
 
-        start = fp.tell()
-        fp.seek(0, 2)  # Seek to end of file
-        file_size = fp.tell() - start
-        fp.seek(start)
+        try:
+            if total_bytes is None:
+                start = fp.tell()
+                fp.seek(0, 2)  # Seek to end of file
+                file_size = fp.tell() - start
+                fp.seek(start)
+            else:
+                file_size = total_bytes
 
-        min_chunk_size, remainder = divmod(file_size, 1000)
-        min_chunk_size += bool(remainder)
+            # Use 1 MiB as default chunk size
+            chunk_size = kwargs.pop('chunk_size', 1024 * 1024)
 
-        # Use 1 MiB as default chunk size
-        chunk_size = kwargs.pop('chunk_size', 1024 * 1024)
-        # Max chunk size is 5 MiB
-        chunk_size = max(min(chunk_size, 5 * 1024 * 1024), min_chunk_size)
+            # Streams can't be fingerprinted without being consumed, so
+            # they're never resumed
+            fingerprint = None
+            if state is not None and total_bytes is None:
+                fingerprint = ResumableUpload.fingerprint_file(
+                    fp, start, file_size
+                )
 
-        segments, remainder = divmod(file_size, chunk_size)
-        segments += bool(remainder)
+            if state is not None and state.resumable(
+                filename, file_size, fingerprint
+            ):
+                log.info(f"Resuming upload of media {state.media_id}")
+                media_id = state.media_id
+                chunk_size = state.chunk_size
+            else:
+                min_chunk_size, remainder = divmod(file_size, 1000)
+                min_chunk_size += bool(remainder)
+
+                # Max chunk size is 5 MiB
+                chunk_size = max(
+                    min(chunk_size, 5 * 1024 * 1024), min_chunk_size
+                )
+
+                media = self.chunked_upload_init(
+                    file_size, file_type, media_category=media_category,
+                    additional_owners=additional_owners, **kwargs
+                )
+                media_id = media.media_id
+                if state is not None:
+                    state.start(
+                        media_id, filename, file_size, chunk_size,
+                        getattr(media, 'expires_after_secs', None),
+                        fingerprint=fingerprint
+                    )
 
-        media_id = self.chunked_upload_init(
-            file_size, file_type, media_category=media_category,
-            additional_owners=additional_owners, **kwargs
-        ).media_id
+            # Each thread appends with a copy of the API with its own
+            # session, as sessions aren't thread-safe
+            local = threading.local()
+
+            def append_segment(segment_index, segment):
+                api = getattr(local, 'api', None)
+                if api is None:
+                    api = local.api = copy.copy(self)
+                    api.session = requests.Session()
+                for retry in range(segment_retries + 1):
+                    try:
+                        # The APPEND command returns an empty response body
+                        api.chunked_upload_append(
+                            media_id, (filename, segment), segment_index,
+                            **kwargs
+                        )
+                        break
+                    except TweepyException as e:
+                        if (
+                            retry == segment_retries or
+                            isinstance(e, HTTPException) and
+                            not isinstance(e, TwitterServerError)
+                        ):
+                            raise
+                        log.warning(
+                            f"Failed to append segment {segment_index} of "
+                            f"media {media_id}, retrying: {e}"
+                        )
+                        time.sleep(self.retry_delay)
+                if state is not None:
+                    state.complete_segment(segment_index)
+
+            if state is None:
+                completed_segments = set()
+            else:
+                completed_segments = state.completed_segments.copy()
+
+            if total_bytes is None:
+                segments, remainder = divmod(file_size, chunk_size)
+                segments += bool(remainder)
+                with self._map_file(fp) as mapped:
+                    self._append_segments(
+                        append_segment, self._read_file_segments(
+                            fp, mapped, start, chunk_size, [
+                                segment_index
+                                for segment_index in range(segments)
+                                if segment_index not in completed_segments
+                            ]
+                        ), concurrency
+                    )
+            else:
+                self._append_segments(
+                    append_segment, (
+                        (segment_index, segment)
+                        for segment_index, segment in
+                        self._read_stream_segments(
+                            fp, chunk_size, total_bytes
+                        )
+                        if segment_index not in completed_segments
+                    ), concurrency
+                )
+        except HTTPException as e:
+            # The upload can't be resumed after a client error, so its state
+            # is discarded, rather than resumed again by the next attempt
+            if state is not None and _is_client_error(e):
+                state.clear()
+            raise
+        finally:
+            if hasattr(fp, 'close'):
+                fp.close()
 
-        for segment_index in range(segments):
-            # The APPEND command returns an empty response body
-            self.chunked_upload_append(
-                media_id, (filename, fp.read(chunk_size)), segment_index,
-                **kwargs
-            )
+        if state is not None and state.finalized:
+            media = self.get_media_upload_status(media_id, **kwargs)
+        else:
+            try:
+                media = self.chunked_upload_finalize(media_id, **kwargs)
+            except HTTPException as e:
+                if state is not None and _is_client_error(e):
+                    state.clear()
+                raise
+            if state is not None and hasattr(media, 'processing_info'):
+                state.finalize()
 
-        fp.close()
-        media =  self.chunked_upload_finalize(media_id, **kwargs)
+        if wait_for_async_finalize and _is_processing(media):
+            media = next(self.wait_for_media_processing([media], **kwargs))
 
-        if wait_for_async_finalize and hasattr(media, 'processing_info'):
-            while (
-                media.processing_info['state'] in (
-                    'pending', 'in_progress'
-                ) and 'error' not in media.processing_info
-            ):
-                time.sleep(media.processing_info['check_after_secs'])
-                media = self.get_media_upload_status(media.media_id, **kwargs)
+        if state is not None:
+            state.clear()
 
         return media
 
+    @staticmethod
+    @contextlib.contextmanager
+    def _map_file(fp):
+        # Map the file into memory, so that segments can be sliced from it
+        # without being copied, falling back to reading them if it can't be
+        try:
+            mapped_file = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            yield None
+            return
+        try:
+            with memoryview(mapped_file) as mapped:
+                yield mapped
+        finally:
+            mapped_file.close()
+
+    @staticmethod
+    def _read_file_segments(fp, mapped, start, chunk_size, segment_indexes):
+        for segment_index in segment_indexes:
+            offset = start + segment_index * chunk_size
+            if mapped is not None:
+                yield segment_index, mapped[offset:offset + chunk_size]
+            else:
+                fp.seek(offset)
+                yield segment_index, fp.read(chunk_size)
+
+    @staticmethod
+    def _read_stream_segments(source, chunk_size, total_bytes):
+        # Split a stream or an iterable of bytes into segments of chunk_size,
+        # checking that its size is total_bytes
+        if hasattr(source, 'read'):
+            source = iter(functools.partial(source.read, chunk_size), b'')
+        buffer = bytearray()
+        segment_index = 0
+        size = 0
+        for data in source:
+            size += len(data)
+            if size > total_bytes:
+                raise TweepyException(
+                    f"Media is larger than total_bytes ({total_bytes})"
+                )
+            buffer += data
+            while len(buffer) >= chunk_size:
+                yield segment_index, buffer[:chunk_size]
+                del buffer[:chunk_size]
+                segment_index += 1
+        if size < total_bytes:
+            raise TweepyException(
+                f"Media is smaller than total_bytes ({total_bytes}): {size}"
+            )
+        if buffer:
+            yield segment_index, buffer
+
+    @staticmethod
+    def _append_segments(append_segment, segments, concurrency):
+        # Append segments as they're read, with at most concurrency appends in
+        # progress and one more segment read and waiting to be appended, so
+        # that at most concurrency + 1 segments are held in memory
+        slots = threading.Semaphore(concurrency + 1)
+        futures = []
+        failed = threading.Event()
+
+        def done(future, segment):
+            slots.release()
+            if isinstance(segment, memoryview):
+                segment.release()
+            if not future.cancelled() and future.exception() is not None:
+                failed.set()
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            try:
+                segments = iter(segments)
+                while not failed.is_set():
+                    slots.acquire()
+                    try:
+                        segment_index, segment = next(segments)
+                    except StopIteration:
+                        break
+                    future = executor.submit(
+                        append_segment, segment_index, segment
+                    )
+                    future.add_done_callback(
+                        functools.partial(done, segment=segment)
+                    )
+                    futures.append(future)
+                    del segment
+                for future in as_completed(futures):
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
     def chunked_upload_append(self, media_id, media, segment_index, **kwargs):
         """chunked_upload_append(media_id, media, segment_index)
 
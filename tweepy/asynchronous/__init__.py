@@ -10,15 +10,16 @@ Asynchronous interfaces with the Twitter API
 
 try:
     import aiohttp
-    import async_lru
     import oauthlib
 except ModuleNotFoundError:
     from tweepy.errors import TweepyException
     raise TweepyException(
-        "tweepy.asynchronous requires aiohttp, async_lru, and oauthlib to be "
-        "installed"
+        "tweepy.asynchronous requires aiohttp and oauthlib to be installed"
     )
 
+from tweepy.asynchronous.cache import (
+    AsyncCache, AsyncCacheAdapter, AsyncMemoryCache
+)
 from tweepy.asynchronous.client import AsyncClient
 from tweepy.asynchronous.pagination import AsyncPaginator
 from tweepy.asynchronous.streaming import AsyncStreamingClient
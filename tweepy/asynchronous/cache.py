@@ -0,0 +1,311 @@
+# Tweepy
+# Copyright 2009-2023 Joshua Roesslein
+# See LICENSE for details.
+
+import asyncio
+from functools import partial
+
+from tweepy.cache import MemoryCache
+
+
+class AsyncCache:
+    """Asynchronous cache interface, that :class:`AsyncClient` uses to cache
+    responses without blocking the event loop
+
+    .. versionadded:: 4.16
+
+    Attributes
+    ----------
+    stale_while_revalidate : float
+        Number of seconds past the timeout to serve an expired entry for while
+        it's refreshed in the background
+    max_refreshes : int
+        Maximum number of entries to refresh in the background at once
+    """
+
+    stale_while_revalidate = 0
+    max_refreshes = 4
+
+    def __init__(self):
+        # keys of the entries being refreshed in the background
+        self._refreshing = set()
+
+    async def store(self, key, value):
+        """|coroutine|
+
+        Add a new entry to the cache
+        """
+        raise NotImplementedError
+
+    async def get(self, key, timeout=None):
+        """|coroutine|
+
+        Get a cached entry, if it exists and isn't expired, overriding the
+        timeout with ``timeout`` if it's provided
+        """
+        raise NotImplementedError
+
+    async def get_stale(self, key, timeout=None):
+        """|coroutine|
+
+        Get a cached entry, if it exists and isn't past the
+        ``stale_while_revalidate`` grace period, and whether it's expired and
+        should be refreshed
+        """
+        return await self.get(key, timeout), False
+
+    async def get_many(self, keys, timeout=None):
+        """|coroutine|
+
+        Get cached entries that exist and aren't expired, as a dict
+        """
+        keys = list(keys)
+        values = await asyncio.gather(
+            *(self.get(key, timeout) for key in keys)
+        )
+        return {
+            key: value for key, value in zip(keys, values) if value is not None
+        }
+
+    async def store_many(self, mapping):
+        """|coroutine|
+
+        Add new entries to the cache, from a dict
+        """
+        await asyncio.gather(
+            *(self.store(key, value) for key, value in mapping.items())
+        )
+
+    async def delete(self, key):
+        """|coroutine|
+
+        Delete a cached entry, if it exists
+        """
+        raise NotImplementedError
+
+    async def delete_many(self, keys):
+        """|coroutine|
+
+        Delete cached entries, if they exist, with :meth:`delete` for each by
+        default
+        """
+        await asyncio.gather(*(self.delete(key) for key in keys))
+
+    async def count(self):
+        """|coroutine|
+
+        Get the number of entries currently stored in the cache
+        """
+        raise NotImplementedError
+
+    async def cleanup(self):
+        """|coroutine|
+
+        Delete any expired entries in the cache
+        """
+        raise NotImplementedError
+
+    async def flush(self):
+        """|coroutine|
+
+        Delete all cached entries
+        """
+        raise NotImplementedError
+
+    def begin_refresh(self, key):
+        """Reserve a refresh of an entry, returning ``False`` if it's already
+        being refreshed or too many entries are being refreshed
+        """
+        if (
+            key in self._refreshing or
+            len(self._refreshing) >= self.max_refreshes
+        ):
+            return False
+        self._refreshing.add(key)
+        return True
+
+    def end_refresh(self, key):
+        """Release a refresh reserved with :meth:`begin_refresh`"""
+        self._refreshing.discard(key)
+
+
+class AsyncMemoryCache(AsyncCache):
+    """AsyncMemoryCache( \
+        timeout=60, *, max_entries=None, max_bytes=None, eviction="lru", \
+        stale_while_revalidate=0, max_refreshes=4, serializer=None \
+    )
+
+    In-memory cache for use from an event loop
+
+    This wraps a :class:`~tweepy.MemoryCache`, calling its methods directly
+    rather than in an executor, as it never blocks on I/O.
+
+    .. versionadded:: 4.16
+
+    Parameters
+    ----------
+    timeout : float
+        Number of seconds to keep a cached entry
+    max_entries : int | None
+        Maximum number of entries to keep
+    max_bytes : int | None
+        Maximum total size of serialized values to keep
+    eviction : str | EvictionPolicy
+        ``"lru"``, ``"lfu"``, ``"ttl"``, or an eviction policy instance
+    stale_while_revalidate : float
+        Number of seconds past the timeout to serve an expired entry for while
+        it's refreshed
+    max_refreshes : int
+        Maximum number of entries to refresh in the background at once
+    serializer : PickleSerializer | JSONSerializer | None
+        Serializer used to size values, if ``max_bytes`` is set
+
+    Attributes
+    ----------
+    cache : MemoryCache
+        The wrapped in-memory cache
+    """
+
+    def __init__(self, timeout=60, *, max_entries=None, max_bytes=None,
+                 eviction="lru", stale_while_revalidate=0, max_refreshes=4,
+                 serializer=None):
+        AsyncCache.__init__(self)
+        self.cache = MemoryCache(
+            timeout, max_entries=max_entries, max_bytes=max_bytes,
+            eviction=eviction, stale_while_revalidate=stale_while_revalidate,
+            max_refreshes=max_refreshes, serializer=serializer
+        )
+
+    @property
+    def stale_while_revalidate(self):
+        return self.cache.stale_while_revalidate
+
+    @property
+    def max_refreshes(self):
+        return self.cache.max_refreshes
+
+    @property
+    def hits(self):
+        """Number of lookups that returned an entry"""
+        return self.cache.hits
+
+    @property
+    def misses(self):
+        """Number of lookups that didn't return an entry"""
+        return self.cache.misses
+
+    @property
+    def evictions(self):
+        """Number of entries evicted to stay within the bounds"""
+        return self.cache.evictions
+
+    @property
+    def size(self):
+        """Total size of serialized values, if ``max_bytes`` is set"""
+        return self.cache.size
+
+    async def store(self, key, value):
+        self.cache.store(key, value)
+
+    async def store_many(self, mapping):
+        self.cache.store_many(mapping)
+
+    async def get(self, key, timeout=None):
+        return self.cache.get(key, timeout)
+
+    async def get_stale(self, key, timeout=None):
+        return self.cache.get_stale(key, timeout)
+
+    async def get_many(self, keys, timeout=None):
+        return self.cache.get_many(keys, timeout)
+
+    async def delete(self, key):
+        self.cache.delete(key)
+
+    async def delete_many(self, keys):
+        self.cache.delete_many(keys)
+
+    async def count(self):
+        return self.cache.count()
+
+    async def cleanup(self):
+        self.cache.cleanup()
+
+    async def flush(self):
+        self.cache.flush()
+
+
+class AsyncCacheAdapter(AsyncCache):
+    """AsyncCacheAdapter(cache, executor=None)
+
+    Adapter that runs the methods of a synchronous :class:`~tweepy.Cache`,
+    e.g. :class:`~tweepy.RedisCache`, in an executor, so that its I/O doesn't
+    block the event loop
+
+    :class:`AsyncClient` wraps synchronous caches that it's passed with this.
+
+    .. versionadded:: 4.16
+
+    Parameters
+    ----------
+    cache : Cache
+        The synchronous cache
+    executor : concurrent.futures.Executor | None
+        The executor to run the cache's methods in, or ``None`` to use the
+        event loop's default executor
+    """
+
+    def __init__(self, cache, executor=None):
+        AsyncCache.__init__(self)
+        self.cache = cache
+        self.executor = executor
+
+    @property
+    def stale_while_revalidate(self):
+        return self.cache.stale_while_revalidate
+
+    @property
+    def max_refreshes(self):
+        return self.cache.max_refreshes
+
+    async def _run(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(function, *args)
+        )
+
+    async def store(self, key, value):
+        await self._run(self.cache.store, key, value)
+
+    async def get(self, key, timeout=None):
+        return await self._run(self.cache.get, key, timeout)
+
+    async def get_stale(self, key, timeout=None):
+        return await self._run(self.cache.get_stale, key, timeout)
+
+    async def get_many(self, keys, timeout=None):
+        return await self._run(self.cache.get_many, list(keys), timeout)
+
+    async def store_many(self, mapping):
+        await self._run(self.cache.store_many, mapping)
+
+    async def delete(self, key):
+        await self._run(self.cache.delete, key)
+
+    async def delete_many(self, keys):
+        await self._run(self.cache.delete_many, list(keys))
+
+    async def count(self):
+        return await self._run(self.cache.count)
+
+    async def cleanup(self):
+        await self._run(self.cache.cleanup)
+
+    async def flush(self):
+        await self._run(self.cache.flush)
+
+    def begin_refresh(self, key):
+        return self.cache.begin_refresh(key)
+
+    def end_refresh(self, key):
+        self.cache.end_refresh(key)
@@ -2,24 +2,22 @@
 # Copyright 2009-2023 Joshua Roesslein
 # See LICENSE for details.
 
-try:
-    from functools import cache
-except ImportError:  # Remove when support for Python 3.8 is dropped
-    from functools import lru_cache
-    cache = lru_cache(maxsize=None)
-
 import asyncio
+import copy
+import heapq
 import logging
+import mimetypes
+import os
 from platform import python_version
 import time
 
 import aiohttp
-from async_lru import alru_cache
-from oauthlib.oauth1 import Client as OAuthClient
 from yarl import URL
 
 import tweepy
-from tweepy.client import BaseClient, Response
+from tweepy.asynchronous.cache import AsyncCache, AsyncCacheAdapter
+from tweepy.auth import BearerTokenPool, OAuth2UserTokenProvider
+from tweepy.client import _identity_cache, BaseClient, Response
 from tweepy.direct_message_event import DirectMessageEvent
 from tweepy.errors import (
     BadRequest, Forbidden, HTTPException, NotFound, TooManyRequests,
@@ -29,18 +27,29 @@ from tweepy.list import List
 from tweepy.space import Space
 from tweepy.tweet import Tweet
 from tweepy.user import User
-
-async_cache = alru_cache(maxsize=None)
+from tweepy.utils import AsyncSingleFlight, list_to_csv, OAuth1Signer
 
 log = logging.getLogger(__name__)
 
 
+def _is_processing(media):
+    # Whether Twitter's API is still processing uploaded media
+    processing_info = media.get("processing_info")
+    return processing_info is not None and (
+        processing_info["state"] in ("pending", "in_progress") and
+        "error" not in processing_info
+    )
+
+
 class AsyncBaseClient(BaseClient):
 
     def __init__(
         self, bearer_token=None, consumer_key=None, consumer_secret=None,
         access_token=None, access_token_secret=None, *, return_type=Response,
-        wait_on_rate_limit=False
+        wait_on_rate_limit=False, cache=None, cache_ttls=None,
+        coalesce_requests=False, entity_cache=None, identity_cache=None,
+        max_connections=100, max_connections_per_host=0, dns_cache_ttl=300,
+        keepalive_timeout=30
     ):
         self.bearer_token = bearer_token
         self.consumer_key = consumer_key
@@ -51,42 +60,147 @@ class AsyncBaseClient(BaseClient):
         self.return_type = return_type
         self.wait_on_rate_limit = wait_on_rate_limit
 
+        self.cache = cache
+        self.cache_ttls = cache_ttls or {}
+
+        self.coalesce_requests = coalesce_requests
+
+        self.entity_cache = entity_cache
+        self._in_flight = AsyncSingleFlight()
+        self._refresh_tasks = set()
+
+        if identity_cache is None:
+            identity_cache = _identity_cache
+        self.identity_cache = identity_cache
+
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+
+        self._oauth_1_signer = None
+
         self.session = None
+        self._session = None
+        self._session_loop = None
         self.user_agent = (
             f"Python/{python_version()} "
             f"aiohttp/{aiohttp.__version__} "
             f"Tweepy/{tweepy.__version__}"
         )
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def cache(self):
+        return self._cache
+
+    @cache.setter
+    def cache(self, cache):
+        # Synchronous caches are run in an executor, so that they don't block
+        # the event loop
+        if cache is not None and not isinstance(cache, AsyncCache):
+            cache = AsyncCacheAdapter(cache)
+        self._cache = cache
+
+    @property
+    def identity_cache(self):
+        return self._identity_cache
+
+    @identity_cache.setter
+    def identity_cache(self, identity_cache):
+        if not isinstance(identity_cache, AsyncCache):
+            identity_cache = AsyncCacheAdapter(identity_cache)
+        self._identity_cache = identity_cache
+
+    def _get_session(self):
+        if self.session is not None:
+            return self.session
+
+        # Sessions are bound to the event loop they're created in, so a new
+        # one is needed if the client is used from another event loop
+        loop = asyncio.get_running_loop()
+        if (
+            self._session is None or self._session.closed or
+            self._session_loop is not loop
+        ):
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    limit_per_host=self.max_connections_per_host,
+                    ttl_dns_cache=self.dns_cache_ttl,
+                    keepalive_timeout=self.keepalive_timeout
+                )
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        """|coroutine|
+
+        Close the client session that the client created to make requests
+        with, if there is one. This should be called before the client is
+        discarded. This doesn't close ``session``, if it was set.
+
+        .. versionadded:: 4.16
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._session_loop = None
+
+    def _get_oauth_1_signer(self):
+        # Reuse the signer, and its HMAC key, until the credentials change
+        credentials = (
+            self.consumer_key, self.consumer_secret,
+            self.access_token, self.access_token_secret
+        )
+        signer = self._oauth_1_signer
+        if signer is None or signer.credentials != credentials:
+            signer = self._oauth_1_signer = OAuth1Signer(*credentials)
+        return signer
+
     async def request(
-        self, method, route, params=None, json=None, user_auth=False
+        self, method, route, params=None, json=None, user_auth=False, *,
+        data=None, upload_api=False, _tried_tokens=()
     ):
-        session = self.session or aiohttp.ClientSession()
-        url = "https://api.twitter.com" + route
+        session = self._get_session()
+        if upload_api:
+            url = "https://upload.twitter.com" + route
+        else:
+            url = "https://api.twitter.com" + route
         headers = {"User-Agent": self.user_agent}
         if json is not None:
             headers["Content-Type"] = "application/json"
 
+        pool = None
         if user_auth:
-            oauth_client = OAuthClient(
-                self.consumer_key, self.consumer_secret,
-                self.access_token, self.access_token_secret
-            )
-            url = str(URL(url).with_query(sorted(params.items())))
-            url, headers, body = oauth_client.sign(
-                url, method, headers=headers
-            )
-            # oauthlib.oauth1.Client (OAuthClient) expects colons in query
-            # values (e.g. in timestamps) to be percent-encoded, while
-            # aiohttp.ClientSession does not automatically encode them
-            before_query, question_mark, query = url.partition('?')
-            url = URL(
-                f"{before_query}?{query.replace(':', '%3A')}",
-                encoded = True
+            # The query string is fully percent-encoded when signing, so
+            # aiohttp.ClientSession doesn't need to encode it again
+            url, headers["Authorization"] = self._get_oauth_1_signer().sign(
+                method, url, params
             )
+            url = URL(url, encoded=True)
             params = None
         else:
-            headers["Authorization"] = f"Bearer {self.bearer_token}"
+            bearer_token = self.bearer_token
+            if isinstance(bearer_token, BearerTokenPool):
+                pool = bearer_token
+                endpoint = pool.endpoint(method, route)
+                bearer_token = pool.acquire(endpoint, exclude=_tried_tokens)
+            elif isinstance(bearer_token, OAuth2UserTokenProvider):
+                if bearer_token.needs_refresh():
+                    # Refresh the token in an executor, so that the request
+                    # for it doesn't block the event loop
+                    bearer_token = await asyncio.get_running_loop(
+                    ).run_in_executor(None, bearer_token.get_token)
+                else:
+                    bearer_token = bearer_token.access_token
+            headers["Authorization"] = f"Bearer {bearer_token}"
 
         log.debug(
             f"Making API request: {method} {url}\n"
@@ -96,7 +210,7 @@ class AsyncBaseClient(BaseClient):
         )
 
         async with session.request(
-            method, url, params=params, json=json, headers=headers
+            method, url, params=params, json=json, data=data, headers=headers
         ) as response:
             await response.read()
 
@@ -105,8 +219,11 @@ class AsyncBaseClient(BaseClient):
             f"Headers: {response.headers}"
         )
 
-        if self.session is None:
-            await session.close()
+        if pool is not None:
+            pool.update(
+                bearer_token, endpoint, response.headers,
+                rate_limited=response.status == 429
+            )
 
         if not 200 <= response.status < 300:
             response_json = await response.json()
@@ -122,7 +239,21 @@ class AsyncBaseClient(BaseClient):
             reset_time = None
             if "x-rate-limit-reset" in response.headers:
                 reset_time = int(response.headers["x-rate-limit-reset"])
-            
+
+            if pool is not None:
+                # Each other token is only tried once for a request
+                tried_tokens = (*_tried_tokens, bearer_token)
+                if pool.available(endpoint, exclude=tried_tokens):
+                    log.warning(
+                        "Rate limit exceeded. "
+                        "Retrying with another Bearer Token."
+                    )
+                    return await self.request(
+                        method, route, params, json, user_auth, data=data,
+                        upload_api=upload_api, _tried_tokens=tried_tokens
+                    )
+                reset_time = pool.reset_time(endpoint) or reset_time
+
             if self.wait_on_rate_limit:
                 if reset_time is not None:
                     sleep_time = reset_time - int(time.time()) + 1
@@ -132,7 +263,10 @@ class AsyncBaseClient(BaseClient):
                             f"Sleeping for {sleep_time} seconds."
                         )
                         await asyncio.sleep(sleep_time)
-                return await self.request(method, route, params, json, user_auth)
+                return await self.request(
+                    method, route, params, json, user_auth, data=data,
+                    upload_api=upload_api
+                )
             else:
                 raise TooManyRequests(response, response_json=response_json, reset_time=reset_time)
         if response.status >= 500:
@@ -142,35 +276,149 @@ class AsyncBaseClient(BaseClient):
 
         return response
 
+    async def _fetch(self, method, route, params, json, user_auth, cache_key):
+        response = await self.request(method, route, params=params, json=json,
+                                      user_auth=user_auth)
+
+        if self.return_type is aiohttp.ClientResponse:
+            return response
+
+        response = await response.json()
+
+        if cache_key is not None:
+            # Caches can store values by reference, so a copy is stored, that
+            # isn't changed if the response is
+            await self.cache.store(cache_key, copy.deepcopy(response))
+
+        return response
+
+    async def _refresh(self, method, route, params, json, user_auth,
+                       cache_key):
+        try:
+            await self._fetch(method, route, params, json, user_auth,
+                              cache_key)
+        except Exception:
+            log.exception("Failed to refresh cache entry: %s", cache_key)
+        finally:
+            self.cache.end_refresh(cache_key)
+
     async def _make_request(
         self, method, route, params={}, endpoint_parameters=(), json=None,
         data_type=None, user_auth=False
     ):
         request_params = self._process_params(params, endpoint_parameters)
 
-        response = await self.request(method, route, params=request_params,
-                                      json=json, user_auth=user_auth)
-
-        if self.return_type is aiohttp.ClientResponse:
-            return response
+        # Only decoded JSON of GET requests is cached
+        cache_key = None
+        if (
+            self.cache is not None and method == "GET" and
+            self.return_type is not aiohttp.ClientResponse
+        ):
+            cache_key = self._get_cache_key(
+                method, route, request_params, user_auth
+            )
+            response, stale = await self.cache.get_stale(
+                cache_key, timeout=self._get_cache_timeout(route)
+            )
+            if response is not None:
+                if stale and self.cache.begin_refresh(cache_key):
+                    # Serve the stale response while it's refreshed
+                    task = asyncio.create_task(self._refresh(
+                        method, route, request_params, json, user_auth,
+                        cache_key
+                    ))
+                    self._refresh_tasks.add(task)
+                    task.add_done_callback(self._refresh_tasks.discard)
+                # Caches can return values by reference, so the response is
+                # copied, so that changes to it don't change the cache
+                response = copy.deepcopy(response)
+                if self.return_type is dict:
+                    return response
+                return self._construct_response(response, data_type=data_type)
+
+        if (
+            self.coalesce_requests and method == "GET" and
+            self.return_type is not aiohttp.ClientResponse
+        ):
+            # Concurrent identical requests share a single request
+            response = await self._in_flight.do(
+                cache_key or self._get_cache_key(
+                    method, route, request_params, user_auth
+                ),
+                self._fetch, method, route, request_params, json, user_auth,
+                cache_key
+            )
+        else:
+            response = await self._fetch(
+                method, route, request_params, json, user_auth, cache_key
+            )
 
-        response = await response.json()
+        if self.entity_cache is not None and isinstance(response, dict):
+            self.entity_cache.add_response(
+                response, request_params, self._entity_kinds.get(data_type),
+                scope=self._get_auth_hash(user_auth)
+            )
 
-        if self.return_type is dict:
+        if self.return_type in (dict, aiohttp.ClientResponse):
             return response
 
         return self._construct_response(response, data_type=data_type)
 
+    async def _get_entities(
+        self, kind, route, ids, params, endpoint_parameters, data_type,
+        user_auth
+    ):
+        lookup = self._get_cached_entities(kind, ids, params, user_auth)
+        if lookup is None:
+            params["ids"] = ids
+            return await self._make_request(
+                "GET", route, params=params,
+                endpoint_parameters=endpoint_parameters, data_type=data_type,
+                user_auth=user_auth
+            )
+
+        # Only request the entities that aren't cached
+        ids, cached, missing = lookup
+        response = {}
+        if missing:
+            params["ids"] = missing
+            request_params = self._process_params(params, endpoint_parameters)
+            response = await self._fetch(
+                "GET", route, request_params, None, user_auth, None
+            )
+            self.entity_cache.add_response(
+                response, request_params, kind,
+                scope=self._get_auth_hash(user_auth)
+            )
+        return self._merge_entities(ids, cached, response, data_type)
+
 
 class AsyncClient(AsyncBaseClient):
     """AsyncClient( \
         bearer_token=None, consumer_key=None, consumer_secret=None, \
         access_token=None, access_token_secret=None, *, return_type=Response, \
-        wait_on_rate_limit=False \
+        wait_on_rate_limit=False, cache=None, cache_ttls=None, \
+        coalesce_requests=False, entity_cache=None, max_connections=100, \
+        max_connections_per_host=0, dns_cache_ttl=300, keepalive_timeout=30 \
     )
 
     Asynchronous Twitter API v2 Client
 
+    Unless ``session`` is set, the client creates a client session the first
+    time it makes a request, and reuses its connections for later requests.
+    The client can be used as an asynchronous context manager, to close that
+    session when exiting, or it can be closed with :meth:`close`.
+
+    .. note::
+
+        The client must be closed, with :meth:`close` or by exiting it as an
+        asynchronous context manager, before it's discarded or its event loop
+        is closed. Otherwise, aiohttp warns about an unclosed client session
+        and connector, and their connections are only released when they're
+        garbage collected. Closing the client is also needed before using it
+        from another event loop, as its session is replaced, and the previous
+        one can only be closed from the loop that it was created in.
+
     .. versionadded:: 4.10
 
     .. versionchanged:: 4.15
@@ -179,8 +427,14 @@ class AsyncClient(AsyncBaseClient):
 
     Parameters
     ----------
-    bearer_token : str | None
-        Twitter API OAuth 2.0 Bearer Token / Access Token
+    bearer_token : str | BearerTokenPool | OAuth2UserTokenProvider | None
+        Twitter API OAuth 2.0 Bearer Token / Access Token, a pool of Bearer
+        Tokens to spread requests across, or a provider of Access Tokens that
+        refreshes them before they expire
+
+        .. versionchanged:: 4.16
+            Added support for :class:`~tweepy.BearerTokenPool` and
+            :class:`~tweepy.OAuth2UserTokenProvider`
     consumer_key : str | None
         Twitter API OAuth 1.0a Consumer Key
     consumer_secret : str | None
@@ -193,11 +447,78 @@ class AsyncClient(AsyncBaseClient):
         Type to return from requests to the API
     wait_on_rate_limit : bool
         Whether to wait when rate limit is reached
+    cache : AsyncCache | Cache | None
+        The cache to query and store the decoded JSON of responses to GET
+        requests in, keyed by route, parameters, and credentials. If the
+        cache has a ``stale_while_revalidate`` period, expired responses are
+        returned within it while they're refreshed in the background.
+        Synchronous caches are wrapped with :class:`AsyncCacheAdapter`, to
+        run them in an executor. This isn't used when ``return_type`` is
+        :class:`aiohttp.ClientResponse`.
+
+        .. versionadded:: 4.16
+    cache_ttls : dict[str, float] | None
+        Number of seconds to keep cached responses for, for routes matching
+        each pattern, e.g. ``{"/2/users/*": 300}``, overriding the timeout of
+        ``cache``. The first pattern that matches is used. TTLs longer than
+        the timeout of ``cache`` may not be respected by it.
+
+        .. versionadded:: 4.16
+    coalesce_requests : bool
+        Whether concurrent identical GET requests from multiple tasks should
+        share a single request to the API and its result. This isn't used when
+        ``return_type`` is :class:`aiohttp.ClientResponse`.
+
+        .. versionadded:: 4.16
+    entity_cache : EntityCache | None
+        Store of the Tweets, users, and media in responses, keyed by ID, that
+        :meth:`get_tweets` and :meth:`get_users` with ``ids`` and without
+        ``expansions`` return cached Tweets and users from, only requesting
+        the ones that aren't cached or whose requested fields aren't fresh.
+        Entities are kept separately for each set of credentials, so it can
+        be shared by clients with different credentials. This isn't used
+        when ``return_type`` is :class:`aiohttp.ClientResponse`.
+
+        .. versionadded:: 4.16
+    identity_cache : Cache | AsyncCache | None
+        Store of the IDs of the users authenticated with OAuth 2.0
+        Authorization Code Flow with PKCE access tokens, keyed by a hash of
+        the access token, e.g. a :class:`SQLiteCache` to persist them between
+        processes. Synchronous caches are run in an executor. By default, a
+        bounded :class:`MemoryCache` that expires IDs after a day is shared by
+        every :class:`Client` and :class:`AsyncClient`.
+
+        .. versionadded:: 4.16
+    max_connections : int
+        Maximum number of simultaneous connections to the API, or 0 for no
+        limit
+
+        .. versionadded:: 4.16
+    max_connections_per_host : int
+        Maximum number of simultaneous connections to the same host, or 0 for
+        no limit
+
+        .. versionadded:: 4.16
+    dns_cache_ttl : float | None
+        Number of seconds to cache resolved DNS addresses for, or ``None`` to
+        cache them forever
+
+        .. versionadded:: 4.16
+    keepalive_timeout : float
+        Number of seconds to keep idle connections open for reuse
+
+        .. versionadded:: 4.16
 
     Attributes
     ----------
-    session : aiohttp.ClientSession
-        Aiohttp client session used to make requests to the API
+    session : aiohttp.ClientSession | None
+        Aiohttp client session used to make requests to the API, instead of
+        the one the client creates, if it's set. This isn't closed by the
+        client.
+
+        .. versionchanged:: 4.16
+            The client reuses a single client session of its own when this
+            isn't set, rather than creating one for each request
     user_agent : str
         User agent used when making requests to the API
     """
@@ -223,22 +544,29 @@ class AsyncClient(AsyncBaseClient):
                     self.bearer_token
                 )
 
-    @cache
     def _get_oauth_1_authenticating_user_id(self, access_token):
         return access_token.partition('-')[0]
 
-    @async_cache
     async def _get_oauth_2_authenticating_user_id(self, access_token):
-        original_access_token = self.bearer_token
-        original_return_type = self.return_type
-
-        self.bearer_token = access_token
-        self.return_type = dict
-        user_id = (await self.get_me(user_auth=False))["data"]["id"]
-
-        self.bearer_token = original_access_token
-        self.return_type = original_return_type
+        if (
+            isinstance(access_token, OAuth2UserTokenProvider) and
+            access_token.user_id is not None
+        ):
+            return str(access_token.user_id)
+        cache_key = self._get_identity_cache_key(access_token)
+        user_id = await self.identity_cache.get(cache_key)
+        if user_id is None:
+            user_id = await self._in_flight.do(
+                cache_key, self._fetch_authenticating_user_id, cache_key
+            )
+        return user_id
 
+    async def _fetch_authenticating_user_id(self, cache_key):
+        # Request the ID directly, rather than through get_me, so that
+        # bearer_token and return_type don't have to be swapped out
+        response = await self.request("GET", "/2/users/me")
+        user_id = (await response.json())["data"]["id"]
+        await self.identity_cache.store(cache_key, user_id)
         return user_id
 
     # Bookmarks
@@ -1716,13 +2044,11 @@ class AsyncClient(AsyncBaseClient):
         ----------
         https://developer.twitter.com/en/docs/twitter-api/tweets/lookup/api-reference/get-tweets
         """
-        params["ids"] = ids
-        return await self._make_request(
-            "GET", "/2/tweets", params=params,
-            endpoint_parameters=(
+        return await self._get_entities(
+            "tweet", "/2/tweets", ids, params, (
                 "ids", "expansions", "media.fields", "place.fields",
                 "poll.fields", "tweet.fields", "user.fields"
-            ), data_type=Tweet, user_auth=user_auth
+            ), Tweet, user_auth
         )
 
     # Blocks
@@ -2230,9 +2556,15 @@ class AsyncClient(AsyncBaseClient):
             raise TypeError("Expected IDs or usernames, not both")
 
         route = "/2/users"
+        endpoint_parameters = (
+            "ids", "usernames", "expansions", "tweet.fields", "user.fields"
+        )
 
         if ids is not None:
-            params["ids"] = ids
+            return await self._get_entities(
+                "user", route, ids, params, endpoint_parameters, User,
+                user_auth
+            )
         elif usernames is not None:
             route += "/by"
             params["usernames"] = usernames
@@ -2241,9 +2573,8 @@ class AsyncClient(AsyncBaseClient):
 
         return await self._make_request(
             "GET", route, params=params,
-            endpoint_parameters=(
-                "ids", "usernames", "expansions", "tweet.fields", "user.fields"
-            ), data_type=User, user_auth=user_auth
+            endpoint_parameters=endpoint_parameters, data_type=User,
+            user_auth=user_auth
         )
 
     async def get_me(self, *, user_auth=True, **params):
@@ -3519,3 +3850,263 @@ class AsyncClient(AsyncBaseClient):
         return await self._make_request(
             "POST", "/2/compliance/jobs", json=json
         )
+
+    # Media upload
+
+    async def media_upload(
+        self, filename, *, file=None, media_type=None, media_category=None,
+        additional_owners=None, chunk_size=1024 * 1024, concurrency=1,
+        segment_retries=2, wait_for_async_finalize=True
+    ):
+        """Uploads media with the chunked Twitter API v1.1 media upload
+        endpoints, for use with :meth:`create_tweet`'s ``media_ids``.
+
+        Segments are read in the event loop's default executor and appended
+        with multipart requests, with up to ``concurrency`` at once, and the
+        upload is only finalized once every segment has been appended. If the
+        media is processed asynchronously and ``wait_for_async_finalize`` is
+        set, its status is then polled until processing finishes, sleeping
+        without blocking the event loop.
+
+        This uses OAuth 1.0a User Context to authenticate.
+
+        .. versionadded:: 4.16
+
+        Parameters
+        ----------
+        filename : str
+            The filename of the media to upload. This is used to open the file
+            if ``file`` isn't specified, and to guess ``media_type``.
+        file : io.BufferedIOBase | None
+            A seekable binary file-like object to upload the media from,
+            instead of opening ``filename``. It isn't closed afterward.
+        media_type : str | None
+            The MIME type of the media, guessed from ``filename`` by default
+        media_category : str | None
+            The category that represents how the media will be used, e.g.
+            ``tweet_video``, which is required for videos longer than 30
+            seconds
+        additional_owners : list[int | str] | None
+            A list of user IDs to set as additional owners allowed to use the
+            media
+        chunk_size : int
+            The size of each segment in bytes, which is limited to 5 MiB and
+            raised, if necessary, to keep the upload to 1000 segments
+        concurrency : int
+            The number of segments to append at once
+        segment_retries : int
+            The number of times to retry appending a segment, if the request
+            fails to send or Twitter's API returns a server error
+        wait_for_async_finalize : bool
+            Whether to wait for Twitter's API to finish processing the media
+
+        Returns
+        -------
+        dict
+            The decoded JSON of the response to the FINALIZE command, or of
+            the last processing status, including ``media_id_string``
+
+        References
+        ----------
+        https://developer.twitter.com/en/docs/twitter-api/v1/media/upload-media/uploading-media/chunked-media-upload
+        """
+        loop = asyncio.get_running_loop()
+        if media_type is None:
+            media_type = mimetypes.guess_type(filename)[0]
+
+        if file is None:
+            fp = await loop.run_in_executor(None, open, filename, "rb")
+        else:
+            fp = file
+
+        try:
+            start = fp.tell()
+            file_size = fp.seek(0, 2) - start  # Seek to end of file
+            fp.seek(start)
+
+            min_chunk_size, remainder = divmod(file_size, 1000)
+            min_chunk_size += bool(remainder)
+            # Max chunk size is 5 MiB
+            chunk_size = max(min(chunk_size, 5 * 1024 * 1024), min_chunk_size)
+            segments, remainder = divmod(file_size, chunk_size)
+            segments += bool(remainder)
+
+            params = {
+                "command": "INIT",
+                "total_bytes": file_size,
+                "media_type": media_type
+            }
+            if media_category is not None:
+                params["media_category"] = media_category
+            if additional_owners is not None:
+                params["additional_owners"] = list_to_csv(additional_owners)
+            media = await self._media_upload_request("POST", params)
+            media_id = media["media_id_string"]
+
+            read_lock = asyncio.Lock()
+            slots = asyncio.Semaphore(concurrency)
+
+            def read_segment(segment_index):
+                fp.seek(start + segment_index * chunk_size)
+                return fp.read(chunk_size)
+
+            async def append_segment(segment_index):
+                async with slots:
+                    async with read_lock:
+                        segment = await loop.run_in_executor(
+                            None, read_segment, segment_index
+                        )
+                    for retry in range(segment_retries + 1):
+                        data = aiohttp.FormData()
+                        data.add_field(
+                            "media", segment,
+                            filename=os.path.basename(filename),
+                            content_type="application/octet-stream"
+                        )
+                        try:
+                            # The APPEND command returns an empty response
+                            # body
+                            await self.request(
+                                "POST", "/1.1/media/upload.json", params={
+                                    "command": "APPEND",
+                                    "media_id": media_id,
+                                    "segment_index": segment_index
+                                }, data=data, user_auth=True, upload_api=True
+                            )
+                            return
+                        except (
+                            aiohttp.ClientError, asyncio.TimeoutError,
+                            TwitterServerError
+                        ) as e:
+                            if retry == segment_retries:
+                                raise
+                            log.warning(
+                                f"Failed to append segment {segment_index} "
+                                f"of media {media_id}, retrying: {e}"
+                            )
+                            await asyncio.sleep(2 ** retry)
+
+            tasks = [
+                asyncio.create_task(append_segment(segment_index))
+                for segment_index in range(segments)
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+        finally:
+            if file is None:
+                await loop.run_in_executor(None, fp.close)
+
+        media = await self._media_upload_request(
+            "POST", {"command": "FINALIZE", "media_id": media_id}
+        )
+
+        if wait_for_async_finalize and _is_processing(media):
+            async for media in self.wait_for_media_processing([media]):
+                pass
+
+        return media
+
+    async def get_media_upload_status(self, media_id):
+        """Checks the processing status of media uploaded with
+        :meth:`media_upload`.
+
+        This uses OAuth 1.0a User Context to authenticate.
+
+        .. versionadded:: 4.16
+
+        Parameters
+        ----------
+        media_id : int | str
+            The ID of the media
+
+        Returns
+        -------
+        dict
+            The decoded JSON of the response, including ``processing_info``
+
+        References
+        ----------
+        https://developer.twitter.com/en/docs/twitter-api/v1/media/upload-media/api-reference/get-media-upload-status
+        """
+        return await self._media_upload_request(
+            "GET", {"command": "STATUS", "media_id": media_id}
+        )
+
+    async def wait_for_media_processing(self, media):
+        """Waits for Twitter's API to finish processing multiple uploaded
+        media at once, yielding each media as its processing succeeds or
+        fails.
+
+        The processing status of every media is tracked together, sleeping
+        only until the earliest ``check_after_secs`` of the media still being
+        processed, and then checking on all of the media that are due
+        concurrently, with :meth:`get_media_upload_status`.
+
+        This is an asynchronous generator.
+
+        .. versionadded:: 4.16
+
+        Parameters
+        ----------
+        media : Iterable[int | str | dict]
+            Media IDs, or the decoded JSON of media, e.g. returned by
+            :meth:`media_upload` with ``wait_for_async_finalize`` set to
+            ``False``, whose ``processing_info`` is used to check on them
+
+        Yields
+        ------
+        dict
+            The decoded JSON of each media, once its ``processing_info``
+            state is ``succeeded`` or ``failed``, or it has no
+            ``processing_info``, in the order that their processing finishes
+        """
+        loop = asyncio.get_running_loop()
+        # Heap of the next time to check on each media that's still being
+        # processed, ordered by that time
+        checks = []
+        for index, item in enumerate(media):
+            if isinstance(item, dict):
+                if not _is_processing(item):
+                    yield item
+                    continue
+                check_time = (
+                    loop.time() + item["processing_info"]["check_after_secs"]
+                )
+                media_id = item["media_id_string"]
+            else:
+                check_time = loop.time()
+                media_id = item
+            # The index breaks ties, so that media IDs aren't compared
+            heapq.heappush(checks, (check_time, index, media_id))
+
+        while checks:
+            await asyncio.sleep(max(checks[0][0] - loop.time(), 0))
+            now = loop.time()
+            due = []
+            while checks and checks[0][0] <= now:
+                due.append(heapq.heappop(checks))
+            statuses = await asyncio.gather(*(
+                self.get_media_upload_status(media_id)
+                for check_time, index, media_id in due
+            ))
+            for (check_time, index, media_id), item in zip(due, statuses):
+                if _is_processing(item):
+                    heapq.heappush(checks, (
+                        loop.time() +
+                        item["processing_info"]["check_after_secs"],
+                        index, media_id
+                    ))
+                else:
+                    yield item
+
+    async def _media_upload_request(self, method, params):
+        response = await self.request(
+            method, "/1.1/media/upload.json", params=params, user_auth=True,
+            upload_api=True
+        )
+        return await response.json()
@@ -7,6 +7,7 @@ import json
 import logging
 from math import inf
 from platform import python_version
+import time
 import traceback
 
 import aiohttp
@@ -15,7 +16,7 @@ import tweepy
 from tweepy.asynchronous.client import AsyncBaseClient
 from tweepy.client import Response
 from tweepy.errors import TweepyException
-from tweepy.streaming import StreamResponse, StreamRule
+from tweepy.streaming import StreamLine, StreamResponse, StreamRule
 from tweepy.tweet import Tweet
 
 log = logging.getLogger(__name__)
@@ -23,12 +24,22 @@ log = logging.getLogger(__name__)
 
 class AsyncBaseStream:
 
-    def __init__(self, *, max_retries=inf, proxy=None):
+    def __init__(self, *, max_retries=inf, proxy=None, concurrency=None,
+                 max_queue_size=1000, ordering_key=None):
+        if concurrency is not None and concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
         self.max_retries = max_retries
         self.proxy = proxy
+        self.concurrency = concurrency
+        self.max_queue_size = max_queue_size
+        self.ordering_key = ordering_key
 
         self.session = None
         self.task = None
+
+        self.max_queue_lag = 0
+        self.queue_lag = 0
+        self._queues = []
         self.user_agent = (
             f"Python/{python_version()} "
             f"aiohttp/{aiohttp.__version__} "
@@ -57,6 +68,31 @@ class AsyncBaseStream:
             )
         self.session.headers["User-Agent"] = self.user_agent
 
+        # When handling data concurrently, lines are put in bounded queues, so
+        # that reading the stream waits for the consumer tasks to catch up.
+        # With an ordering key, each consumer task has its own queue, so that
+        # lines with the same key are handled in order.
+        consumers = []
+        if self.concurrency is not None:
+            connect_task = asyncio.current_task()
+            if self.ordering_key is None:
+                self._queues = [asyncio.Queue(self.max_queue_size)]
+                consumers = [
+                    asyncio.create_task(
+                        self._consume(self._queues[0], connect_task)
+                    )
+                    for _ in range(self.concurrency)
+                ]
+            else:
+                self._queues = [
+                    asyncio.Queue(self.max_queue_size)
+                    for _ in range(self.concurrency)
+                ]
+                consumers = [
+                    asyncio.create_task(self._consume(queue, connect_task))
+                    for queue in self._queues
+                ]
+
         try:
             while error_count <= self.max_retries:
                 try:
@@ -77,11 +113,15 @@ class AsyncBaseStream:
 
                             async for line in resp.content:
                                 line = line.strip()
-                                if line:
-                                    await self.on_data(line)
-                                else:
+                                if not line:
                                     await self.on_keep_alive()
+                                elif self._queues:
+                                    await self._enqueue(line)
+                                else:
+                                    await self.on_data(line)
 
+                            for queue in self._queues:
+                                await queue.join()
                             await self.on_closed(resp)
                         else:
                             await self.on_request_error(resp.status)
@@ -131,9 +171,47 @@ class AsyncBaseStream:
         except Exception as e:
             await self.on_exception(e)
         finally:
+            for consumer in consumers:
+                consumer.cancel()
+            await asyncio.gather(*consumers, return_exceptions=True)
+            self._queues = []
             await self.session.close()
             await self.on_disconnect()
 
+    async def _enqueue(self, line):
+        if len(self._queues) == 1:
+            queue = self._queues[0]
+        else:
+            key = self.ordering_key(line)
+            queue = self._queues[hash(key) % len(self._queues)]
+        await queue.put((time.monotonic(), line))
+
+    async def _consume(self, queue, connect_task):
+        while True:
+            queued_at, line = await queue.get()
+            self.queue_lag = time.monotonic() - queued_at
+            if self.queue_lag > self.max_queue_lag:
+                self.max_queue_lag = self.queue_lag
+            try:
+                await self.on_data(line)
+            except Exception as e:
+                # Handle the exception and stop the stream, as if it had been
+                # raised while reading the stream
+                await self.on_exception(e)
+                connect_task.cancel()
+                return
+            finally:
+                queue.task_done()
+
+    @property
+    def queued(self):
+        """int: Number of lines of data waiting to be handled, when handling
+        data concurrently
+
+        .. versionadded:: 4.16
+        """
+        return sum(queue.qsize() for queue in self._queues)
+
     def disconnect(self):
         """Disconnect the stream"""
         if self.task is not None:
@@ -223,9 +301,64 @@ class AsyncStreamingClient(AsyncBaseClient, AsyncBaseStream):
         Number of times to attempt to (re)connect the stream.
     proxy : str | None
         URL of the proxy to use when connecting to the stream
+    concurrency : int | None
+        Number of tasks to handle data from the stream with concurrently,
+        which must be at least 1. If ``None``, each line of data is handled
+        before the next one is read.
+
+        .. versionadded:: 4.16
+    max_queue_size : int
+        Maximum number of lines of data to queue for each ordering key's tasks,
+        or for all tasks if ``ordering_key`` isn't provided, when
+        ``concurrency`` is set. Reading from the stream waits while the queue
+        is full.
+
+        .. versionadded:: 4.16
+    ordering_key : Callable[[bytes], Hashable] | None
+        Function that's passed each line of data and returns a key, e.g. a
+        ``conversation_id``, when ``concurrency`` is set. Lines with the same
+        key are handled in order, by the same task.
+
+        .. versionadded:: 4.16
+    deduplicator : StreamDeduplicator | None
+        Used to drop duplicate Tweets, e.g. from ``backfill_minutes``, before
+        they're passed to :meth:`on_data`'s handlers
+
+        .. versionadded:: 4.16
+    predicates : list[Callable[[StreamLine], bool]] | None
+        Functions that are passed a :class:`~tweepy.StreamLine` for each line
+        of data received with a Tweet and return whether it should be
+        dispatched. Lines that any of them return ``False`` for are dropped
+        before they're decoded. Lines without ``data``, e.g. errors, are
+        always dispatched.
+
+        .. versionadded:: 4.16
+    entity_cache : EntityCache | None
+        Store that the Tweets, users, and media received are added to, e.g.
+        to be shared with a :class:`~tweepy.Client`
+
+        .. versionadded:: 4.16
 
     Attributes
     ----------
+    queue_lag : float
+        Number of seconds the last line of data handled waited in the queue,
+        when ``concurrency`` is set
+
+        .. versionadded:: 4.16
+    max_queue_lag : float
+        Maximum number of seconds a line of data has waited in the queue, when
+        ``concurrency`` is set
+
+        .. versionadded:: 4.16
+    lines_dispatched : int
+        Number of lines of data that have been decoded and dispatched
+
+        .. versionadded:: 4.16
+    lines_filtered : int
+        Number of lines of data that have been dropped by ``predicates``
+
+        .. versionadded:: 4.16
     session : aiohttp.ClientSession | None
         Aiohttp client session used to connect to the API
     task : asyncio.Task | None
@@ -235,17 +368,29 @@ class AsyncStreamingClient(AsyncBaseClient, AsyncBaseStream):
     """
 
     def __init__(self, bearer_token, *, return_type=Response,
-                 wait_on_rate_limit=False, **kwargs):
+                 wait_on_rate_limit=False, deduplicator=None, predicates=None,
+                 entity_cache=None, **kwargs):
         """__init__( \
             bearer_token, *, return_type=Response, wait_on_rate_limit=False, \
-            max_retries=inf, proxy=None \
+            max_retries=inf, proxy=None, concurrency=None, \
+            max_queue_size=1000, ordering_key=None, deduplicator=None, \
+            predicates=None, \
+            entity_cache=None \
         )
         """
         AsyncBaseClient.__init__(self, bearer_token, return_type=return_type,
-                                 wait_on_rate_limit=wait_on_rate_limit)
+                                 wait_on_rate_limit=wait_on_rate_limit,
+                                 entity_cache=entity_cache)
         AsyncBaseStream.__init__(self, **kwargs)
+        self.deduplicator = deduplicator
+        self.predicates = list(predicates or ())
+        self._stream_params = {}
+
+        self.lines_dispatched = 0
+        self.lines_filtered = 0
 
     async def _connect(self, method, endpoint, **kwargs):
+        self._stream_params = kwargs.get("params") or {}
         url = f"https://api.twitter.com/2/tweets/{endpoint}/stream"
         headers = {"Authorization": f"Bearer {self.bearer_token}"}
         await super()._connect(method, url, headers=headers, **kwargs)
@@ -380,7 +525,8 @@ class AsyncStreamingClient(AsyncBaseClient, AsyncBaseStream):
             were disconnected for 90 seconds, and you requested two minutes of
             backfill, you will receive 30 seconds worth of duplicate Tweets.
             Due to this, you should make sure your system is tolerant of
-            duplicate data.
+            duplicate data, e.g. by using a
+            :class:`~tweepy.StreamDeduplicator`.
 
             This feature is currently only available to the Academic Research
             product track.
@@ -487,7 +633,8 @@ class AsyncStreamingClient(AsyncBaseClient, AsyncBaseStream):
             were disconnected for 90 seconds, and you requested two minutes of
             backfill, you will receive 30 seconds worth of duplicate Tweets.
             Due to this, you should make sure your system is tolerant of
-            duplicate data.
+            duplicate data, e.g. by using a
+            :class:`~tweepy.StreamDeduplicator`.
 
             This feature is currently only available to the Academic Research
             product track.
@@ -553,7 +700,28 @@ class AsyncStreamingClient(AsyncBaseClient, AsyncBaseStream):
         ----------
         https://developer.twitter.com/en/docs/twitter-api/tweets/filtered-stream/integrate/consuming-streaming-data
         """
+        if self.predicates:
+            # Only lines with Tweets are filtered, so that errors and other
+            # messages are always dispatched
+            line = StreamLine(raw_data)
+            if line.has_data and not all(
+                predicate(line) for predicate in self.predicates
+            ):
+                self.lines_filtered += 1
+                return
+        if (
+            self.deduplicator is not None and
+            self.deduplicator.is_duplicate(raw_data)
+        ):
+            return
+        self.lines_dispatched += 1
+
         data = json.loads(raw_data)
+        if self.entity_cache is not None:
+            self.entity_cache.add_response(
+                data, self._stream_params, "tweet",
+                scope=self._get_auth_hash(False)
+            )
 
         tweet = None
         includes = {}
@@ -3,6 +3,9 @@
 # See LICENSE for details.
 
 import logging
+import re
+import threading
+import time
 import warnings
 
 import requests
@@ -186,6 +189,158 @@ class OAuth2BearerHandler(AuthBase):
         return self
 
 
+class BearerTokenPool:
+    """BearerTokenPool(bearer_tokens)
+
+    Pool of OAuth 2.0 Bearer Tokens, e.g. of multiple apps, to pass as the
+    ``bearer_token`` of :class:`Client` or :class:`~asynchronous.AsyncClient`,
+    to spread requests across their rate limits
+
+    Each request uses the token with the most requests remaining for the
+    endpoint, according to the rate limit headers of previous responses.
+    Tokens that haven't been used for an endpoint, or whose rate limit window
+    has reset, are assumed to have requests remaining. If a request is rate
+    limited, it's retried with another token, if any have requests
+    remaining.
+
+    .. versionadded:: 4.16
+
+    Parameters
+    ----------
+    bearer_tokens : list[str]
+        Twitter API OAuth 2.0 Bearer Tokens
+    """
+
+    def __init__(self, bearer_tokens):
+        self.bearer_tokens = list(bearer_tokens)
+        if not self.bearer_tokens:
+            raise ValueError("BearerTokenPool needs at least one Bearer Token")
+
+        self._lock = threading.Lock()
+        # Rate limit (limit, remaining, reset time) of each token, by
+        # endpoint
+        self._limits = {}
+        self._requests = [0] * len(self.bearer_tokens)
+        self._rate_limited = [0] * len(self.bearer_tokens)
+
+    @staticmethod
+    def endpoint(method, route):
+        """Get the endpoint that a request is rate limited by, with IDs in
+        the route replaced by ``:id``
+        """
+        return f"{method} {re.sub(r'(?<=.)/[0-9]+(?=/|$)', '/:id', route)}"
+
+    def _remaining(self, endpoint, index, now):
+        limit = self._limits.get(endpoint, {}).get(index)
+        if limit is None or limit[2] <= now:
+            return float("inf")
+        return limit[1]
+
+    def acquire(self, endpoint, exclude=()):
+        """Get the token with the most requests remaining for an endpoint,
+        favoring tokens that have made fewer requests, other than the tokens
+        in ``exclude``, unless every token is excluded
+        """
+        with self._lock:
+            now = time.time()
+            indexes = [
+                index for index, bearer_token in enumerate(self.bearer_tokens)
+                if bearer_token not in exclude
+            ] or range(len(self.bearer_tokens))
+            index = max(
+                indexes,
+                key=lambda index: (
+                    self._remaining(endpoint, index, now),
+                    -self._requests[index]
+                )
+            )
+            self._requests[index] += 1
+            limit = self._limits.get(endpoint, {}).get(index)
+            if limit is not None and limit[2] > now and limit[1] > 0:
+                # Count the request against the token before its response,
+                # so that concurrent requests are spread across tokens
+                self._limits[endpoint][index] = (
+                    limit[0], limit[1] - 1, limit[2]
+                )
+            return self.bearer_tokens[index]
+
+    def update(self, bearer_token, endpoint, headers, rate_limited=False):
+        """Record the rate limit headers of a response to a request made with
+        a token, and whether the request was rate limited
+        """
+        index = self.bearer_tokens.index(bearer_token)
+        with self._lock:
+            if rate_limited:
+                self._rate_limited[index] += 1
+            if "x-rate-limit-reset" in headers:
+                reset_time = int(headers["x-rate-limit-reset"])
+            elif rate_limited:
+                reset_time = None
+            else:
+                return
+            if rate_limited:
+                # Avoid the token for this endpoint for at least a minute, in
+                # case its reset time is unknown or has already passed, e.g.
+                # due to clock skew
+                reset_time = max(reset_time or 0, int(time.time()) + 60)
+            limit = headers.get("x-rate-limit-limit")
+            remaining = headers.get("x-rate-limit-remaining")
+            self._limits.setdefault(endpoint, {})[index] = (
+                None if limit is None else int(limit),
+                0 if rate_limited or remaining is None else int(remaining),
+                reset_time
+            )
+
+    def available(self, endpoint, exclude=()):
+        """Whether any token, other than the tokens in ``exclude``, has
+        requests remaining for an endpoint
+        """
+        with self._lock:
+            now = time.time()
+            return any(
+                self._remaining(endpoint, index, now) > 0
+                for index, bearer_token in enumerate(self.bearer_tokens)
+                if bearer_token not in exclude
+            )
+
+    def reset_time(self, endpoint):
+        """Get the earliest time, in seconds since the epoch, that the rate
+        limit of a token for an endpoint resets, or ``None`` if it's unknown
+        """
+        with self._lock:
+            reset_times = [
+                reset_time
+                for limit, remaining, reset_time in
+                self._limits.get(endpoint, {}).values()
+            ]
+        return min(reset_times, default=None)
+
+    def utilization(self):
+        """Get the utilization of each token, in the order of
+        ``bearer_tokens``, as a list of dicts with the number of
+        ``requests`` made with it, the number of those that were
+        ``rate_limited``, and its last known rate limit for each endpoint in
+        ``endpoints``, as dicts with ``limit``, ``remaining``, and ``reset``
+        """
+        with self._lock:
+            utilization = [
+                {
+                    "requests": self._requests[index],
+                    "rate_limited": self._rate_limited[index],
+                    "endpoints": {}
+                }
+                for index in range(len(self.bearer_tokens))
+            ]
+            for endpoint, limits in self._limits.items():
+                for index, (limit, remaining, reset_time) in limits.items():
+                    utilization[index]["endpoints"][endpoint] = {
+                        "limit": limit,
+                        "remaining": remaining,
+                        "reset": reset_time
+                    }
+        return utilization
+
+
 class OAuth2UserHandler(OAuth2Session):
     """OAuth 2.0 Authorization Code Flow with PKCE (User Context)
     authentication handler
@@ -221,3 +376,120 @@ class OAuth2UserHandler(OAuth2Session):
             include_client_id=True,
             code_verifier=self._client.code_verifier
         )
+
+
+class OAuth2UserTokenProvider:
+    """OAuth2UserTokenProvider(oauth2_user_handler, token, *, \
+refresh_margin=300, token_updater=None, user_id=None)
+
+    Provider of OAuth 2.0 Authorization Code Flow with PKCE access tokens, to
+    pass as the ``bearer_token`` of :class:`Client` or
+    :class:`~asynchronous.AsyncClient`, that refreshes the access token
+    before it expires
+
+    The access token is refreshed with the refresh token when a request is
+    made within ``refresh_margin`` seconds of its expiry, so requests aren't
+    made with an expired token. Concurrent requests that need the token to be
+    refreshed share a single refresh.
+
+    Refresh tokens are only valid for a single refresh, so ``token_updater``
+    should be used to store each new token, if the token needs to be used
+    again later, e.g. by another process.
+
+    .. versionadded:: 4.16
+
+    Parameters
+    ----------
+    oauth2_user_handler : OAuth2UserHandler
+        Handler of the app that the token was fetched for, which is used to
+        refresh it
+    token : dict
+        Token returned by :meth:`OAuth2UserHandler.fetch_token`, which needs
+        to include ``refresh_token``, requiring the ``offline.access`` scope,
+        and ``expires_at``, to be refreshed
+    refresh_margin : float
+        Number of seconds before the access token expires to refresh it
+    token_updater : Callable[[dict], Any] | None
+        Function to call with each new token when it's refreshed
+    user_id : int | str | None
+        ID of the user that the token is for, if it's known, which is used
+        as the :attr:`identity` of the user, so that it's the same for
+        providers created with different tokens for the same user, e.g. in
+        another process, and the user's ID doesn't need to be requested
+
+    Attributes
+    ----------
+    token : dict
+        Current token
+    user_id : int | str | None
+        ID of the user that the token is for, if it was provided
+    """
+
+    def __init__(self, oauth2_user_handler, token, *, refresh_margin=300,
+                 token_updater=None, user_id=None):
+        self.oauth2_user_handler = oauth2_user_handler
+        self.token = token
+        self.refresh_margin = refresh_margin
+        self.token_updater = token_updater
+        self.user_id = user_id
+        self._initial_access_token = token["access_token"]
+
+        self._lock = threading.Lock()
+
+    @property
+    def access_token(self):
+        """The current access token, which may need to be refreshed"""
+        return self.token["access_token"]
+
+    @property
+    def identity(self):
+        """Identity of the user that the token is for, which doesn't change
+        when the access token is refreshed: the user's ID, if it was provided,
+        or otherwise the access token that the provider was created with
+        """
+        if self.user_id is not None:
+            return f"user:{self.user_id}"
+        return f"token:{self._initial_access_token}"
+
+    def needs_refresh(self):
+        """Whether the access token expires within ``refresh_margin``
+        seconds and can be refreshed
+        """
+        expires_at = self.token.get("expires_at")
+        return (
+            expires_at is not None and "refresh_token" in self.token and
+            time.time() >= expires_at - self.refresh_margin
+        )
+
+    def get_token(self):
+        """Get a valid access token, refreshing it first if it needs to be"""
+        if self.needs_refresh():
+            with self._lock:
+                # Check again, as another thread may have refreshed the token
+                # while this one was waiting for the lock
+                if self.needs_refresh():
+                    self._refresh()
+        return self.access_token
+
+    def refresh(self):
+        """Refresh the access token, regardless of when it expires, and
+        return the new token
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        log.debug("Refreshing OAuth 2.0 access token")
+        handler = self.oauth2_user_handler
+        try:
+            token = handler.refresh_token(
+                "https://api.twitter.com/2/oauth2/token",
+                refresh_token=self.token["refresh_token"], auth=handler.auth,
+                client_id=handler.client_id
+            )
+        except Exception as e:
+            raise TweepyException(e)
+        self.token = dict(token)
+        if self.token_updater is not None:
+            self.token_updater(self.token)
+        return self.token
@@ -2,13 +2,18 @@
 # Copyright 2009-2023 Joshua Roesslein
 # See LICENSE for details.
 
+from collections import defaultdict, namedtuple, OrderedDict
 import datetime
 import hashlib
+import json
 import logging
 import pickle
+import sqlite3
+import struct
 import threading
 import time
 import os
+import zlib
 
 try:
     import fcntl
@@ -17,17 +22,136 @@ except ImportError:
     # TODO: use win32file
     pass
 
+try:
+    from compression import zstd
+except ImportError:  # Remove when support for Python 3.13 is dropped
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
 log = logging.getLogger(__name__)
 
+# creation time of an entry, prefixed to its serialized value
+_CREATED = struct.Struct('!d')
+
+
+CachedPayload = namedtuple(
+    'CachedPayload',
+    ('payload', 'payload_type', 'payload_list', 'return_cursors')
+)
+CachedPayload.__doc__ = """Raw JSON payload of a response, stored in a cache
+instead of the models parsed from it, to be parsed again when retrieved
+"""
+
+
+class PickleSerializer:
+    """Serialize cached values with pickle"""
+
+    def dumps(self, value):
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data):
+        return pickle.loads(data)
+
+
+class JSONSerializer:
+    """Serialize cached values as JSON, optionally compressed
+
+    Only JSON-compatible values and CachedPayload can be serialized. API
+    stores the raw JSON payloads of responses, rather than model instances,
+    in caches using this, so entries don't depend on tweepy's classes.
+    """
+
+    _compressors = {b'-': None, b'z': 'zlib', b's': 'zstd'}
+
+    def __init__(self, compression=None, level=None):
+        """Initialize the serializer
+            compression: None, 'zlib', or 'zstd'
+            level: compression level [optional]
+        """
+        if compression not in self._compressors.values():
+            raise ValueError(f'Unknown compression: {compression}')
+        if compression == 'zstd' and zstd is None:
+            raise ImportError(
+                'zstd compression requires the zstandard package'
+            )
+        self.compression = compression
+        self.level = level
+
+    def dumps(self, value):
+        if isinstance(value, CachedPayload):
+            # keep the payload as is, rather than encoding it as a string
+            header = json.dumps(value[1:], separators=(',', ':'))
+            data = b'p' + header.encode() + b'\n' + value.payload.encode()
+        else:
+            data = b'j' + json.dumps(
+                value, ensure_ascii=False, separators=(',', ':')
+            ).encode()
+
+        if self.compression == 'zlib':
+            level = -1 if self.level is None else self.level
+            return b'z' + zlib.compress(data, level)
+        if self.compression == 'zstd':
+            level = 3 if self.level is None else self.level
+            return b's' + zstd.compress(data, level=level)
+        return b'-' + data
+
+    def loads(self, data):
+        # entries record their compression, so that they can be read even
+        # if it's changed
+        compression, data = data[:1], data[1:]
+        if compression == b'z':
+            data = zlib.decompress(data)
+        elif compression == b's':
+            if zstd is None:
+                raise ImportError(
+                    'zstd compression requires the zstandard package'
+                )
+            data = zstd.decompress(data)
+        elif compression != b'-':
+            raise ValueError('Unknown cache entry format')
+
+        kind, data = data[:1], data[1:]
+        if kind == b'p':
+            header, payload = data.split(b'\n', 1)
+            return CachedPayload(payload.decode(), *json.loads(header))
+        if kind == b'j':
+            return json.loads(data)
+        raise ValueError('Unknown cache entry format')
+
 
 class Cache:
     """Cache interface"""
 
-    def __init__(self, timeout=60):
+    # number of seconds past the timeout to keep serving an expired entry
+    # for, while it's refreshed in the background
+    stale_while_revalidate = 0
+    # maximum number of entries to refresh in the background at once
+    max_refreshes = 4
+    # serializer for backends that store values outside of the process
+    serializer = PickleSerializer()
+
+    def __init__(self, timeout=60, *, stale_while_revalidate=0,
+                 max_refreshes=4, serializer=None):
         """Initialize the cache
             timeout: number of seconds to keep a cached entry
+            stale_while_revalidate: number of seconds past the timeout to
+                serve an entry for while it's refreshed [optional]
+            max_refreshes: maximum number of concurrent refreshes [optional]
+            serializer: PickleSerializer (default) or JSONSerializer
         """
         self.timeout = timeout
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_refreshes = max_refreshes
+        if serializer is not None:
+            self.serializer = serializer
+        self._init_refreshes()
+
+    def _init_refreshes(self):
+        # keys of the entries being refreshed in the background
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
 
     def store(self, key, value):
         """Add new record to cache
@@ -43,6 +167,46 @@ class Cache:
         """
         raise NotImplementedError
 
+    def get_stale(self, key, timeout=None):
+        """Get cached entry if exists and not past the stale-while-revalidate
+        grace period, and whether it's expired and should be refreshed
+            key: which entry to get
+            timeout: override timeout with this value [optional]
+        """
+        return self.get(key, timeout), False
+
+    def get_many(self, keys, timeout=None):
+        """Get cached entries that exist and aren't expired, as a dict
+            keys: which entries to get
+            timeout: override timeout with this value [optional]
+        """
+        results = {}
+        for key in keys:
+            value = self.get(key, timeout)
+            if value is not None:
+                results[key] = value
+        return results
+
+    def store_many(self, mapping):
+        """Add new records to cache
+            mapping: dict of entry keys to data of entries
+        """
+        for key, value in mapping.items():
+            self.store(key, value)
+
+    def delete(self, key):
+        """Delete cached entry, if it exists
+            key: which entry to delete
+        """
+        raise NotImplementedError
+
+    def delete_many(self, keys):
+        """Delete cached entries, if they exist, one at a time by default
+            keys: which entries to delete
+        """
+        for key in keys:
+            self.delete(key)
+
     def count(self):
         """Get count of entries currently stored in cache"""
         raise NotImplementedError
@@ -55,41 +219,323 @@ class Cache:
         """Delete all cached entries"""
         raise NotImplementedError
 
+    def _dump_entry(self, value):
+        return _CREATED.pack(time.time()) + self.serializer.dumps(value)
 
-class MemoryCache(Cache):
-    """In-memory cache"""
+    def _load_entry(self, data):
+        # Returns the creation time and value of an entry, or None if it
+        # can't be read, e.g. if it was written in an older format
+        try:
+            created_time, = _CREATED.unpack_from(data)
+            return created_time, self.serializer.loads(data[_CREATED.size:])
+        except Exception as e:
+            log.debug('Unable to read cache entry: %s', e)
+            return None
+
+    def _load_value(self, data):
+        # Returns the value of an entry, or None if it can't be read, e.g. if
+        # it was written in an older format
+        try:
+            return self.serializer.loads(data)
+        except Exception as e:
+            log.debug('Unable to read cache entry: %s', e)
+            return None
+
+    def _is_stale(self, created_time, timeout):
+        return timeout > 0 and (time.time() - created_time) >= timeout
+
+    def _is_past_grace(self, created_time, timeout):
+        return timeout > 0 and (
+            time.time() - created_time >= timeout + self.stale_while_revalidate
+        )
+
+    def begin_refresh(self, key):
+        """Reserve a refresh of an entry, returning False if it's already
+        being refreshed or too many entries are being refreshed
+            key: entry key
+        """
+        with self._refresh_lock:
+            if (
+                key in self._refreshing or
+                len(self._refreshing) >= self.max_refreshes
+            ):
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key):
+        """Release a refresh reserved with begin_refresh
+            key: entry key
+        """
+        with self._refresh_lock:
+            self._refreshing.discard(key)
+
+    def refresh(self, key, function):
+        """Call function in a background thread to refresh an entry, unless
+        it's already being refreshed or too many entries are being refreshed
+            key: entry key
+            function: called with no arguments to fetch and store the entry
+        """
+        if not self.begin_refresh(key):
+            return False
+
+        def run():
+            try:
+                function()
+            except Exception:
+                log.exception('Failed to refresh cache entry: %s', key)
+            finally:
+                self.end_refresh(key)
+
+        threading.Thread(
+            target=run, name='Tweepy Cache Refresh', daemon=True
+        ).start()
+        return True
+
+
+class EvictionPolicy:
+    """Eviction policy interface for MemoryCache
+
+    Tracks the keys stored in a cache and chooses which one to evict when the
+    cache is full.
+    """
 
-    def __init__(self, timeout=60):
-        Cache.__init__(self, timeout)
-        self._entries = {}
+    def add(self, key):
+        """Track a new or updated entry
+            key: entry key
+        """
+        raise NotImplementedError
+
+    def touch(self, key):
+        """Track a cache hit
+            key: entry key
+        """
+        raise NotImplementedError
+
+    def remove(self, key):
+        """Stop tracking a deleted entry
+            key: entry key
+        """
+        raise NotImplementedError
+
+    def victim(self):
+        """Get the key of the entry to evict next"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Stop tracking all entries"""
+        raise NotImplementedError
+
+
+class TTLEviction(EvictionPolicy):
+    """Evict the entry that expires soonest, i.e. the least recently stored"""
+
+    def __init__(self):
+        self._keys = OrderedDict()
+
+    def add(self, key):
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+
+    def touch(self, key):
+        pass
+
+    def remove(self, key):
+        self._keys.pop(key, None)
+
+    def victim(self):
+        return next(iter(self._keys))
+
+    def clear(self):
+        self._keys.clear()
+
+
+class LRUEviction(TTLEviction):
+    """Evict the least recently used entry"""
+
+    def touch(self, key):
+        self._keys.move_to_end(key)
+
+
+class LFUEviction(EvictionPolicy):
+    """Evict the least frequently used entry, or the least recently used of
+    those if there are multiple"""
+
+    def __init__(self):
+        self._counts = {}
+        # Keys for each use count, in order of use
+        self._buckets = defaultdict(OrderedDict)
+        self._min_count = 0
+
+    def _move(self, key, count):
+        if key in self._counts:
+            old_count = self._counts[key]
+            bucket = self._buckets[old_count]
+            del bucket[key]
+            if not bucket:
+                del self._buckets[old_count]
+        self._counts[key] = count
+        self._buckets[count][key] = None
+
+    def add(self, key):
+        count = self._counts.get(key, 0) + 1
+        self._move(key, count)
+        if count == 1:
+            self._min_count = 1
+
+    def touch(self, key):
+        self._move(key, self._counts[key] + 1)
+
+    def remove(self, key):
+        count = self._counts.pop(key, None)
+        if count is not None:
+            bucket = self._buckets[count]
+            del bucket[key]
+            if not bucket:
+                del self._buckets[count]
+
+    def victim(self):
+        # The minimum count only becomes outdated when its last key is used
+        # again or removed
+        if self._min_count not in self._buckets:
+            self._min_count = min(self._buckets)
+        return next(iter(self._buckets[self._min_count]))
+
+    def clear(self):
+        self._counts.clear()
+        self._buckets.clear()
+        self._min_count = 0
+
+
+EVICTION_POLICIES = {
+    'lfu': LFUEviction,
+    'lru': LRUEviction,
+    'ttl': TTLEviction,
+}
+
+
+class MemoryCache(Cache):
+    """In-memory cache
+
+    Entries are kept in the order they were stored in, which is also the
+    order they expire in, so expired entries are removed from the front
+    whenever an entry is stored, without scanning the whole cache. The cache
+    can be bounded by number of entries and by size, in bytes, of the
+    serialized values, in which case entries are evicted by the eviction
+    policy.
+    """
+
+    def __init__(self, timeout=60, *, max_entries=None, max_bytes=None,
+                 eviction='lru', **kwargs):
+        """Initialize the cache
+            timeout: number of seconds to keep a cached entry
+            max_entries: maximum number of entries to keep [optional]
+            max_bytes: maximum total size of serialized values to keep
+                [optional]
+            eviction: 'lru', 'lfu', 'ttl', or an EvictionPolicy instance
+        """
+        Cache.__init__(self, timeout, **kwargs)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        if isinstance(eviction, str):
+            eviction = EVICTION_POLICIES[eviction]()
+        self.eviction = eviction
+
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
         self.lock = threading.Lock()
 
     def __getstate__(self):
         # pickle
-        return {'entries': self._entries, 'timeout': self.timeout}
+        return {
+            'entries': self._entries, 'timeout': self.timeout,
+            'max_entries': self.max_entries, 'max_bytes': self.max_bytes,
+            'eviction': self.eviction,
+            'stale_while_revalidate': self.stale_while_revalidate,
+            'max_refreshes': self.max_refreshes,
+            'serializer': self.serializer
+        }
 
     def __setstate__(self, state):
         # unpickle
         self.lock = threading.Lock()
-        self._entries = state['entries']
+        self._init_refreshes()
         self.timeout = state['timeout']
+        self.max_entries = state.get('max_entries')
+        self.max_bytes = state.get('max_bytes')
+        self.eviction = state.get('eviction') or LRUEviction()
+        self.stale_while_revalidate = state.get('stale_while_revalidate', 0)
+        self.max_refreshes = state.get('max_refreshes', 4)
+        self.serializer = state.get('serializer', Cache.serializer)
+        self.hits = self.misses = self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self.size = 0
+        self.eviction.clear()
+        entries = sorted(state['entries'].items(), key=lambda item: item[1][0])
+        for key, entry in entries:
+            self._add(key, entry, self._size(entry[1]))
 
     def _is_expired(self, entry, timeout):
-        return timeout > 0 and (time.time() - entry[0]) >= timeout
+        return self._is_past_grace(entry[0], timeout)
+
+    def _size(self, value):
+        if self.max_bytes is None:
+            return 0
+        return len(self.serializer.dumps(value))
+
+    def _add(self, key, entry, size):
+        self._entries[key] = entry
+        self.eviction.add(key)
+        self._sizes[key] = size
+        self.size += size
+
+    def _delete(self, key):
+        del self._entries[key]
+        self.eviction.remove(key)
+        self.size -= self._sizes.pop(key)
+
+    def _remove_expired(self):
+        # Amortized O(1), as entries are in the order they expire in
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if not self._is_expired(entry, self.timeout):
+                break
+            self._delete(key)
+
+    def _evict(self, size):
+        # Make room for a new entry before it's added, so that it isn't the
+        # one evicted
+        while self._entries and (
+            self.max_entries is not None and
+            len(self._entries) >= self.max_entries or
+            self.max_bytes is not None and self.size + size > self.max_bytes
+        ):
+            self._delete(self.eviction.victim())
+            self.evictions += 1
 
     def store(self, key, value):
-        self.lock.acquire()
-        self._entries[key] = (time.time(), value)
-        self.lock.release()
-
-    def get(self, key, timeout=None):
-        self.lock.acquire()
-        try:
+        size = self._size(value)
+        with self.lock:
+            self._remove_expired()
+            if key in self._entries:
+                self._delete(key)
+            self._evict(size)
+            self._add(key, (time.time(), value), size)
+
+    def _lookup(self, key, timeout, allow_stale):
+        with self.lock:
             # check to see if we have this key
             entry = self._entries.get(key)
             if not entry:
                 # no hit, return nothing
-                return None
+                self.misses += 1
+                return None, False
 
             # use provided timeout in arguments if provided
             # otherwise use the one provided during init.
@@ -99,30 +545,49 @@ class MemoryCache(Cache):
             # make sure entry is not expired
             if self._is_expired(entry, timeout):
                 # entry expired, delete and return nothing
-                del self._entries[key]
-                return None
+                self._delete(key)
+                self.misses += 1
+                return None, False
+
+            # stale entries are only returned by get_stale
+            stale = self._is_stale(entry[0], timeout)
+            if stale and not allow_stale:
+                self.misses += 1
+                return None, False
 
             # entry found and not expired, return it
-            return entry[1]
-        finally:
-            self.lock.release()
+            self.eviction.touch(key)
+            self.hits += 1
+            return entry[1], stale
+
+    def get(self, key, timeout=None):
+        return self._lookup(key, timeout, allow_stale=False)[0]
+
+    def get_stale(self, key, timeout=None):
+        return self._lookup(key, timeout, allow_stale=True)
 
     def count(self):
         return len(self._entries)
 
+    def delete(self, key):
+        self.delete_many((key,))
+
+    def delete_many(self, keys):
+        with self.lock:
+            for key in keys:
+                if key in self._entries:
+                    self._delete(key)
+
     def cleanup(self):
-        self.lock.acquire()
-        try:
-            for k, v in dict(self._entries).items():
-                if self._is_expired(v, self.timeout):
-                    del self._entries[k]
-        finally:
-            self.lock.release()
+        with self.lock:
+            self._remove_expired()
 
     def flush(self):
-        self.lock.acquire()
-        self._entries.clear()
-        self.lock.release()
+        with self.lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.size = 0
+            self.eviction.clear()
 
 
 class FileCache(Cache):
@@ -131,8 +596,8 @@ class FileCache(Cache):
     # locks used to make cache thread-safe
     cache_locks = {}
 
-    def __init__(self, cache_dir, timeout=60):
-        Cache.__init__(self, timeout)
+    def __init__(self, cache_dir, timeout=60, **kwargs):
+        Cache.__init__(self, timeout, **kwargs)
         if os.path.exists(cache_dir) is False:
             os.mkdir(cache_dir)
         self.cache_dir = cache_dir
@@ -202,7 +667,7 @@ class FileCache(Cache):
             datafile = open(path, 'wb')
 
             # write data
-            pickle.dump((time.time(), value), datafile)
+            datafile.write(self._dump_entry(value))
 
             # close and unlock file
             datafile.close()
@@ -211,34 +676,48 @@ class FileCache(Cache):
             self.lock.release()
 
     def get(self, key, timeout=None):
+        value, stale = self._get(self._get_path(key), timeout)
+        if stale:
+            return None
+        return value
+
+    def get_stale(self, key, timeout=None):
         return self._get(self._get_path(key), timeout)
 
     def _get(self, path, timeout):
         if os.path.exists(path) is False:
             # no record
-            return None
+            return None, False
         self.lock.acquire()
         try:
             # acquire lock and open
             f_lock = self._lock_file(path, False)
             datafile = open(path, 'rb')
 
-            # read pickled object
-            created_time, value = pickle.load(datafile)
+            # read serialized entry
+            entry = self._load_entry(datafile.read())
             datafile.close()
 
             # check if value is expired
             if timeout is None:
                 timeout = self.timeout
-            if timeout > 0:
-                if (time.time() - created_time) >= timeout:
-                    # expired! delete from cache
-                    value = None
-                    self._delete_file(path)
+            if entry is None:
+                # unreadable! delete from cache
+                value = None
+                stale = False
+                self._delete_file(path)
+            elif self._is_past_grace(entry[0], timeout):
+                # expired! delete from cache
+                value = None
+                stale = False
+                self._delete_file(path)
+            else:
+                created_time, value = entry
+                stale = self._is_stale(created_time, timeout)
 
             # unlock and return result
             self._unlock_file(f_lock)
-            return value
+            return value, stale
         finally:
             self.lock.release()
 
@@ -250,6 +729,16 @@ class FileCache(Cache):
             c += 1
         return c
 
+    def delete(self, key):
+        self.delete_many((key,))
+
+    def delete_many(self, keys):
+        with self.lock:
+            for key in keys:
+                path = self._get_path(key)
+                if os.path.exists(path):
+                    self._delete_file(path)
+
     def cleanup(self):
         for entry in os.listdir(self.cache_dir):
             if entry.endswith('.lock'):
@@ -263,23 +752,211 @@ class FileCache(Cache):
             self._delete_file(os.path.join(self.cache_dir, entry))
 
 
+class SQLiteCache(Cache):
+    """Cache stored in a single SQLite database file
+
+    Entries are indexed by key and by creation time, so lookups are O(log n)
+    and cleanup is a range delete. The database uses write-ahead logging, so
+    it can be shared by multiple threads and processes.
+    """
+
+    def __init__(self, path, timeout=60, table='tweepy_cache', **kwargs):
+        """Initialize the cache
+            path: path of the database file
+            timeout: number of seconds to keep a cached entry
+            table: name of the table to store entries in
+        """
+        Cache.__init__(self, timeout, **kwargs)
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                f'CREATE TABLE IF NOT EXISTS "{table}" ('
+                'key TEXT PRIMARY KEY, created REAL NOT NULL, value BLOB)'
+            )
+            connection.execute(
+                f'CREATE INDEX IF NOT EXISTS "{table}_created" '
+                f'ON "{table}" (created)'
+            )
+
+    def __getstate__(self):
+        # pickle
+        return {
+            'path': self.path, 'timeout': self.timeout, 'table': self.table,
+            'stale_while_revalidate': self.stale_while_revalidate,
+            'max_refreshes': self.max_refreshes,
+            'serializer': self.serializer
+        }
+
+    def __setstate__(self, state):
+        # unpickle
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._init_refreshes()
+
+    def _connection(self):
+        # Connections can't be shared between threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def store(self, key, value):
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                f'INSERT OR REPLACE INTO "{self.table}" (key, created, value) '
+                'VALUES (?, ?, ?)',
+                (key, time.time(), self.serializer.dumps(value))
+            )
+
+    def store_many(self, mapping):
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                f'INSERT OR REPLACE INTO "{self.table}" (key, created, value) '
+                'VALUES (?, ?, ?)',
+                [
+                    (key, now, self.serializer.dumps(value))
+                    for key, value in mapping.items()
+                ]
+            )
+
+    def _batches(self, keys):
+        # SQLite limits the number of parameters of a statement
+        keys = list(keys)
+        for index in range(0, len(keys), 500):
+            yield keys[index:index + 500]
+
+    def get(self, key, timeout=None):
+        value, stale = self.get_stale(key, timeout)
+        if stale:
+            return None
+        return value
+
+    def get_stale(self, key, timeout=None):
+        connection = self._connection()
+        row = connection.execute(
+            f'SELECT created, value FROM "{self.table}" WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            # no hit, return nothing
+            return None, False
+
+        # use provided timeout in arguments if provided
+        # otherwise use the one provided during init.
+        if timeout is None:
+            timeout = self.timeout
+
+        created_time, value = row
+        if not self._is_past_grace(created_time, timeout):
+            value = self._load_value(value)
+            if value is not None:
+                return value, self._is_stale(created_time, timeout)
+        # expired or unreadable! delete from cache
+        self._delete_rows(connection, [(key, created_time)])
+        return None, False
+
+    def get_many(self, keys, timeout=None):
+        # use provided timeout in arguments if provided
+        # otherwise use the one provided during init.
+        if timeout is None:
+            timeout = self.timeout
+
+        results = {}
+        unreadable = []
+        connection = self._connection()
+        for batch in self._batches(keys):
+            rows = connection.execute(
+                f'SELECT key, created, value FROM "{self.table}" '
+                f'WHERE key IN ({", ".join("?" * len(batch))})', batch
+            ).fetchall()
+            for key, created_time, value in rows:
+                # expired entries are left for cleanup
+                if not self._is_stale(created_time, timeout):
+                    value = self._load_value(value)
+                    if value is None:
+                        unreadable.append((key, created_time))
+                    else:
+                        results[key] = value
+        if unreadable:
+            self._delete_rows(connection, unreadable)
+        return results
+
+    def _delete_rows(self, connection, rows):
+        # Deletes entries by key and creation time, so that entries that were
+        # replaced since they were read are kept
+        with connection:
+            connection.executemany(
+                f'DELETE FROM "{self.table}" WHERE key = ? AND created = ?',
+                rows
+            )
+
+    def delete(self, key):
+        self.delete_many((key,))
+
+    def delete_many(self, keys):
+        connection = self._connection()
+        with connection:
+            for batch in self._batches(keys):
+                connection.execute(
+                    f'DELETE FROM "{self.table}" '
+                    f'WHERE key IN ({", ".join("?" * len(batch))})', batch
+                )
+
+    def count(self):
+        return self._connection().execute(
+            f'SELECT COUNT(*) FROM "{self.table}"'
+        ).fetchone()[0]
+
+    def cleanup(self):
+        if self.timeout <= 0:
+            return
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                f'DELETE FROM "{self.table}" WHERE created <= ?',
+                (time.time() - self.timeout - self.stale_while_revalidate,)
+            )
+
+    def flush(self):
+        connection = self._connection()
+        with connection:
+            connection.execute(f'DELETE FROM "{self.table}"')
+
+    def close(self):
+        """Close the database connection of the current thread"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
 class MemCacheCache(Cache):
     """Cache interface"""
 
-    def __init__(self, client, timeout=60):
+    def __init__(self, client, timeout=60, serializer=None):
         """Initialize the cache
             client: The memcache client
             timeout: number of seconds to keep a cached entry
+            serializer: PickleSerializer (default) or JSONSerializer
         """
+        Cache.__init__(self, timeout, serializer=serializer)
         self.client = client
-        self.timeout = timeout
 
     def store(self, key, value):
         """Add new record to cache
             key: entry key
             value: data of entry
         """
-        self.client.set(key, value, time=self.timeout)
+        self.client.set(key, self.serializer.dumps(value), time=self.timeout)
 
     def get(self, key, timeout=None):
         """Get cached entry if exists and not expired
@@ -287,7 +964,43 @@ class MemCacheCache(Cache):
             timeout: override timeout with this value [optional].
             DOES NOT WORK HERE
         """
-        return self.client.get(key)
+        data = self.client.get(key)
+        if data is not None:
+            return self._load_value(data)
+
+    def get_many(self, keys, timeout=None):
+        """Get cached entries with a single request
+            keys: which entries to get
+            timeout: override timeout with this value [optional].
+            DOES NOT WORK HERE
+        """
+        results = {}
+        for key, data in self.client.get_multi(list(keys)).items():
+            value = self._load_value(data)
+            if value is not None:
+                results[key] = value
+        return results
+
+    def store_many(self, mapping):
+        """Add new records to cache with a single request
+            mapping: dict of entry keys to data of entries
+        """
+        self.client.set_multi(
+            {
+                key: self.serializer.dumps(value)
+                for key, value in mapping.items()
+            },
+            time=self.timeout
+        )
+
+    def delete(self, key):
+        self.delete_many((key,))
+
+    def delete_many(self, keys):
+        """Delete cached entries with a single request
+            keys: which entries to delete
+        """
+        self.client.delete_multi(list(keys))
 
     def count(self):
         """Get count of entries currently stored in cache. RETURN 0"""
@@ -303,96 +1016,179 @@ class MemCacheCache(Cache):
 
 
 class RedisCache(Cache):
-    """Cache running in a redis server"""
+    """Cache running in a redis server
+
+    Entries expire with native redis TTLs. Keys are indexed in a sorted set
+    by expiry time, so counting entries and cleaning up the index don't
+    need to retrieve every key, and cleanup is done in pipelined batches.
+    Timeouts passed to get can't extend the lifetime of entries past the
+    timeout of the cache.
+
+    Older versions indexed keys in a set, 'tweepy:keys' by default, whose
+    entries can't be read by this cache. migrate_legacy_keys deletes them
+    and that set, which would otherwise be left behind.
+    """
 
     def __init__(self, client,
                  timeout=60,
-                 keys_container='tweepy:keys',
-                 pre_identifier='tweepy:'):
-        Cache.__init__(self, timeout)
+                 keys_container='tweepy:expiry',
+                 pre_identifier='tweepy:', batch_size=1000, **kwargs):
+        Cache.__init__(self, timeout, **kwargs)
         self.client = client
         self.keys_container = keys_container
         self.pre_identifier = pre_identifier
+        self.batch_size = batch_size
 
     def _is_expired(self, entry, timeout):
-        # Returns true if the entry has expired
-        return timeout > 0 and (time.time() - entry[0]) >= timeout
+        # Returns true if the entry has expired, past any grace period
+        return self._is_past_grace(entry[0], timeout)
 
-    def store(self, key, value):
-        """Store the key, value pair in our redis server"""
+    def _store(self, pipe, key, value):
         # Prepend tweepy to our key,
         # this makes it easier to identify tweepy keys in our redis server
         key = self.pre_identifier + key
+        if self.timeout > 0:
+            lifetime = self.timeout + self.stale_while_revalidate
+            # Set the value, expiring after its lifetime
+            pipe.set(key, self._dump_entry(value), px=int(lifetime * 1000))
+            expiry = time.time() + lifetime
+        else:
+            pipe.set(key, self._dump_entry(value))
+            expiry = float('inf')
+        # Index the key by its expiry time
+        pipe.zadd(self.keys_container, {key: expiry})
+
+    def store(self, key, value):
+        """Store the key, value pair in our redis server"""
         # Get a pipe (to execute several redis commands in one step)
         pipe = self.client.pipeline()
-        # Set our values in a redis hash (similar to python dict)
-        pipe.set(key, pickle.dumps((time.time(), value)))
-        # Set the expiration
-        pipe.expire(key, self.timeout)
-        # Add the key to a set containing all the keys
-        pipe.sadd(self.keys_container, key)
+        self._store(pipe, key, value)
         # Execute the instructions in the redis server
         pipe.execute()
 
+    def store_many(self, mapping):
+        """Store multiple key, value pairs in one round trip"""
+        pipe = self.client.pipeline()
+        for key, value in mapping.items():
+            self._store(pipe, key, value)
+        pipe.execute()
+
     def get(self, key, timeout=None):
         """Given a key, returns an element from the redis table"""
-        key = self.pre_identifier + key
-        # Check to see if we have this key
-        unpickled_entry = self.client.get(key)
-        if not unpickled_entry:
-            # No hit, return nothing
+        value, stale = self.get_stale(key, timeout)
+        if stale:
             return None
+        return value
+
+    def get_stale(self, key, timeout=None):
+        return self._get(key, self.client.get(self.pre_identifier + key),
+                         timeout)
+
+    def get_many(self, keys, timeout=None):
+        """Given keys, returns a dict of the elements found in the redis
+        table, with one round trip"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        serialized_entries = self.client.mget(
+            [self.pre_identifier + key for key in keys]
+        )
+        results = {}
+        for key, serialized_entry in zip(keys, serialized_entries):
+            value, stale = self._get(key, serialized_entry, timeout)
+            if value is not None and not stale:
+                results[key] = value
+        return results
+
+    def _get(self, key, serialized_entry, timeout):
+        if not serialized_entry:
+            # No hit, return nothing
+            return None, False
 
-        entry = pickle.loads(unpickled_entry)
+        entry = self._load_entry(serialized_entry)
         # Use provided timeout in arguments if provided
         # otherwise use the one provided during init.
         if timeout is None:
             timeout = self.timeout
 
-        # Make sure entry is not expired
-        if self._is_expired(entry, timeout):
+        # Make sure entry is readable and not expired
+        if entry is None or self._is_expired(entry, timeout):
             # entry expired, delete and return nothing
-            self.delete_entry(key)
-            return None
+            self.delete_entry(self.pre_identifier + key)
+            return None, False
         # entry found and not expired, return it
-        return entry[1]
+        return entry[1], self._is_stale(entry[0], timeout)
 
     def count(self):
-        """Note: This is not very efficient,
-        since it retrieves all the keys from the redis
-        server to know how many keys we have"""
-        return len(self.client.smembers(self.keys_container))
+        """Count the entries that haven't expired, from the index"""
+        return self.client.zcount(self.keys_container, time.time(), '+inf')
+
+    def delete(self, key):
+        self.delete_many((key,))
+
+    def delete_many(self, keys):
+        """Delete the elements with the given keys, in batches"""
+        keys = [self.pre_identifier + key for key in keys]
+        for index in range(0, len(keys), self.batch_size):
+            self._delete_batch(keys[index:index + self.batch_size])
 
     def delete_entry(self, key):
         """Delete an object from the redis table"""
         pipe = self.client.pipeline()
-        pipe.srem(self.keys_container, key)
+        pipe.zrem(self.keys_container, key)
         pipe.delete(key)
         pipe.execute()
 
+    def _delete_batch(self, keys):
+        pipe = self.client.pipeline()
+        pipe.zrem(self.keys_container, *keys)
+        pipe.delete(*keys)
+        pipe.execute()
+
     def cleanup(self):
-        """Cleanup all the expired keys"""
-        keys = self.client.smembers(self.keys_container)
-        for key in keys:
-            entry = self.client.get(key)
-            if entry:
-                entry = pickle.loads(entry)
-                if self._is_expired(entry, self.timeout):
-                    self.delete_entry(key)
+        """Cleanup all the expired keys, in batches"""
+        # Redis deletes entries when their TTLs expire, so this mostly
+        # removes keys from the index
+        while True:
+            keys = self.client.zrangebyscore(
+                self.keys_container, '-inf', time.time(),
+                start=0, num=self.batch_size
+            )
+            if not keys:
+                break
+            self._delete_batch(keys)
 
     def flush(self):
-        """Delete all entries from the cache"""
-        keys = self.client.smembers(self.keys_container)
-        for key in keys:
-            self.delete_entry(key)
+        """Delete all entries from the cache, in batches"""
+        while True:
+            keys = self.client.zrange(
+                self.keys_container, 0, self.batch_size - 1
+            )
+            if not keys:
+                break
+            self._delete_batch(keys)
+
+    def migrate_legacy_keys(self, legacy_keys_container='tweepy:keys'):
+        """Delete the entries indexed by older versions, and their index, in
+        batches
+            legacy_keys_container: name of the set that older versions
+                indexed keys in [optional]
+        """
+        while True:
+            keys = self.client.spop(legacy_keys_container, self.batch_size)
+            if not keys:
+                break
+            self.client.delete(*keys)
+        self.client.delete(legacy_keys_container)
 
 
 class MongodbCache(Cache):
-    """A simple pickle-based MongoDB cache system."""
+    """A simple MongoDB cache system."""
 
-    def __init__(self, db, timeout=3600, collection='tweepy_cache'):
+    def __init__(self, db, timeout=3600, collection='tweepy_cache',
+                 serializer=None):
         """Should receive a "database" cursor from pymongo."""
-        Cache.__init__(self, timeout)
+        Cache.__init__(self, timeout, serializer=serializer)
         self.timeout = timeout
         self.col = db[collection]
         self.col.create_index('created', expireAfterSeconds=timeout)
@@ -401,7 +1197,7 @@ class MongodbCache(Cache):
         from bson.binary import Binary
 
         now = datetime.datetime.utcnow()
-        blob = Binary(pickle.dumps(value))
+        blob = Binary(self.serializer.dumps(value))
 
         self.col.insert({'created': now, '_id': key, 'value': blob})
 
@@ -410,11 +1206,39 @@ class MongodbCache(Cache):
             raise NotImplementedError
         obj = self.col.find_one({'_id': key})
         if obj:
-            return pickle.loads(obj['value'])
+            return self._load_value(obj['value'])
+
+    def store_many(self, mapping):
+        from bson.binary import Binary
+        from pymongo import ReplaceOne
+
+        now = datetime.datetime.utcnow()
+        self.col.bulk_write([
+            ReplaceOne({'_id': key}, {
+                'created': now, 'value': Binary(self.serializer.dumps(value))
+            }, upsert=True)
+            for key, value in mapping.items()
+        ], ordered=False)
+
+    def get_many(self, keys, timeout=None):
+        if timeout:
+            raise NotImplementedError
+        results = {}
+        for obj in self.col.find({'_id': {'$in': list(keys)}}):
+            value = self._load_value(obj['value'])
+            if value is not None:
+                results[obj['_id']] = value
+        return results
 
     def count(self):
         return self.col.find({}).count()
 
+    def delete(self, key):
+        self.delete_many((key,))
+
+    def delete_many(self, keys):
+        self.col.delete_many({'_id': {'$in': list(keys)}})
+
     def delete_entry(self, key):
         return self.col.remove({'_id': key})
 
@@ -425,3 +1249,161 @@ class MongodbCache(Cache):
     def flush(self):
         self.col.drop()
         self.col.create_index('created', expireAfterSeconds=self.timeout)
+
+
+class EntityCache:
+    """In-memory store of the Tweets, users, and media seen in Twitter API v2
+    responses and streams, keyed by ID, that lookups can be answered from
+
+    Fields of entities are merged as they're seen, and each field is fresh
+    for the timeout, or its timeout in field_timeouts, since it was last
+    seen. Entities are only returned if all of the requested fields are
+    fresh. The least recently used entities are evicted past max_entries.
+
+    Entities are kept separately for each scope, e.g. a hash of the
+    credentials that they were requested with, as the fields of entities
+    that are visible can depend on the authenticating user or app.
+    """
+
+    # fields that are always returned by the API
+    default_fields = {
+        'tweet': ('id', 'text', 'edit_history_tweet_ids'),
+        'user': ('id', 'name', 'username'),
+        'media': ('media_key', 'type'),
+    }
+    # kinds of the entities in each field of includes
+    include_kinds = {'tweets': 'tweet', 'users': 'user', 'media': 'media'}
+
+    def __init__(self, timeout=300, *, field_timeouts=None,
+                 max_entries=100_000):
+        """Initialize the cache
+            timeout: number of seconds that fields of entities are fresh for
+            field_timeouts: dict of fields to number of seconds that they're
+                fresh for, e.g. {'public_metrics': 60} [optional]
+            max_entries: maximum number of entities to keep
+        """
+        self.timeout = timeout
+        self.field_timeouts = field_timeouts or {}
+        self.max_entries = max_entries
+        self._entities = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _get_id(self, kind, entity):
+        if kind == 'media':
+            return entity.get('media_key')
+        return entity.get('id')
+
+    def _requested_fields(self, kind, fields):
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        return set(self.default_fields[kind]).union(fields or ())
+
+    def _is_fresh(self, seen, fields, now):
+        for field in fields:
+            if field not in seen:
+                return False
+            timeout = self.field_timeouts.get(field, self.timeout)
+            if timeout > 0 and now - seen[field] >= timeout:
+                return False
+        return True
+
+    def update(self, kind, entities, fields=None, *, scope=None):
+        """Merge entities into the cache
+            kind: 'tweet', 'user', or 'media'
+            entities: list of entities, as decoded JSON
+            fields: fields that were requested, so that ones that entities
+                don't have are known not to exist [optional]
+            scope: scope that the entities were seen in [optional]
+        """
+        now = time.time()
+        absent = self._requested_fields(kind, fields) if fields else ()
+        with self.lock:
+            for entity in entities:
+                entity_id = self._get_id(kind, entity)
+                if entity_id is None:
+                    continue
+                key = (scope, kind, str(entity_id))
+                data, seen = self._entities.pop(key, ({}, {}))
+                for field in absent:
+                    if field not in entity:
+                        data.pop(field, None)
+                        seen[field] = now
+                for field, value in entity.items():
+                    data[field] = value
+                    seen[field] = now
+                self._entities[key] = (data, seen)
+            while len(self._entities) > self.max_entries:
+                self._entities.popitem(last=False)
+
+    def add_response(self, response, params=None, kind=None, *, scope=None):
+        """Merge the entities in a response or line of a stream
+            response: decoded JSON
+            params: parameters of the request, with the requested fields
+                [optional]
+            kind: kind of the entities in the response's data [optional]
+            scope: scope that the response was received in [optional]
+        """
+        params = params or {}
+        data = response.get('data')
+        if kind is not None and data:
+            if not isinstance(data, list):
+                data = [data]
+            self.update(
+                kind, data, params.get(f'{kind}.fields'), scope=scope
+            )
+        for name, entities in response.get('includes', {}).items():
+            kind = self.include_kinds.get(name)
+            if kind is not None:
+                self.update(
+                    kind, entities, params.get(f'{kind}.fields'), scope=scope
+                )
+
+    def get_many(self, kind, ids, fields=None, *, scope=None):
+        """Get the cached entities with the requested fields fresh, as a dict
+        of IDs to entities with only those fields
+            kind: 'tweet', 'user', or 'media'
+            ids: which entities to get
+            fields: fields that are requested besides the default ones
+                [optional]
+            scope: scope to get the entities from [optional]
+        """
+        fields = self._requested_fields(kind, fields)
+        now = time.time()
+        results = {}
+        with self.lock:
+            for entity_id in ids:
+                key = (scope, kind, str(entity_id))
+                entry = self._entities.get(key)
+                if entry is None or not self._is_fresh(entry[1], fields, now):
+                    self.misses += 1
+                    continue
+                self._entities.move_to_end(key)
+                self.hits += 1
+                results[str(entity_id)] = {
+                    field: value for field, value in entry[0].items()
+                    if field in fields
+                }
+        return results
+
+    def get(self, kind, entity_id, fields=None, *, scope=None):
+        """Get a cached entity with the requested fields fresh, if any
+            kind: 'tweet', 'user', or 'media'
+            entity_id: which entity to get
+            fields: fields that are requested besides the default ones
+                [optional]
+            scope: scope to get the entity from [optional]
+        """
+        return self.get_many(
+            kind, (entity_id,), fields, scope=scope
+        ).get(str(entity_id))
+
+    def count(self):
+        """Get count of entities currently stored in cache"""
+        return len(self._entities)
+
+    def flush(self):
+        """Delete all cached entities"""
+        with self.lock:
+            self._entities.clear()
@@ -3,23 +3,24 @@
 # See LICENSE for details.
 
 from collections import namedtuple
+import copy
 import datetime
-
-try:
-    from functools import cache
-except ImportError:  # Remove when support for Python 3.8 is dropped
-    from functools import lru_cache
-    cache = lru_cache(maxsize=None)
-
+from fnmatch import fnmatchcase
+from functools import partial
+import hashlib
 import logging
 from platform import python_version
 import time
+from urllib.parse import urlencode
 import warnings
 
 import requests
 
 import tweepy
-from tweepy.auth import OAuth1UserHandler
+from tweepy.auth import (
+    BearerTokenPool, OAuth1UserHandler, OAuth2UserTokenProvider
+)
+from tweepy.cache import MemoryCache
 from tweepy.direct_message_event import DirectMessageEvent
 from tweepy.errors import (
     BadRequest, Forbidden, HTTPException, NotFound, TooManyRequests,
@@ -32,18 +33,27 @@ from tweepy.poll import Poll
 from tweepy.space import Space
 from tweepy.tweet import Tweet
 from tweepy.user import User
+from tweepy.utils import SingleFlight
 
 log = logging.getLogger(__name__)
 
 Response = namedtuple("Response", ("data", "includes", "errors", "meta"))
 
+# Authenticating user IDs, keyed by a hash of the access token, shared by
+# every Client and AsyncClient that isn't given its own identity_cache
+_identity_cache = MemoryCache(timeout=86400, max_entries=10000)
+
 
 class BaseClient:
 
+    # kinds of entity cached by EntityCache, by data type
+    _entity_kinds = {Media: "media", Tweet: "tweet", User: "user"}
+
     def __init__(
         self, bearer_token=None, consumer_key=None, consumer_secret=None,
         access_token=None, access_token_secret=None, *, return_type=Response,
-        wait_on_rate_limit=False
+        wait_on_rate_limit=False, cache=None, cache_ttls=None,
+        coalesce_requests=False, entity_cache=None, identity_cache=None
     ):
         self.bearer_token = bearer_token
         self.consumer_key = consumer_key
@@ -54,6 +64,18 @@ class BaseClient:
         self.return_type = return_type
         self.wait_on_rate_limit = wait_on_rate_limit
 
+        self.cache = cache
+        self.cache_ttls = cache_ttls or {}
+
+        self.coalesce_requests = coalesce_requests
+
+        self.entity_cache = entity_cache
+        self._in_flight = SingleFlight()
+
+        if identity_cache is None:
+            identity_cache = _identity_cache
+        self.identity_cache = identity_cache
+
         self.session = requests.Session()
         self.user_agent = (
             f"Python/{python_version()} "
@@ -61,10 +83,14 @@ class BaseClient:
             f"Tweepy/{tweepy.__version__}"
         )
 
-    def request(self, method, route, params=None, json=None, user_auth=False):
+    def request(
+        self, method, route, params=None, json=None, user_auth=False, *,
+        _tried_tokens=()
+    ):
         host = "https://api.twitter.com"
         headers = {"User-Agent": self.user_agent}
         auth = None
+        pool = None
         if user_auth:
             auth = OAuth1UserHandler(
                 self.consumer_key, self.consumer_secret,
@@ -72,7 +98,14 @@ class BaseClient:
             )
             auth = auth.apply_auth()
         else:
-            headers["Authorization"] = f"Bearer {self.bearer_token}"
+            bearer_token = self.bearer_token
+            if isinstance(bearer_token, BearerTokenPool):
+                pool = bearer_token
+                endpoint = pool.endpoint(method, route)
+                bearer_token = pool.acquire(endpoint, exclude=_tried_tokens)
+            elif isinstance(bearer_token, OAuth2UserTokenProvider):
+                bearer_token = bearer_token.get_token()
+            headers["Authorization"] = f"Bearer {bearer_token}"
 
         log.debug(
             f"Making API request: {method} {host + route}\n"
@@ -92,6 +125,12 @@ class BaseClient:
                 f"Content: {response.content}"
             )
 
+            if pool is not None:
+                pool.update(
+                    bearer_token, endpoint, response.headers,
+                    rate_limited=response.status_code == 429
+                )
+
             if response.status_code == 400:
                 raise BadRequest(response)
             if response.status_code == 401:
@@ -104,7 +143,21 @@ class BaseClient:
                 reset_time = None
                 if "x-rate-limit-reset" in response.headers:
                     reset_time = int(response.headers["x-rate-limit-reset"])
-                
+
+                if pool is not None:
+                    # Each other token is only tried once for a request
+                    tried_tokens = (*_tried_tokens, bearer_token)
+                    if pool.available(endpoint, exclude=tried_tokens):
+                        log.warning(
+                            "Rate limit exceeded. "
+                            "Retrying with another Bearer Token."
+                        )
+                        return self.request(
+                            method, route, params, json, user_auth,
+                            _tried_tokens=tried_tokens
+                        )
+                    reset_time = pool.reset_time(endpoint) or reset_time
+
                 if self.wait_on_rate_limit:
                     if reset_time is not None:
                         sleep_time = reset_time - int(time.time()) + 1
@@ -124,30 +177,203 @@ class BaseClient:
 
             return response
 
+    def _get_auth_hash(self, user_auth):
+        # Responses depend on the authenticating user or app, so cache keys
+        # include a hash of the credentials used, rather than the credentials
+        # themselves, as keys may be stored by the cache backend
+        if user_auth:
+            credentials = f"{self.consumer_key}:{self.access_token}"
+        elif isinstance(self.bearer_token, BearerTokenPool):
+            credentials = ",".join(self.bearer_token.bearer_tokens)
+        elif isinstance(self.bearer_token, OAuth2UserTokenProvider):
+            # Refreshing the access token doesn't change the user, so cached
+            # responses are kept
+            credentials = self.bearer_token.identity
+        else:
+            credentials = str(self.bearer_token)
+        return hashlib.sha256(credentials.encode("utf-8")).hexdigest()[:16]
+
+    def _get_cache_key(self, method, route, params, user_auth):
+        query = urlencode(sorted(
+            (name, str(value)) for name, value in params.items()
+        ))
+        auth_hash = self._get_auth_hash(user_auth)
+        return f"tweepy:v2:{auth_hash}:{method} {route}?{query}"
+
+    @staticmethod
+    def _get_identity_cache_key(access_token):
+        if isinstance(access_token, OAuth2UserTokenProvider):
+            access_token = access_token.identity
+        # Access tokens are hashed, as keys may be stored by the cache backend
+        token_hash = hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+        return f"tweepy:user_id:{token_hash}"
+
+    def _get_cache_timeout(self, route):
+        for pattern, timeout in self.cache_ttls.items():
+            if fnmatchcase(route, pattern):
+                return timeout
+        return None
+
+    def _fetch(self, method, route, params, json, user_auth, cache_key):
+        response = self.request(method, route, params=params, json=json,
+                                user_auth=user_auth)
+
+        if self.return_type is requests.Response:
+            return response
+
+        response = response.json()
+
+        if cache_key is not None:
+            # Caches can store values by reference, so a copy is stored, that
+            # isn't changed if the response is
+            self.cache.store(cache_key, copy.deepcopy(response))
+
+        return response
+
+    def _refresh(self, method, route, params, json, user_auth, cache_key):
+        # Refresh with a copy of the client with its own session, as sessions
+        # aren't thread-safe
+        client = copy.copy(self)
+        client.session = requests.Session()
+        try:
+            client._fetch(method, route, params, json, user_auth, cache_key)
+        finally:
+            client.session.close()
+
     def _make_request(
         self, method, route, params={}, endpoint_parameters=(), json=None,
         data_type=None, user_auth=False
     ):
         request_params = self._process_params(params, endpoint_parameters)
 
-        response = self.request(method, route, params=request_params,
-                                json=json, user_auth=user_auth)
+        # Only decoded JSON of GET requests is cached
+        cache_key = None
+        if (
+            self.cache is not None and method == "GET" and
+            self.return_type is not requests.Response
+        ):
+            cache_key = self._get_cache_key(
+                method, route, request_params, user_auth
+            )
+            response, stale = self.cache.get_stale(
+                cache_key, timeout=self._get_cache_timeout(route)
+            )
+            if response is not None:
+                if stale:
+                    # Serve the stale response while it's refreshed
+                    self.cache.refresh(cache_key, partial(
+                        self._refresh, method, route, request_params, json,
+                        user_auth, cache_key
+                    ))
+                # Caches can return values by reference, so the response is
+                # copied, so that changes to it don't change the cache
+                response = copy.deepcopy(response)
+                if self.return_type is dict:
+                    return response
+                return self._construct_response(response, data_type=data_type)
+
+        if (
+            self.coalesce_requests and method == "GET" and
+            self.return_type is not requests.Response
+        ):
+            # Concurrent identical requests share a single request
+            response = self._in_flight.do(
+                cache_key or self._get_cache_key(
+                    method, route, request_params, user_auth
+                ),
+                self._fetch, method, route, request_params, json, user_auth,
+                cache_key
+            )
+        else:
+            response = self._fetch(
+                method, route, request_params, json, user_auth, cache_key
+            )
+
+        if self.entity_cache is not None and isinstance(response, dict):
+            self.entity_cache.add_response(
+                response, request_params, self._entity_kinds.get(data_type),
+                scope=self._get_auth_hash(user_auth)
+            )
 
-        if self.return_type is requests.Response:
+        if self.return_type in (dict, requests.Response):
             return response
 
-        response = response.json()
+        return self._construct_response(response, data_type=data_type)
+
+    def _get_cached_entities(self, kind, ids, params, user_auth):
+        # Returns the requested IDs, the cached entities with the requested
+        # fields, and the IDs that need to be requested, or None if the entity
+        # cache can't be used
+        if (
+            self.entity_cache is None or params.get("expansions") or
+            self.return_type not in (dict, Response)
+        ):
+            return None
+        if isinstance(ids, (int, str)):
+            # A single ID, or comma-separated IDs
+            ids = str(ids).split(",")
+        ids = list(dict.fromkeys(str(entity_id) for entity_id in ids))
+        fields = params.get(f"{kind}_fields")
+        if isinstance(fields, list):
+            fields = map(str, fields)
+        cached = self.entity_cache.get_many(
+            kind, ids, fields, scope=self._get_auth_hash(user_auth)
+        )
+        missing = [entity_id for entity_id in ids if entity_id not in cached]
+        return ids, cached, missing
+
+    def _merge_entities(self, ids, cached, response, data_type):
+        fetched = {entity["id"]: entity for entity in response.get("data", ())}
+        data = []
+        for entity_id in ids:
+            entity = cached.get(entity_id) or fetched.get(entity_id)
+            if entity is not None:
+                data.append(entity)
+
+        merged = {}
+        if data:
+            merged["data"] = data
+        if "errors" in response:
+            merged["errors"] = response["errors"]
 
         if self.return_type is dict:
-            return response
+            return merged
+        return self._construct_response(merged, data_type=data_type)
 
-        return self._construct_response(response, data_type=data_type)
+    def _get_entities(
+        self, kind, route, ids, params, endpoint_parameters, data_type,
+        user_auth
+    ):
+        lookup = self._get_cached_entities(kind, ids, params, user_auth)
+        if lookup is None:
+            params["ids"] = ids
+            return self._make_request(
+                "GET", route, params=params,
+                endpoint_parameters=endpoint_parameters, data_type=data_type,
+                user_auth=user_auth
+            )
+
+        # Only request the entities that aren't cached
+        ids, cached, missing = lookup
+        response = {}
+        if missing:
+            params["ids"] = missing
+            request_params = self._process_params(params, endpoint_parameters)
+            response = self._fetch(
+                "GET", route, request_params, None, user_auth, None
+            )
+            self.entity_cache.add_response(
+                response, request_params, kind,
+                scope=self._get_auth_hash(user_auth)
+            )
+        return self._merge_entities(ids, cached, response, data_type)
 
     def _construct_response(self, response, data_type=None):
         data = response.get("data")
         data = self._process_data(data, data_type=data_type)
 
-        includes = response.get("includes", {})
+        # Copy includes, so that a cached response isn't modified
+        includes = dict(response.get("includes", {}))
         includes = self._process_includes(includes)
 
         errors = response.get("errors", [])
@@ -208,7 +434,8 @@ class Client(BaseClient):
     """Client( \
         bearer_token=None, consumer_key=None, consumer_secret=None, \
         access_token=None, access_token_secret=None, *, return_type=Response, \
-        wait_on_rate_limit=False \
+        wait_on_rate_limit=False, cache=None, cache_ttls=None, \
+        coalesce_requests=False, entity_cache=None \
     )
 
     Twitter API v2 Client
@@ -221,8 +448,14 @@ class Client(BaseClient):
 
     Parameters
     ----------
-    bearer_token : str | None
-        Twitter API OAuth 2.0 Bearer Token / Access Token
+    bearer_token : str | BearerTokenPool | OAuth2UserTokenProvider | None
+        Twitter API OAuth 2.0 Bearer Token / Access Token, a pool of Bearer
+        Tokens to spread requests across, or a provider of Access Tokens that
+        refreshes them before they expire
+
+        .. versionchanged:: 4.16
+            Added support for :class:`BearerTokenPool` and
+            :class:`OAuth2UserTokenProvider`
     consumer_key : str | None
         Twitter API OAuth 1.0a Consumer Key
     consumer_secret : str | None
@@ -235,6 +468,46 @@ class Client(BaseClient):
         Type to return from requests to the API
     wait_on_rate_limit : bool
         Whether to wait when rate limit is reached
+    cache : Cache | None
+        The cache to query and store the decoded JSON of responses to GET
+        requests in, keyed by route, parameters, and credentials. If the
+        cache has a ``stale_while_revalidate`` period, expired responses are
+        returned within it while they're refreshed in the background. This
+        isn't used when ``return_type`` is :class:`requests.Response`.
+
+        .. versionadded:: 4.16
+    cache_ttls : dict[str, float] | None
+        Number of seconds to keep cached responses for, for routes matching
+        each pattern, e.g. ``{"/2/users/*": 300}``, overriding the timeout of
+        ``cache``. The first pattern that matches is used. TTLs longer than
+        the timeout of ``cache`` may not be respected by it.
+
+        .. versionadded:: 4.16
+    coalesce_requests : bool
+        Whether concurrent identical GET requests from multiple threads should
+        share a single request to the API and its result. This isn't used when
+        ``return_type`` is :class:`requests.Response`.
+
+        .. versionadded:: 4.16
+    entity_cache : EntityCache | None
+        Store of the Tweets, users, and media in responses, keyed by ID, that
+        :meth:`get_tweets` and :meth:`get_users` with ``ids`` and without
+        ``expansions`` return cached Tweets and users from, only requesting
+        the ones that aren't cached or whose requested fields aren't fresh.
+        Entities are kept separately for each set of credentials, so it can
+        be shared by clients with different credentials. This isn't used
+        when ``return_type`` is :class:`requests.Response`.
+
+        .. versionadded:: 4.16
+    identity_cache : Cache | None
+        Store of the IDs of the users authenticated with OAuth 2.0
+        Authorization Code Flow with PKCE access tokens, keyed by a hash of
+        the access token, e.g. a :class:`SQLiteCache` to persist them between
+        processes. By default, a bounded :class:`MemoryCache` that expires
+        IDs after a day is shared by every :class:`Client` and
+        :class:`AsyncClient`.
+
+        .. versionadded:: 4.16
 
     Attributes
     ----------
@@ -265,22 +538,29 @@ class Client(BaseClient):
                     self.bearer_token
                 )
 
-    @cache
     def _get_oauth_1_authenticating_user_id(self, access_token):
         return access_token.partition('-')[0]
 
-    @cache
     def _get_oauth_2_authenticating_user_id(self, access_token):
-        original_access_token = self.bearer_token
-        original_return_type = self.return_type
-
-        self.bearer_token = access_token
-        self.return_type = dict
-        user_id = self.get_me(user_auth=False)["data"]["id"]
-
-        self.bearer_token = original_access_token
-        self.return_type = original_return_type
+        if (
+            isinstance(access_token, OAuth2UserTokenProvider) and
+            access_token.user_id is not None
+        ):
+            return str(access_token.user_id)
+        cache_key = self._get_identity_cache_key(access_token)
+        user_id = self.identity_cache.get(cache_key)
+        if user_id is None:
+            user_id = self._in_flight.do(
+                cache_key, self._fetch_authenticating_user_id, cache_key
+            )
+        return user_id
 
+    def _fetch_authenticating_user_id(self, cache_key):
+        # Request the ID directly, rather than through get_me, so that
+        # bearer_token and return_type don't have to be swapped out
+        response = self.request("GET", "/2/users/me")
+        user_id = response.json()["data"]["id"]
+        self.identity_cache.store(cache_key, user_id)
         return user_id
 
     # Bookmarks
@@ -1831,13 +2111,11 @@ class Client(BaseClient):
         ----------
         https://developer.twitter.com/en/docs/twitter-api/tweets/lookup/api-reference/get-tweets
         """
-        params["ids"] = ids
-        return self._make_request(
-            "GET", "/2/tweets", params=params,
-            endpoint_parameters=(
+        return self._get_entities(
+            "tweet", "/2/tweets", ids, params, (
                 "ids", "expansions", "media.fields", "place.fields",
                 "poll.fields", "tweet.fields", "user.fields"
-            ), data_type=Tweet, user_auth=user_auth
+            ), Tweet, user_auth
         )
 
     # Blocks
@@ -2417,9 +2695,15 @@ class Client(BaseClient):
             raise TypeError("Expected IDs or usernames, not both")
 
         route = "/2/users"
+        endpoint_parameters = (
+            "ids", "usernames", "expansions", "tweet.fields", "user.fields"
+        )
 
         if ids is not None:
-            params["ids"] = ids
+            return self._get_entities(
+                "user", route, ids, params, endpoint_parameters, User,
+                user_auth
+            )
         elif usernames is not None:
             route += "/by"
             params["usernames"] = usernames
@@ -2428,9 +2712,8 @@ class Client(BaseClient):
 
         return self._make_request(
             "GET", route, params=params,
-            endpoint_parameters=(
-                "ids", "usernames", "expansions", "tweet.fields", "user.fields"
-            ), data_type=User, user_auth=user_auth
+            endpoint_parameters=endpoint_parameters, data_type=User,
+            user_auth=user_auth
         )
 
     def get_me(self, *, user_auth=True, **params):
@@ -9,10 +9,12 @@ import json
 import logging
 from math import inf
 from platform import python_version
+from queue import Empty, Full, Queue
+import re
 import ssl
 import traceback
-from threading import Thread
-from time import sleep
+from threading import Event, Lock, Thread
+from time import monotonic, sleep
 from typing import NamedTuple
 
 import requests
@@ -29,6 +31,265 @@ StreamResponse = namedtuple(
     "StreamResponse", ("data", "includes", "errors", "matching_rules")
 )
 
+_DECODER = json.JSONDecoder()
+_DATA_PATTERN = re.compile(rb'"data"\s*:')
+_ID_PATTERN = re.compile(rb'"id"\s*:\s*"(\d+)"')
+_KEY_PATTERNS = {}
+_STRING_PATTERN = re.compile(rb'"(?:[^"\\]|\\.)*"')
+
+
+def _search_at_depth(raw_data, pattern, depth):
+    # Find a key at a specific nesting depth without decoding the whole line,
+    # e.g. 1 for the top-level object and 2 for the data object. Matches are
+    # checked in order, tracking the depth of the bytes between them with
+    # strings removed, as the same keys are also used by nested objects, e.g.
+    # "id" by mentions, referenced Tweets, includes, and matching rules.
+    # Patterns must not match any brackets.
+    if isinstance(raw_data, str):
+        raw_data = raw_data.encode("utf-8")
+    current_depth = 0
+    position = 0
+    for match in pattern.finditer(raw_data):
+        segment = _STRING_PATTERN.sub(b"", raw_data[position:match.start()])
+        current_depth += segment.count(b"{") + segment.count(b"[")
+        current_depth -= segment.count(b"}") + segment.count(b"]")
+        if current_depth == depth:
+            return match
+        position = match.end()
+    return None
+
+
+def _extract_tweet_id(raw_data):
+    match = _search_at_depth(raw_data, _ID_PATTERN, 2)
+    if match is not None:
+        return match.group(1)
+    return None
+
+
+def _extract_value(raw_data, key, depth):
+    # Decode only the value of a key at a specific nesting depth
+    pattern = _KEY_PATTERNS.get(key)
+    if pattern is None:
+        pattern = re.compile(
+            b'"' + re.escape(key.encode("utf-8")) + rb'"\s*:\s*'
+        )
+        _KEY_PATTERNS[key] = pattern
+    if isinstance(raw_data, str):
+        raw_data = raw_data.encode("utf-8")
+    match = _search_at_depth(raw_data, pattern, depth)
+    if match is None:
+        raise KeyError(key)
+    value, _ = _DECODER.raw_decode(raw_data[match.end():].decode("utf-8"))
+    return value
+
+
+class StreamDeduplicator:
+    """Drop duplicate Tweets received from a stream before they're decoded
+
+    Recently seen Tweet IDs are kept in a memory-bounded, time-windowed set.
+    Duplicates are delivered when using ``backfill_minutes`` or redundant
+    connections. IDs are kept in two generations that are rotated every
+    ``window`` seconds, or sooner if the current generation holds more than
+    half of ``max_size`` IDs, so an ID is remembered for between ``window``
+    and twice ``window`` seconds at the expected rate. ``max_size`` should be
+    at least the expected number of Tweets per second times ``window``.
+
+    .. versionadded:: 4.16
+
+    Parameters
+    ----------
+    window : float
+        Number of seconds to remember each Tweet ID for
+    max_size : int
+        Maximum number of Tweet IDs to remember
+
+    Attributes
+    ----------
+    duplicates : int
+        Number of duplicate Tweets that have been dropped
+    """
+
+    def __init__(self, window=300, max_size=100_000):
+        self.window = window
+        self.max_size = max_size
+        self.duplicates = 0
+
+        self._current = set()
+        self._previous = set()
+        self._rotated_at = monotonic()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._current) + len(self._previous)
+
+    def add(self, tweet_id):
+        """Record a Tweet ID as seen.
+
+        Parameters
+        ----------
+        tweet_id : int | str | bytes
+            The ID of the Tweet
+
+        Returns
+        -------
+        bool
+            ``True`` if the ID has been seen recently, else ``False``
+        """
+        if isinstance(tweet_id, int):
+            tweet_id = str(tweet_id)
+        if isinstance(tweet_id, str):
+            tweet_id = tweet_id.encode("ascii")
+
+        with self._lock:
+            elapsed = monotonic() - self._rotated_at
+            if elapsed >= self.window * 2:
+                self._previous = set()
+                self._current = set()
+                self._rotated_at = monotonic()
+            elif (
+                elapsed >= self.window or
+                len(self._current) >= self.max_size // 2
+            ):
+                self._previous = self._current
+                self._current = set()
+                self._rotated_at = monotonic()
+
+            if tweet_id in self._current or tweet_id in self._previous:
+                self.duplicates += 1
+                return True
+            self._current.add(tweet_id)
+            return False
+
+    def clear(self):
+        """Forget all Tweet IDs that have been seen."""
+        with self._lock:
+            self._current.clear()
+            self._previous.clear()
+            self._rotated_at = monotonic()
+
+    def is_duplicate(self, raw_data):
+        """Check whether a line of data from the stream is a duplicate of one
+        that has been seen recently, recording its Tweet ID if it isn't.
+
+        Only the Tweet ID is extracted from the line, so this is much cheaper
+        than decoding it. Lines without a Tweet, e.g. ones with only errors,
+        are never considered duplicates.
+
+        Parameters
+        ----------
+        raw_data : bytes | str
+            The raw data from the stream
+
+        Returns
+        -------
+        bool
+            Whether the line is a duplicate
+        """
+        tweet_id = _extract_tweet_id(raw_data)
+        if tweet_id is None:
+            return False
+        return self.add(tweet_id)
+
+
+class StreamLine:
+    """Lightweight view of a line of data received from a stream, passed to
+    ``predicates`` to decide whether it should be dispatched before it's
+    decoded
+
+    Only the parts of the line that are accessed are decoded.
+
+    .. versionadded:: 4.16
+
+    Parameters
+    ----------
+    raw_data : bytes | str
+        The raw data from the stream
+
+    Attributes
+    ----------
+    raw_data : bytes
+        The raw data from the stream
+    """
+
+    __slots__ = ("raw_data", "_matching_rules")
+
+    def __init__(self, raw_data):
+        if isinstance(raw_data, str):
+            raw_data = raw_data.encode("utf-8")
+        self.raw_data = raw_data
+        self._matching_rules = None
+
+    def __repr__(self):
+        return f"StreamLine({self.raw_data!r})"
+
+    @property
+    def has_data(self):
+        """bool: Whether the line has a Tweet, rather than only errors or
+        other messages"""
+        return _search_at_depth(self.raw_data, _DATA_PATTERN, 1) is not None
+
+    @property
+    def tweet_id(self):
+        """int | None: The ID of the Tweet, if there is one"""
+        tweet_id = _extract_tweet_id(self.raw_data)
+        if tweet_id is not None:
+            return int(tweet_id)
+        return None
+
+    @property
+    def matching_rules(self):
+        """list[StreamRule]: The rules that the Tweet matched"""
+        if self._matching_rules is None:
+            try:
+                rules = _extract_value(self.raw_data, "matching_rules", 1)
+            except KeyError:
+                rules = []
+            self._matching_rules = [
+                StreamRule(id=rule.get("id"), tag=rule.get("tag"))
+                for rule in rules
+            ]
+        return self._matching_rules
+
+    @property
+    def matching_rule_tags(self):
+        """set[str]: The tags of the rules that the Tweet matched"""
+        return {
+            rule.tag for rule in self.matching_rules if rule.tag is not None
+        }
+
+    def get(self, field, default=None):
+        """Get the value of a field of the Tweet, decoding only that value.
+
+        Parameters
+        ----------
+        field : str
+            The name of the field, e.g. ``lang`` or ``referenced_tweets``
+        default
+            The value to return if the Tweet doesn't have the field
+
+        Returns
+        -------
+        Any
+            The decoded value of the field
+        """
+        try:
+            return _extract_value(self.raw_data, field, 2)
+        except KeyError:
+            return default
+
+    def is_retweet(self):
+        """Whether the Tweet is a Retweet. This requires the
+        ``referenced_tweets`` field.
+
+        Returns
+        -------
+        bool
+        """
+        return any(
+            referenced_tweet.get("type") == "retweeted"
+            for referenced_tweet in self.get("referenced_tweets", ())
+        )
+
 
 class BaseStream:
 
@@ -247,9 +508,34 @@ class StreamingClient(BaseClient, BaseStream):
         Either a boolean, in which case it controls whether to verify the
         server’s TLS certificate, or a string, in which case it must be a path
         to a CA bundle to use.
+    deduplicator : StreamDeduplicator | None
+        Used to drop duplicate Tweets, e.g. from ``backfill_minutes``, before
+        they're passed to :meth:`on_data`'s handlers
+
+        .. versionadded:: 4.16
+    predicates : list[Callable[[StreamLine], bool]] | None
+        Functions that are passed a :class:`StreamLine` for each line of data
+        received with a Tweet and return whether it should be dispatched.
+        Lines that any of them return ``False`` for are dropped before they're
+        decoded. Lines without ``data``, e.g. errors, are always dispatched.
+
+        .. versionadded:: 4.16
+    entity_cache : EntityCache | None
+        Store that the Tweets, users, and media received are added to, e.g.
+        to be shared with a :class:`~tweepy.Client`
+
+        .. versionadded:: 4.16
 
     Attributes
     ----------
+    lines_dispatched : int
+        Number of lines of data that have been decoded and dispatched
+
+        .. versionadded:: 4.16
+    lines_filtered : int
+        Number of lines of data that have been dropped by ``predicates``
+
+        .. versionadded:: 4.16
     running : bool
         Whether there's currently a stream running
     session : :class:`requests.Session`
@@ -261,18 +547,28 @@ class StreamingClient(BaseClient, BaseStream):
     """
 
     def __init__(self, bearer_token, *, return_type=Response,
-                 wait_on_rate_limit=False, **kwargs):
+                 wait_on_rate_limit=False, deduplicator=None, predicates=None,
+                 entity_cache=None, **kwargs):
         """__init__( \
             bearer_token, *, return_type=Response, wait_on_rate_limit=False, \
             chunk_size=512, daemon=False, max_retries=inf, proxy=None, \
-            verify=True \
+            verify=True, deduplicator=None, predicates=None, \
+            entity_cache=None \
         )
         """
         BaseClient.__init__(self, bearer_token, return_type=return_type,
-                            wait_on_rate_limit=wait_on_rate_limit)
+                            wait_on_rate_limit=wait_on_rate_limit,
+                            entity_cache=entity_cache)
         BaseStream.__init__(self, **kwargs)
+        self.deduplicator = deduplicator
+        self.predicates = list(predicates or ())
+        self._stream_params = {}
+
+        self.lines_dispatched = 0
+        self.lines_filtered = 0
 
     def _connect(self, method, endpoint, **kwargs):
+        self._stream_params = kwargs.get("params") or {}
         self.session.headers["Authorization"] = f"Bearer {self.bearer_token}"
         url = f"https://api.twitter.com/2/tweets/{endpoint}/stream"
         super()._connect(method, url, **kwargs)
@@ -403,7 +699,7 @@ class StreamingClient(BaseClient, BaseStream):
             were disconnected for 90 seconds, and you requested two minutes of
             backfill, you will receive 30 seconds worth of duplicate Tweets.
             Due to this, you should make sure your system is tolerant of
-            duplicate data.
+            duplicate data, e.g. by using a :class:`StreamDeduplicator`.
 
             This feature is currently only available to the Academic Research
             product track.
@@ -510,7 +806,7 @@ class StreamingClient(BaseClient, BaseStream):
             were disconnected for 90 seconds, and you requested two minutes of
             backfill, you will receive 30 seconds worth of duplicate Tweets.
             Due to this, you should make sure your system is tolerant of
-            duplicate data.
+            duplicate data, e.g. by using a :class:`StreamDeduplicator`.
 
             This feature is currently only available to the Academic Research
             product track.
@@ -576,7 +872,28 @@ class StreamingClient(BaseClient, BaseStream):
         ----------
         https://developer.twitter.com/en/docs/twitter-api/tweets/filtered-stream/integrate/consuming-streaming-data
         """
+        if self.predicates:
+            # Only lines with Tweets are filtered, so that errors and other
+            # messages are always dispatched
+            line = StreamLine(raw_data)
+            if line.has_data and not all(
+                predicate(line) for predicate in self.predicates
+            ):
+                self.lines_filtered += 1
+                return
+        if (
+            self.deduplicator is not None and
+            self.deduplicator.is_duplicate(raw_data)
+        ):
+            return
+        self.lines_dispatched += 1
+
         data = json.loads(raw_data)
+        if self.entity_cache is not None:
+            self.entity_cache.add_response(
+                data, self._stream_params, "tweet",
+                scope=self._get_auth_hash(False)
+            )
 
         tweet = None
         includes = {}
@@ -654,6 +971,172 @@ class StreamingClient(BaseClient, BaseStream):
         log.debug("Received response: %s", response)
 
 
+class _StreamConnection(BaseStream):
+    # A single connection of a RedundantStreamingClient, which forwards the
+    # data and events it receives to the client to be handled in order of
+    # arrival
+
+    def __init__(self, client, index, events, **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+        self.index = index
+        self.events = events
+        self.stopped = Event()
+
+    def _connect(self, method, endpoint, **kwargs):
+        # Stagger connecting, so that the connections are never all
+        # reconnecting at the same time
+        if self.stopped.wait(self.index * self.client.stagger):
+            return
+        self.session.headers["Authorization"] = (
+            f"Bearer {self.client.bearer_token}"
+        )
+        url = f"https://api.twitter.com/2/tweets/{endpoint}/stream"
+        super()._connect(method, url, **kwargs)
+
+    def _put(self, handler, *args):
+        # Wait while the queue is full, which stops reading from the
+        # connection, unless the stream is stopped while waiting
+        while not self.stopped.is_set():
+            try:
+                self.events.put((handler, args), timeout=1)
+                return
+            except Full:
+                continue
+
+    def _stagger_reconnect(self):
+        if self.running:
+            self.stopped.wait(self.index * self.client.stagger)
+
+    def disconnect(self):
+        self.running = False
+        self.stopped.set()
+
+    def on_closed(self, response):
+        self._put("on_closed", response)
+        self._stagger_reconnect()
+
+    def on_connect(self):
+        self._put("on_connect")
+
+    def on_connection_error(self):
+        self._put("on_connection_error")
+        self._stagger_reconnect()
+
+    def on_data(self, raw_data):
+        self._put("on_data", raw_data)
+
+    def on_disconnect(self):
+        log.info("Stream connection %d disconnected", self.index)
+
+    def on_exception(self, exception):
+        self._put("on_exception", exception)
+
+    def on_keep_alive(self):
+        self._put("on_keep_alive")
+
+    def on_request_error(self, status_code):
+        self._put("on_request_error", status_code)
+        self._stagger_reconnect()
+
+
+class RedundantStreamingClient(StreamingClient):
+    """Filter and sample realtime Tweets with Twitter API v2, using multiple
+    redundant connections
+
+    Each connection runs in its own thread, with its own session. Data
+    received from all of the connections is merged, deduplicated, and passed
+    to the handlers, e.g. :meth:`on_data` and :meth:`on_tweet`, in a single
+    thread, in order of arrival. Connecting and reconnecting the connections
+    is staggered, so that the stream stays up while a connection is
+    reconnecting.
+
+    The Twitter API only allows a limited number of connections to a stream,
+    depending on the access level.
+
+    .. versionadded:: 4.16
+
+    Parameters
+    ----------
+    bearer_token : str
+        Twitter API Bearer Token
+    connections : int
+        Number of connections to use
+    stagger : float
+        Number of seconds to wait between connecting each connection and to
+        offset each connection's reconnects by
+    deduplicator : StreamDeduplicator | None
+        Used to drop duplicate Tweets received from multiple connections. If
+        not provided, a :class:`StreamDeduplicator` with the default
+        parameters is used.
+    max_queue_size : int
+        Maximum number of lines of data and events received from the
+        connections to queue for the handlers. While the queue is full, the
+        connections wait to read more data, so a stream whose handlers fall
+        too far behind can be disconnected by Twitter's API, after which it's
+        reconnected.
+    **kwargs
+        The other parameters of :class:`StreamingClient`, which are used for
+        each connection
+
+    Attributes
+    ----------
+    streams : list
+        The connections of the stream currently running or last run
+    """
+
+    def __init__(self, bearer_token, *, connections=2, stagger=5,
+                 deduplicator=None, max_queue_size=1000, **kwargs):
+        if deduplicator is None:
+            deduplicator = StreamDeduplicator()
+        super().__init__(bearer_token, deduplicator=deduplicator, **kwargs)
+        self.connections = connections
+        self.stagger = stagger
+        self.max_queue_size = max_queue_size
+        self.streams = []
+
+    def _connect(self, method, endpoint, **kwargs):
+        self.running = True
+        self._stream_params = kwargs.get("params") or {}
+
+        events = Queue(self.max_queue_size)
+        self.streams = [
+            _StreamConnection(
+                self, index, events, chunk_size=self.chunk_size,
+                daemon=self.daemon, max_retries=self.max_retries,
+                verify=self.verify
+            )
+            for index in range(self.connections)
+        ]
+        threads = []
+        for stream in self.streams:
+            stream.proxies = self.proxies
+            thread = Thread(
+                target=stream._connect,
+                name=f"Tweepy Stream Connection {stream.index}",
+                args=(method, endpoint), kwargs=kwargs, daemon=self.daemon
+            )
+            thread.start()
+            threads.append(thread)
+
+        try:
+            while self.running:
+                try:
+                    handler, args = events.get(timeout=1)
+                except Empty:
+                    if not any(thread.is_alive() for thread in threads):
+                        break
+                    continue
+                getattr(self, handler)(*args)
+        except Exception as exc:
+            self.on_exception(exc)
+        finally:
+            self.running = False
+            for stream in self.streams:
+                stream.disconnect()
+            self.on_disconnect()
+
+
 class StreamRule(NamedTuple):
     """Rule for filtered stream
 
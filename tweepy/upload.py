@@ -0,0 +1,176 @@
+# Tweepy
+# Copyright 2009-2023 Joshua Roesslein
+# See LICENSE for details.
+
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+
+class ResumableUpload:
+    """ResumableUpload(state_file)
+
+    State of a chunked media upload, persisted to a small JSON file whenever
+    it changes, so that :meth:`API.chunked_upload` can resume an interrupted
+    upload by appending only the segments that weren't completed, instead of
+    starting over.
+
+    .. versionadded:: 4.16
+
+    Parameters
+    ----------
+    state_file : str
+        Path of the file to persist the state to, which is loaded if it exists
+
+    Attributes
+    ----------
+    media_id : int | None
+        The ID of the media being uploaded, if the upload was initialized
+    filename : str | None
+        Name of the file being uploaded
+    total_bytes : int | None
+        Size of the media being uploaded
+    chunk_size : int | None
+        Size of each segment
+    completed_segments : set[int]
+        Indexes of the segments that were appended
+    fingerprint : str | None
+        Fingerprint of the contents of the file being uploaded, from
+        :meth:`fingerprint_file`, so that a different file with the same name
+        and size isn't resumed
+    expires_at : float | None
+        Time, in seconds since the epoch, when the upload session expires. If
+        Twitter's API doesn't return when it expires, it's assumed to expire
+        after ``default_expires_after_secs``.
+    finalized : bool
+        Whether the upload was finalized and is being processed
+    """
+
+    # number of seconds that an upload session is assumed to be resumable for,
+    # if Twitter's API doesn't return when it expires
+    default_expires_after_secs = 3600
+    # number of bytes at the start and end of a file that are hashed to
+    # fingerprint it
+    fingerprint_sample_size = 64 * 1024
+
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._reset()
+        self.load()
+
+    def _reset(self):
+        self.media_id = None
+        self.filename = None
+        self.total_bytes = None
+        self.chunk_size = None
+        self.completed_segments = set()
+        self.fingerprint = None
+        self.expires_at = None
+        self.finalized = False
+
+    def load(self):
+        """Load the state from ``state_file``, if it exists"""
+        try:
+            with open(self.state_file) as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return
+        self.media_id = state["media_id"]
+        self.filename = state["filename"]
+        self.total_bytes = state["total_bytes"]
+        self.chunk_size = state["chunk_size"]
+        self.completed_segments = set(state["completed_segments"])
+        self.fingerprint = state.get("fingerprint")
+        self.expires_at = state["expires_at"]
+        self.finalized = state["finalized"]
+
+    def save(self):
+        """Persist the state to ``state_file``"""
+        state = {
+            "media_id": self.media_id,
+            "filename": self.filename,
+            "total_bytes": self.total_bytes,
+            "chunk_size": self.chunk_size,
+            "completed_segments": sorted(self.completed_segments),
+            "fingerprint": self.fingerprint,
+            "expires_at": self.expires_at,
+            "finalized": self.finalized
+        }
+        # Write to a temporary file and replace the state file with it, so
+        # that the state file is never left partially written
+        temp_file = self.state_file + ".tmp"
+        with open(temp_file, "w") as file:
+            json.dump(state, file)
+        os.replace(temp_file, self.state_file)
+
+    def clear(self):
+        """Reset the state and delete ``state_file``"""
+        with self._lock:
+            self._reset()
+            try:
+                os.remove(self.state_file)
+            except FileNotFoundError:
+                pass
+
+    @classmethod
+    def fingerprint_file(cls, fp, start, total_bytes):
+        """Fingerprint the contents of a file, from its modification time,
+        if it has one, its size, and a hash of the bytes at its start and
+        end, leaving its position at ``start``
+        """
+        fingerprint = hashlib.sha256()
+        try:
+            modified_time = os.fstat(fp.fileno()).st_mtime_ns
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            modified_time = None
+        fingerprint.update(f"{modified_time}:{total_bytes}:".encode())
+        sample_size = cls.fingerprint_sample_size
+        fp.seek(start)
+        fingerprint.update(fp.read(sample_size))
+        if total_bytes > sample_size:
+            fp.seek(start + max(total_bytes - sample_size, sample_size))
+            fingerprint.update(fp.read(sample_size))
+        fp.seek(start)
+        return fingerprint.hexdigest()
+
+    def resumable(self, filename, total_bytes, fingerprint):
+        """Whether the state is of an unexpired upload of the same file, with
+        the same fingerprint
+        """
+        return (
+            self.media_id is not None and self.filename == filename and
+            self.total_bytes == total_bytes and
+            fingerprint is not None and self.fingerprint == fingerprint and
+            self.expires_at is not None and time.time() < self.expires_at
+        )
+
+    def start(self, media_id, filename, total_bytes, chunk_size,
+              expires_after_secs=None, *, fingerprint=None):
+        """Record a newly initialized upload"""
+        with self._lock:
+            self._reset()
+            self.media_id = media_id
+            self.filename = filename
+            self.total_bytes = total_bytes
+            self.chunk_size = chunk_size
+            self.fingerprint = fingerprint
+            if expires_after_secs is None:
+                expires_after_secs = self.default_expires_after_secs
+            self.expires_at = time.time() + expires_after_secs
+            self.save()
+
+    def complete_segment(self, segment_index):
+        """Record that a segment was appended"""
+        with self._lock:
+            self.completed_segments.add(segment_index)
+            self.save()
+
+    def finalize(self):
+        """Record that the upload was finalized and is being processed"""
+        with self._lock:
+            self.finalized = True
+            self.save()
@@ -2,7 +2,16 @@
 # Copyright 2010-2023 Joshua Roesslein
 # See LICENSE for details.
 
+import asyncio
+import base64
+from concurrent.futures import Future
 import datetime
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from urllib.parse import quote
 
 
 def list_to_csv(item_list):
@@ -14,3 +23,144 @@ def parse_datetime(datetime_string):
     return datetime.datetime.strptime(
         datetime_string, "%Y-%m-%dT%H:%M:%S.%f%z"
     ).replace(tzinfo=datetime.timezone.utc)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key, from multiple threads,
+    into a single call, sharing its result or exception"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = self._calls[key] = Future()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent calls with the same key, from multiple tasks, into
+    a single call, sharing its result or exception"""
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, function, *args, **kwargs):
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Retry if the call was cancelled, rather than this task
+                if not future.cancelled():
+                    raise
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await function(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved, in case there are no other
+            # callers waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+
+def percent_encode(value):
+    # RFC 3986 percent-encoding, as required by OAuth 1.0a, leaving only
+    # unreserved characters unencoded
+    return quote(value, safe="")
+
+
+class OAuth1Signer:
+    """Sign requests with OAuth 1.0a HMAC-SHA1 signatures for a set of
+    credentials, reusing the HMAC key and encoded protocol parameters for
+    each request"""
+
+    def __init__(self, consumer_key, consumer_secret, access_token,
+                 access_token_secret):
+        self.credentials = (
+            consumer_key, consumer_secret, access_token, access_token_secret
+        )
+        key = (
+            f"{percent_encode(consumer_secret or '')}&"
+            f"{percent_encode(access_token_secret or '')}"
+        )
+        self._hmac = hmac.new(key.encode("utf-8"), digestmod=hashlib.sha1)
+        oauth_params = [
+            ("oauth_version", "1.0"),
+            ("oauth_signature_method", "HMAC-SHA1"),
+            ("oauth_consumer_key", consumer_key)
+        ]
+        if access_token is not None:
+            oauth_params.append(("oauth_token", access_token))
+        self._oauth_params = [
+            (name, percent_encode(value)) for name, value in oauth_params
+        ]
+
+    def sign(self, method, url, params=None):
+        """Get the URL with the query string of the parameters, and the
+        Authorization header value, for a request
+
+        The URL must be a normalized base string URI, without a query string.
+        """
+        # The encoded query parameters are used both for the signature base
+        # string and for the query string, so they're only encoded once
+        query = sorted(
+            (percent_encode(str(name)), percent_encode(str(value)))
+            for name, value in (params or {}).items()
+        )
+        oauth_params = [
+            ("oauth_nonce", secrets.token_hex(16)),
+            ("oauth_timestamp", str(int(time.time()))),
+            *self._oauth_params
+        ]
+        normalized_params = "&".join(
+            f"{name}={value}" for name, value in sorted(query + oauth_params)
+        )
+        base_string = (
+            f"{method.upper()}&{percent_encode(url)}&"
+            f"{percent_encode(normalized_params)}"
+        )
+
+        signature = self._hmac.copy()
+        signature.update(base_string.encode("utf-8"))
+        signature = base64.b64encode(signature.digest()).decode("ascii")
+        oauth_params.append(("oauth_signature", percent_encode(signature)))
+
+        authorization = "OAuth " + ", ".join(
+            f'{name}="{value}"' for name, value in oauth_params
+        )
+        if query:
+            url += "?" + "&".join(f"{name}={value}" for name, value in query)
+        return url, authorization